@@ -11,15 +11,95 @@ class Settings(BaseSettings):
     mysql_user: str
     mysql_password: str
     mysql_database: str
+    mysql_pool_size: int = 5
+    mysql_max_overflow: int = 10
+    mysql_pool_recycle: int = 3600
+    mysql_pool_pre_ping: bool = True
+    # Raw aiomysql pool used by the deal/deposit saga
+    mysql_saga_pool_minsize: int = 1
+    mysql_saga_pool_maxsize: int = 10
+    # Deal/deposit saga log and crash recovery
+    saga_log_enabled: bool = True
+    saga_lease_seconds: int = 120
+    saga_recovery_interval_seconds: int = 30
+    saga_recovery_max_attempts: int = 5
+    saga_log_retention_days: int = 7
 
     mongodb_url: str
     mongodb_database: str
 
     redis_url: str = "redis://localhost:6379"
+    cache_enabled: bool = True
+    cache_backend: str = "auto"  # auto | redis | memory
+    cache_default_ttl_seconds: int = 300
+    cache_dashboard_ttl_seconds: int = 30
+    cache_max_entries: int = 10000
+    cache_lock_timeout_ms: int = 2000
+
+    stats_reconcile_interval_seconds: int = 900
+
+    # Idempotency-Key records: completed responses are kept for the TTL,
+    # in-flight claims expire after the lock time
+    idempotency_backend: str = "auto"  # auto | redis | mongodb
+    idempotency_ttl_seconds: int = 86400
+    idempotency_lock_seconds: int = 60
+    idempotency_complete_retries: int = 3
+
+    # Participant snapshot refresh of open deals after a user update
+    snapshot_refresh_batch_size: int = 500
+    snapshot_refresh_max_writes_per_second: int = 2000  # 0 = unthrottled
+
+    # Change feed on deals / properties / users for cache invalidation
+    change_feed_enabled: bool = True
+    change_feed_mode: str = "auto"  # auto | stream | poll (standalone mongod)
+    change_feed_poll_interval_seconds: float = 2.0
+    change_feed_poll_overlap_seconds: float = 5.0
+    change_feed_poll_batch_size: int = 1000
+
+    # Readiness probe: per-dependency ping timeout and result cache
+    health_check_timeout_seconds: float = 2.0
+    health_cache_ttl_seconds: float = 2.0
+
+    # Query profiler (Server-Timing on requests with the header or sampled)
+    # and slow-query / slow-request log
+    profiler_header: str = "X-Profile"
+    profiler_sample_rate: float = 0.0
+    slow_query_ms: int = 200
+    slow_request_ms: int = 1000
+    slow_query_explain: bool = True
+
+    # Monthly partitions of transactions / audit_logs and their archive tier
+    partition_months_ahead: int = 3
+    partition_maintenance_interval_seconds: int = 86400
+    archive_after_months: int = 12
+    archive_dir: str = "archive"
+    archive_format: str = "ndjson"  # ndjson (gzip) | parquet (needs pyarrow)
+
+    # Audit log writer: buffered multi-row INSERTs, or durable (in the
+    # business transaction) for every entry rather than only those callers
+    # mark durable
+    audit_durable: bool = False
+    audit_batch_size: int = 500
+    audit_flush_interval_ms: int = 200
+    audit_queue_max: int = 10000
+    audit_flush_retries: int = 3
+    audit_drain_timeout_seconds: int = 10
+    stream_batch_size: int = 500
+    # Serve list pages from stored documents without response-model validation
+    trusted_responses: bool = True
+
+    # Bulk import endpoints
+    bulk_max_rows: int = 50000
+    bulk_insert_chunk_size: int = 1000
 
     secret_key: str
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 30
+    # Verified-token LRU (0 disables)
+    token_cache_max_entries: int = 10000
+    # bcrypt runs on a bounded thread pool; callers beyond the queue get 503
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 256
 
     @property
     def mysql_url(self) -> str:
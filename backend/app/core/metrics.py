@@ -0,0 +1,227 @@
+"""
+Prometheus metrics, exposed on ``/metrics``.
+
+- HTTP: per-route latency and response-size histograms, labelled by the
+  route template (``/api/deals/{deal_id}``), and in-flight requests
+  (MetricsMiddleware)
+- MongoDB: command latency per command and collection, from a pymongo
+  CommandListener registered on the Motor client
+- MySQL: statement latency per operation and table from SQLAlchemy engine
+  events; checkouts, new connections and in-use/capacity gauges for the
+  SQLAlchemy pool and the raw aiomysql pool, plus acquisition wait time
+  for the latter
+- Sagas: step durations and outcomes
+
+Metrics live in the default registry of this process; with several
+uvicorn workers each one exposes its own numbers.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import Callable, Dict, Tuple
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, Counter, Gauge, Histogram, generate_latest
+)
+from prometheus_client.core import GaugeMetricFamily
+from pymongo import monitoring
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+)
+SIZE_BUCKETS = (100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds", "HTTP request latency",
+    ["method", "route", "status"], buckets=LATENCY_BUCKETS
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes", "HTTP response body size",
+    ["method", "route"], buckets=SIZE_BUCKETS
+)
+HTTP_IN_PROGRESS = Gauge(
+    "http_requests_in_progress", "HTTP requests being handled", ["method"]
+)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command round-trip time",
+    ["command", "collection", "outcome"], buckets=LATENCY_BUCKETS
+)
+MYSQL_STATEMENT_DURATION = Histogram(
+    "mysql_statement_duration_seconds", "MySQL statement time (SQLAlchemy engine)",
+    ["operation", "table"], buckets=LATENCY_BUCKETS
+)
+MYSQL_POOL_CHECKOUTS = Counter(
+    "mysql_pool_checkouts_total", "Connections checked out of a MySQL pool", ["pool"]
+)
+MYSQL_POOL_CONNECTS = Counter(
+    "mysql_pool_connections_created_total", "New connections opened by a MySQL pool", ["pool"]
+)
+MYSQL_POOL_WAIT = Histogram(
+    "mysql_pool_wait_seconds", "Time spent waiting for a pooled MySQL connection",
+    ["pool"], buckets=LATENCY_BUCKETS
+)
+SAGA_STEP_DURATION = Histogram(
+    "saga_step_duration_seconds", "Duration of saga steps",
+    ["saga", "step", "outcome"], buckets=LATENCY_BUCKETS
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware), so streamed responses are
+    timed to their last chunk and their full size is counted.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        size = 0
+
+        async def send_with_metrics(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_metrics)
+        finally:
+            duration = time.perf_counter() - start
+            in_progress.dec()
+            # The router stores the matched route in the scope; unmatched
+            # paths share one label so scanners can't explode cardinality
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_DURATION.labels(method, template, str(status)).observe(duration)
+            HTTP_RESPONSE_SIZE.labels(method, template).observe(size)
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Times every command sent by the Motor client"""
+
+    def __init__(self):
+        self.collections: Dict[Tuple, str] = {}
+
+    def started(self, event):
+        target = event.command.get(event.command_name)
+        if not isinstance(target, str):
+            target = event.command.get("collection", "")  # getMore
+        self.collections[(event.connection_id, event.request_id)] = target or ""
+
+    def succeeded(self, event):
+        self._observe(event, "success")
+
+    def failed(self, event):
+        self._observe(event, "failure")
+
+    def _observe(self, event, outcome: str):
+        collection = self.collections.pop((event.connection_id, event.request_id), "")
+        MONGO_COMMAND_DURATION.labels(event.command_name, collection, outcome).observe(
+            event.duration_micros / 1e6
+        )
+
+
+mongo_command_metrics = MongoCommandMetrics()
+
+
+_TABLE_PATTERN = re.compile(r"\b(?:FROM|INTO|UPDATE|JOIN)\s+`?(\w+)`?", re.IGNORECASE)
+
+
+@lru_cache(maxsize=1024)
+def statement_labels(statement: str) -> Tuple[str, str]:
+    """(operation, first table) of a SQL statement, for metric labels"""
+    words = statement.lstrip().split(None, 1)
+    operation = words[0].upper() if words else ""
+    match = _TABLE_PATTERN.search(statement)
+    return operation, match.group(1) if match else ""
+
+
+class PoolCollector:
+    """In-use / capacity gauges read from the pools at scrape time"""
+
+    def __init__(self):
+        self.pools: Dict[str, Callable[[], Tuple[int, int]]] = {}
+
+    def collect(self):
+        in_use = GaugeMetricFamily(
+            "mysql_pool_connections_in_use", "Connections checked out of a MySQL pool", labels=["pool"]
+        )
+        capacity = GaugeMetricFamily(
+            "mysql_pool_connections_max", "Maximum connections of a MySQL pool", labels=["pool"]
+        )
+        for name, read in self.pools.items():
+            used, maximum = read()
+            in_use.add_metric([name], used)
+            capacity.add_metric([name], maximum)
+        yield in_use
+        yield capacity
+
+
+pool_collector = PoolCollector()
+REGISTRY.register(pool_collector)
+
+
+def instrument_engine(engine, capacity: int, pool_name: str = "sqlalchemy"):
+    """Attach statement timing and pool event listeners to an async engine"""
+    sync_engine = engine.sync_engine
+    pool = sync_engine.pool
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._metrics_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _observe_statement(conn, cursor, statement, parameters, context, executemany):
+        operation, table = statement_labels(statement)
+        MYSQL_STATEMENT_DURATION.labels(operation, table).observe(
+            time.perf_counter() - context._metrics_started
+        )
+
+    @event.listens_for(pool, "checkout")
+    def _count_checkout(dbapi_connection, connection_record, connection_proxy):
+        MYSQL_POOL_CHECKOUTS.labels(pool_name).inc()
+
+    @event.listens_for(pool, "connect")
+    def _count_connect(dbapi_connection, connection_record):
+        MYSQL_POOL_CONNECTS.labels(pool_name).inc()
+
+    pool_collector.pools[pool_name] = lambda: (pool.checkedout(), capacity)
+
+
+def track_pool(pool_name: str, read: Callable[[], Tuple[int, int]]):
+    """Register an (in use, capacity) reader for a pool SQLAlchemy doesn't manage"""
+    pool_collector.pools[pool_name] = read
+
+
+@contextmanager
+def saga_step(saga: str, step: str):
+    """Time one saga step, labelled with whether it raised"""
+    start = time.perf_counter()
+    outcome = "success"
+    try:
+        yield
+    except BaseException:
+        outcome = "failure"
+        raise
+    finally:
+        SAGA_STEP_DURATION.labels(saga, step, outcome).observe(time.perf_counter() - start)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(REGISTRY), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,274 @@
+"""
+Per-request query profiler and slow-query log.
+
+Every request runs with a RequestProfile in a context variable. Motor
+copies the context into its executor threads and SQLAlchemy's greenlets
+inherit it, so the pymongo CommandListener, the SQLAlchemy engine events
+and the saga's aiomysql cursor class below can attribute each database
+call to the request that made it.
+
+Profiling proper is opt-in: a request whose ``profiler_header`` header
+is set (``X-Profile: 1``), or a random ``profiler_sample_rate`` share of
+requests, records every call. Its response gets a ``Server-Timing``
+header with time and call count per database / command / collection (or
+SQL operation / table), visible in browser devtools.
+
+The slow log applies to all requests:
+- a database call over ``slow_query_ms`` is logged with the request that
+  made it. Mongo queries include their filter (never the written
+  documents) and, with ``slow_query_explain``, the winning plan from a
+  queryPlanner-verbosity ``explain``, run after the fact on the loop.
+- a request over ``slow_request_ms`` is logged, with its top calls when
+  it was profiled.
+"""
+
+import asyncio
+import contextvars
+import logging
+import random
+import time
+from typing import Dict, List, Optional, Tuple
+
+import aiomysql
+from bson import json_util
+from pymongo import monitoring
+from sqlalchemy import event
+
+from app.core.config import get_settings
+from app.core.metrics import statement_labels
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_MAX_ENTRIES = 20
+LOGGED_COMMAND_MAX_CHARS = 2000
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, enabled: bool):
+        self.method = method
+        self.path = path
+        self.enabled = enabled
+        self.start = time.perf_counter()
+        # (database, name) -> [total seconds, calls]
+        self.totals: Dict[Tuple[str, str], List[float]] = {}
+
+    def record(self, database: str, name: str, seconds: float):
+        entry = self.totals.setdefault((database, name), [0.0, 0])
+        entry[0] += seconds
+        entry[1] += 1
+
+    def top(self, count: int) -> List[Tuple[str, str, float, int]]:
+        ranked = sorted(self.totals.items(), key=lambda item: item[1][0], reverse=True)
+        return [(db, name, seconds, int(calls)) for (db, name), (seconds, calls) in ranked[:count]]
+
+    def server_timing(self) -> str:
+        entries = [
+            f'{db}.{name};dur={seconds * 1000:.2f};desc="{calls} call{"s" if calls != 1 else ""}"'
+            for db, name, seconds, calls in self.top(SERVER_TIMING_MAX_ENTRIES)
+        ]
+        entries.append(f"total;dur={(time.perf_counter() - self.start) * 1000:.2f}")
+        return ", ".join(entries)
+
+    def describe(self) -> str:
+        return f"{self.method} {self.path}"
+
+
+current_profile: contextvars.ContextVar[Optional[RequestProfile]] = contextvars.ContextVar(
+    "current_profile", default=None
+)
+
+
+def _record(database: str, name: str, seconds: float, detail: str):
+    """Attribute one database call to the current request and slow-log it"""
+    profile = current_profile.get()
+    if profile is not None and profile.enabled:
+        profile.record(database, name, seconds)
+    if seconds * 1000 >= settings.slow_query_ms:
+        origin = profile.describe() if profile is not None else "background task"
+        logger.warning(
+            f"Slow {database} query {name} took {seconds * 1000:.1f}ms during {origin}: {detail}"
+        )
+
+
+class ProfilerMiddleware:
+    """Sets up the request profile and emits Server-Timing / slow-request logs"""
+
+    def __init__(self, app):
+        self.app = app
+        self.header = settings.profiler_header.lower().encode()
+
+    def _wants_profile(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.header:
+                return value.strip().lower() not in (b"", b"0", b"false")
+        return random.random() < settings.profiler_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], self._wants_profile(scope))
+        token = current_profile.set(profile)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and profile.enabled:
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", profile.server_timing().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            current_profile.reset(token)
+            elapsed_ms = (time.perf_counter() - profile.start) * 1000
+            if elapsed_ms >= settings.slow_request_ms:
+                breakdown = ""
+                if profile.enabled:
+                    breakdown = "; " + ", ".join(
+                        f"{db}.{name} {seconds * 1000:.1f}ms x{calls}"
+                        for db, name, seconds, calls in profile.top(5)
+                    )
+                logger.warning(f"Slow request {profile.describe()} took {elapsed_ms:.1f}ms{breakdown}")
+
+
+# ── MongoDB ──
+
+EXPLAINABLE_COMMANDS = {"find", "aggregate", "count", "distinct", "findAndModify", "update", "delete"}
+# Session / transport fields that must not be repeated inside explain
+_COMMAND_METADATA = {"lsid", "txnNumber", "autocommit", "startTransaction",
+                     "readConcern", "writeConcern", "$clusterTime", "$db", "$readPreference"}
+
+
+def _command_summary(name: str, command: dict) -> dict:
+    """The query shape of a command, without the documents it writes"""
+    if name == "find":
+        keys = ("filter", "sort", "projection", "limit", "skip", "hint")
+    elif name == "aggregate":
+        keys = ("pipeline",)
+    elif name in ("count", "distinct"):
+        keys = ("query", "key")
+    elif name == "findAndModify":
+        keys = ("query", "sort")
+    elif name == "update":
+        return {"q": [u.get("q") for u in command.get("updates", [])]}
+    elif name == "delete":
+        return {"q": [d.get("q") for d in command.get("deletes", [])]}
+    elif name == "insert":
+        return {"documents": len(command.get("documents", []))}
+    else:
+        keys = ()
+    return {key: command[key] for key in keys if key in command}
+
+
+def _truncate(text: str) -> str:
+    if len(text) <= LOGGED_COMMAND_MAX_CHARS:
+        return text
+    return text[:LOGGED_COMMAND_MAX_CHARS] + "...(truncated)"
+
+
+def _winning_plan_stages(plan: dict) -> str:
+    """Flatten a winningPlan tree into 'FETCH <- IXSCAN {status: 1}' form"""
+    stages = []
+    while plan:
+        stage = plan.get("stage", "?")
+        if "keyPattern" in plan:
+            stage += f" {json_util.dumps(plan['keyPattern'])}"
+        stages.append(stage)
+        plan = plan.get("inputStage") or (plan.get("inputStages") or [None])[0]
+    return " <- ".join(stages)
+
+
+async def _explain_and_log(client, database: str, name: str, command: dict, summary: str):
+    inner = {key: value for key, value in command.items() if key not in _COMMAND_METADATA}
+    try:
+        result = await client[database].command(
+            {"explain": inner, "verbosity": "queryPlanner"}
+        )
+        planner = result.get("queryPlanner") or result.get("stages", [{}])[0].get("$cursor", {}).get("queryPlanner", {})
+        plan = _winning_plan_stages(planner.get("winningPlan", {}))
+        logger.warning(f"Slow mongodb query {name} plan: {plan or 'unavailable'} for {summary}")
+    except Exception as e:
+        logger.info(f"Could not explain slow mongodb {name}: {e}")
+
+
+class MongoQueryProfiler(monitoring.CommandListener):
+    def __init__(self):
+        self.commands: Dict[Tuple, Tuple[str, dict]] = {}
+        self.client = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def attach(self, client):
+        """Bind the Motor client and loop used to run explain for slow queries"""
+        self.client = client
+        self.loop = asyncio.get_running_loop()
+
+    def started(self, event):
+        name = event.command_name
+        target = event.command.get(name)
+        if not isinstance(target, str):
+            target = event.command.get("collection", "")  # getMore
+        command = event.command if name in EXPLAINABLE_COMMANDS else None
+        self.commands[(event.connection_id, event.request_id)] = (f"{name}.{target}", command)
+
+    def succeeded(self, event):
+        self._finish(event)
+
+    def failed(self, event):
+        self._finish(event)
+
+    def _finish(self, event):
+        label, command = self.commands.pop((event.connection_id, event.request_id), ("", None))
+        if not label:
+            return
+        seconds = event.duration_micros / 1e6
+        slow = seconds * 1000 >= settings.slow_query_ms
+        summary = ""
+        if slow:
+            summary = _truncate(json_util.dumps(_command_summary(event.command_name, command or {})))
+        _record("mongodb", label, seconds, summary)
+        if (slow and command is not None and settings.slow_query_explain
+                and self.client is not None and self.loop is not None):
+            # Listener callbacks run on Motor's executor threads; explain
+            # runs on the event loop once this command has returned
+            self.loop.call_soon_threadsafe(
+                asyncio.ensure_future,
+                _explain_and_log(self.client, event.database_name, label, dict(command), summary)
+            )
+
+
+mongo_query_profiler = MongoQueryProfiler()
+
+
+# ── MySQL ──
+
+def _record_sql(statement: str, seconds: float):
+    operation, table = statement_labels(statement)
+    detail = _truncate(" ".join(statement.split())) if seconds * 1000 >= settings.slow_query_ms else ""
+    _record("mysql", f"{operation.lower()}.{table}" if table else operation.lower(), seconds, detail)
+
+
+def profile_engine(engine):
+    """Attribute statements run through an async SQLAlchemy engine"""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _start_timer(conn, cursor, statement, parameters, context, executemany):
+        context._profile_started = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _record_statement(conn, cursor, statement, parameters, context, executemany):
+        _record_sql(statement, time.perf_counter() - context._profile_started)
+
+
+class ProfiledCursor(aiomysql.Cursor):
+    """aiomysql cursor that attributes its statements like the engine events do"""
+
+    async def execute(self, query, args=None):
+        start = time.perf_counter()
+        try:
+            return await super().execute(query, args)
+        finally:
+            _record_sql(query, time.perf_counter() - start)
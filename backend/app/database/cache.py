@@ -0,0 +1,330 @@
+"""
+Read-through cache for hot GET endpoints.
+
+Backed by Redis (``settings.redis_url``) when it is reachable, otherwise by
+an in-process LRU so the cache also works in local development and tests.
+Values are stored as JSON, so both backends hand back fresh copies.
+
+Stampede protection: concurrent misses for the same key inside one process
+share a single load; across processes the loader holds a short Redis lock
+(SET NX PX) while other processes poll for the value it writes.
+
+Writes made outside this process (other pods, scripts, the mongo shell)
+evict entries through the change feed (app.database.change_feed).
+
+Invalidation beats in-flight loads: every eviction bumps a generation
+(per key, and per key family such as ``property:`` for prefix
+evictions), a load reads the generation before calling its loader, and
+its value is only stored if the generation is still the same. A loader
+that read the old document can therefore not put it back after the
+write that replaced it was invalidated.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import get_settings
+from app.database.change_feed import ChangeEvent, change_feed
+
+try:
+    import redis.asyncio as aioredis
+except ImportError:  # redis is optional; fall back to the in-process LRU
+    aioredis = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+# Outlives any in-flight load, so an expired generation cannot look unchanged
+GENERATION_TTL_SECONDS = 3600
+
+
+def _family(key: str) -> str:
+    """Prefix shared by the key's siblings (``property:`` for property:<id>)"""
+    return key.split(":", 1)[0] + ":"
+
+
+class MemoryBackend:
+    """Bounded in-process LRU with per-entry expiry"""
+
+    name = "memory"
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[str, tuple[float, str]]" = OrderedDict()
+        # One generation for all keys: any eviction voids every running load
+        self.version = 0
+
+    async def get(self, key: str) -> Optional[str]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return value
+
+    async def generation(self, key: str) -> str:
+        return str(self.version)
+
+    async def set_if_current(self, key: str, value: str, ttl: int, generation: str) -> bool:
+        if generation != str(self.version):
+            return False
+        self.entries[key] = (time.monotonic() + ttl, value)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        return True
+
+    async def delete(self, *keys: str):
+        self.version += 1
+        for key in keys:
+            self.entries.pop(key, None)
+
+    async def delete_prefix(self, prefix: str):
+        self.version += 1
+        for key in [key for key in self.entries if key.startswith(prefix)]:
+            del self.entries[key]
+
+    async def acquire_lock(self, key: str, ttl_ms: int) -> bool:
+        # In-process single-flight already serializes loads
+        return True
+
+    async def release_lock(self, key: str):
+        pass
+
+    async def close(self):
+        self.entries.clear()
+
+
+# KEYS: value, key generation, family generation; ARGV: generation, value, ttl
+SET_IF_CURRENT_SCRIPT = (
+    "local current = (redis.call('GET', KEYS[2]) or '') .. '|' .. (redis.call('GET', KEYS[3]) or '') "
+    "if current ~= ARGV[1] then return 0 end "
+    "redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3]) return 1"
+)
+
+
+class RedisBackend:
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+        self.set_script = client.register_script(SET_IF_CURRENT_SCRIPT)
+
+    @staticmethod
+    def _generation_key(key: str) -> str:
+        return f"gen:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        return await self.client.get(key)
+
+    async def generation(self, key: str) -> str:
+        key_generation, family_generation = await self.client.mget(
+            self._generation_key(key), self._generation_key(_family(key))
+        )
+        return f"{key_generation or ''}|{family_generation or ''}"
+
+    async def set_if_current(self, key: str, value: str, ttl: int, generation: str) -> bool:
+        return bool(await self.set_script(
+            keys=[key, self._generation_key(key), self._generation_key(_family(key))],
+            args=[generation, value, ttl],
+        ))
+
+    def _bump(self, pipe, name: str):
+        pipe.incr(self._generation_key(name))
+        pipe.expire(self._generation_key(name), GENERATION_TTL_SECONDS)
+
+    async def delete(self, *keys: str):
+        if keys:
+            async with self.client.pipeline(transaction=True) as pipe:
+                pipe.delete(*keys)
+                for key in keys:
+                    self._bump(pipe, key)
+                await pipe.execute()
+
+    async def delete_prefix(self, prefix: str):
+        async with self.client.pipeline(transaction=True) as pipe:
+            self._bump(pipe, prefix)
+            await pipe.execute()
+        batch = []
+        async for key in self.client.scan_iter(match=f"{prefix}*", count=1000):
+            batch.append(key)
+            if len(batch) >= 1000:
+                await self.client.delete(*batch)
+                batch = []
+        if batch:
+            await self.client.delete(*batch)
+
+    async def acquire_lock(self, key: str, ttl_ms: int) -> bool:
+        return bool(await self.client.set(f"lock:{key}", "1", nx=True, px=ttl_ms))
+
+    async def release_lock(self, key: str):
+        await self.client.delete(f"lock:{key}")
+
+    async def close(self):
+        await self.client.close()
+
+
+class Cache:
+    backend = None
+    inflight: Dict[str, asyncio.Future] = {}
+    unsubscribe: Optional[Callable[[], None]] = None
+
+cache = Cache()
+
+
+async def connect_cache():
+    """Connect to Redis, falling back to the in-process LRU if unavailable"""
+    # Writes from other pods and manual fixes evict entries via the change feed
+    cache.unsubscribe = change_feed.subscribe(invalidate_changed)
+    if aioredis is not None and settings.cache_backend in ("auto", "redis"):
+        client = aioredis.from_url(settings.redis_url, decode_responses=True)
+        try:
+            await client.ping()
+            cache.backend = RedisBackend(client)
+            print("Connected to Redis cache")
+            return
+        except Exception as e:
+            await client.close()
+            logger.warning(f"Redis unavailable ({e}); using in-process LRU cache")
+    cache.backend = MemoryBackend(settings.cache_max_entries)
+    print("Using in-process LRU cache")
+
+
+async def close_cache():
+    if cache.unsubscribe:
+        cache.unsubscribe()
+        cache.unsubscribe = None
+    if cache.backend:
+        await cache.backend.close()
+        print("Cache connection closed")
+
+
+async def _safe(operation: Awaitable, default=None):
+    """Cache failures degrade to a miss instead of failing the request"""
+    try:
+        return await operation
+    except Exception as e:
+        logger.warning(f"Cache operation failed: {e}")
+        return default
+
+
+async def cached(
+    key: str,
+    loader: Callable[[], Awaitable[Any]],
+    ttl: Optional[int] = None
+) -> Any:
+    """
+    Return the JSON-compatible value cached under ``key``, calling ``loader``
+    on a miss. None results are not cached. Without a connected backend
+    (e.g. scripts that skip the lifespan) the loader is called directly.
+    """
+    backend = cache.backend
+    if backend is None or not settings.cache_enabled:
+        return jsonable_encoder(await loader())
+
+    raw = await _safe(backend.get(key))
+    if raw is not None:
+        return json.loads(raw)
+
+    # In-process single-flight: join a load that is already running
+    pending = cache.inflight.get(key)
+    if pending is not None:
+        return await asyncio.shield(pending)
+
+    future = asyncio.get_running_loop().create_future()
+    cache.inflight[key] = future
+    try:
+        value = await _load(backend, key, loader, ttl or settings.cache_default_ttl_seconds)
+        future.set_result(value)
+        return value
+    except Exception as e:
+        future.set_exception(e)
+        future.exception()  # mark retrieved when nobody else was waiting
+        raise
+    finally:
+        if not future.done():  # loader was cancelled; release any waiters
+            future.cancel()
+        cache.inflight.pop(key, None)
+
+
+async def _load(backend, key: str, loader, ttl: int) -> Any:
+    lock_ms = settings.cache_lock_timeout_ms
+    locked = await _safe(backend.acquire_lock(key, lock_ms), default=True)
+    if not locked:
+        # Another process is loading: wait for its value, up to the lock timeout
+        deadline = time.monotonic() + lock_ms / 1000
+        while time.monotonic() < deadline:
+            await asyncio.sleep(0.025)
+            raw = await _safe(backend.get(key))
+            if raw is not None:
+                return json.loads(raw)
+
+    try:
+        # Read before loading: an invalidation after this point voids the value
+        generation = await _safe(backend.generation(key))
+        value = jsonable_encoder(await loader())
+        if value is not None and generation is not None:
+            await _safe(backend.set_if_current(key, json.dumps(value), ttl, generation))
+        return value
+    finally:
+        if locked:
+            await _safe(backend.release_lock(key))
+
+
+async def invalidate(*keys: str):
+    """Drop cached entries after a write"""
+    if cache.backend is not None and keys:
+        await _safe(cache.backend.delete(*keys))
+
+
+# Cache keys, shared by the readers and the invalidating writers
+def property_key(property_id: str) -> str:
+    return f"property:{property_id}"
+
+
+def deal_key(deal_id: str) -> str:
+    return f"deal:{deal_id}"
+
+
+def user_key(user_id: str) -> str:
+    return f"user:{user_id}"
+
+
+DASHBOARD_STATS_KEY = "dashboard:stats"
+DASHBOARD_PROPERTIES_KEY = "dashboard:properties"
+DASHBOARD_DEALS_KEY = "dashboard:deals"
+DASHBOARD_TRANSACTIONS_KEY = "dashboard:transactions"
+DASHBOARD_KEYS = (
+    DASHBOARD_STATS_KEY, DASHBOARD_PROPERTIES_KEY, DASHBOARD_DEALS_KEY, DASHBOARD_TRANSACTIONS_KEY
+)
+
+
+# Keys derived from each watched collection: (per-document key, collection-wide keys)
+_CHANGE_KEYS = {
+    "deals": (deal_key, DASHBOARD_KEYS),
+    "properties": (property_key, DASHBOARD_KEYS),
+    "users": (user_key, (DASHBOARD_STATS_KEY,)),
+}
+
+
+async def invalidate_changed(event: ChangeEvent):
+    """Change feed subscriber: drop the entries a document change makes stale"""
+    backend = cache.backend
+    if backend is None:
+        return
+    key_of, shared_keys = _CHANGE_KEYS[event.collection]
+    if event.document_id is None:
+        # resync: any document of the collection may have changed
+        await _safe(backend.delete_prefix(key_of("")))
+        await _safe(backend.delete(*shared_keys))
+    else:
+        await _safe(backend.delete(key_of(event.document_id), *shared_keys))
@@ -0,0 +1,240 @@
+"""
+Change feed for deals, properties and users.
+
+A background task follows writes to the watched collections from any
+source (other pods, scripts, manual fixes in the shell) and publishes a
+ChangeEvent per changed document to in-process subscribers, so caches
+and read models can drop exactly what changed instead of waiting out a
+TTL.
+
+Sources (``change_feed_mode``):
+- stream: one database-level change stream filtered to the watched
+  collections, projected down to the document key. The resume token is
+  kept in memory, so reconnects after a network error miss nothing; if
+  the oplog no longer holds it a ``resync`` event is published instead.
+- poll: for standalone mongod, which has no change streams. Each watched
+  collection is read in (updated_at, _id) order past a watermark every
+  ``change_feed_poll_interval_seconds``. The window is re-read with
+  ``change_feed_poll_overlap_seconds`` of overlap to absorb clock skew
+  between writers, and already published versions are skipped. Polling
+  reports inserts as updates and cannot see deletes.
+- auto: stream, falling back to poll when the server rejects change
+  streams.
+
+Subscribers are awaited in order for every event and should be quick;
+exceptions they raise are logged and do not stop the feed.
+"""
+
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from pymongo import ASCENDING
+from pymongo.errors import OperationFailure, PyMongoError
+
+from app.core.config import get_settings
+from app.database.mongodb import get_database
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+WATCHED_COLLECTIONS = ("deals", "properties", "users")
+DOCUMENT_OPERATIONS = ("insert", "update", "replace", "delete")
+# "The $changeStream stage is only supported on replica sets"
+STREAM_UNSUPPORTED_CODES = {40573}
+CHANGE_STREAM_HISTORY_LOST = 286
+MAX_BACKOFF_SECONDS = 30
+
+
+class ChangeEvent(NamedTuple):
+    collection: str
+    # insert | update | replace | delete, or resync when changes may have
+    # been missed and everything cached from the collection is suspect
+    operation: str
+    document_id: Optional[str]
+    source: str  # stream | poll
+
+
+Subscriber = Callable[[ChangeEvent], Awaitable[None]]
+
+
+class ChangeFeed:
+    def __init__(self):
+        self.subscribers: List[Tuple[Subscriber, Tuple[str, ...]]] = []
+        self.task: Optional[asyncio.Task] = None
+        self.mode: Optional[str] = None
+        self.stream_unsupported = False
+        self.resume_token = None
+        self.backoff = 1
+        # Poll mode: per collection updated_at watermark and the versions
+        # already published inside the overlap window
+        self.watermarks: Dict[str, datetime] = {}
+        self.published: Dict[str, Dict[object, datetime]] = {}
+        # Metrics
+        self.events = 0
+        self.subscriber_errors = 0
+        self.source_errors = 0
+        self.last_event_at: Optional[datetime] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def subscribe(self, subscriber: Subscriber, collections=WATCHED_COLLECTIONS) -> Callable[[], None]:
+        """Register an async callback for events on ``collections``; returns an unsubscribe function"""
+        entry = (subscriber, tuple(collections))
+        self.subscribers.append(entry)
+        return lambda: self.subscribers.remove(entry)
+
+    def start(self):
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+
+    async def publish(self, event: ChangeEvent):
+        self.events += 1
+        self.last_event_at = datetime.utcnow()
+        for subscriber, collections in list(self.subscribers):
+            if event.collection not in collections:
+                continue
+            try:
+                await subscriber(event)
+            except Exception as e:
+                self.subscriber_errors += 1
+                logger.warning(f"Change feed subscriber {subscriber.__qualname__} failed on {event}: {e}")
+
+    async def _resync(self, source: str):
+        for name in WATCHED_COLLECTIONS:
+            await self.publish(ChangeEvent(name, "resync", None, source))
+
+    async def _run(self):
+        while True:
+            use_stream = settings.change_feed_mode == "stream" or (
+                settings.change_feed_mode == "auto" and not self.stream_unsupported
+            )
+            try:
+                if use_stream:
+                    await self._follow_stream()
+                else:
+                    await self._poll_forever()
+            except OperationFailure as e:
+                if e.code in STREAM_UNSUPPORTED_CODES and settings.change_feed_mode == "auto":
+                    logger.info("Change streams unavailable (standalone mongod?); polling updated_at instead")
+                    self.stream_unsupported = True
+                    continue
+                self.source_errors += 1
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning("Change stream resume point fell off the oplog; resyncing subscribers")
+                    self.resume_token = None
+                    await self._resync("stream")
+                    continue
+                logger.warning(f"Change feed ({self.mode}) failed: {e}")
+            except PyMongoError as e:
+                self.source_errors += 1
+                logger.warning(f"Change feed ({self.mode}) failed: {e}")
+            await asyncio.sleep(self.backoff)
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF_SECONDS)
+
+    async def _follow_stream(self):
+        pipeline = [
+            {"$match": {"ns.coll": {"$in": list(WATCHED_COLLECTIONS)}}},
+            # Only the key is needed; keeps updateDescription off the wire
+            {"$project": {"ns": 1, "operationType": 1, "documentKey": 1}},
+        ]
+        async with get_database().watch(pipeline, resume_after=self.resume_token) as stream:
+            self.mode = "stream"
+            self.backoff = 1
+            logger.info("Change feed following the change stream")
+            async for change in stream:
+                operation = change["operationType"]
+                if operation in DOCUMENT_OPERATIONS:
+                    event = ChangeEvent(
+                        change["ns"]["coll"], operation, str(change["documentKey"]["_id"]), "stream"
+                    )
+                else:  # drop / rename of a watched collection
+                    event = ChangeEvent(change["ns"]["coll"], "resync", None, "stream")
+                await self.publish(event)
+                self.resume_token = stream.resume_token
+
+    async def _poll_forever(self):
+        if self.mode != "poll":
+            self.mode = "poll"
+            logger.info("Change feed polling updated_at")
+        db = get_database()
+        now = datetime.utcnow()
+        for name in WATCHED_COLLECTIONS:
+            self.watermarks.setdefault(name, now)
+            self.published.setdefault(name, {})
+        while True:
+            for name in WATCHED_COLLECTIONS:
+                await self._poll_collection(db[name], name)
+            self.backoff = 1
+            await asyncio.sleep(settings.change_feed_poll_interval_seconds)
+
+    async def _poll_collection(self, collection, name: str):
+        overlap = timedelta(seconds=settings.change_feed_poll_overlap_seconds)
+        batch_size = settings.change_feed_poll_batch_size
+        published = self.published[name]
+        watermark = self.watermarks[name]
+        position = (watermark - overlap, None)
+
+        while True:
+            since, after_id = position
+            if after_id is None:
+                query = {"updated_at": {"$gte": since}}
+            else:
+                query = {"$or": [
+                    {"updated_at": {"$gt": since}},
+                    {"updated_at": since, "_id": {"$gt": after_id}},
+                ]}
+            docs = await collection.find(query, {"updated_at": 1}).sort(
+                [("updated_at", ASCENDING), ("_id", ASCENDING)]
+            ).limit(batch_size).to_list(length=batch_size)
+
+            for doc in docs:
+                if published.get(doc["_id"]) == doc["updated_at"]:
+                    continue
+                published[doc["_id"]] = doc["updated_at"]
+                await self.publish(ChangeEvent(name, "update", str(doc["_id"]), "poll"))
+            if docs:
+                position = (docs[-1]["updated_at"], docs[-1]["_id"])
+                watermark = max(watermark, position[0])
+            if len(docs) < batch_size:
+                break
+
+        self.watermarks[name] = watermark
+        cutoff = watermark - overlap
+        for doc_id in [doc_id for doc_id, updated in published.items() if updated < cutoff]:
+            del published[doc_id]
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "mode": self.mode,
+            "subscribers": len(self.subscribers),
+            "events": self.events,
+            "subscriber_errors": self.subscriber_errors,
+            "source_errors": self.source_errors,
+            "last_event_at": self.last_event_at,
+        }
+
+
+change_feed = ChangeFeed()
+
+
+def start_change_feed():
+    if settings.change_feed_enabled:
+        change_feed.start()
+
+
+async def stop_change_feed():
+    await change_feed.stop()
@@ -0,0 +1,114 @@
+"""
+Dependency health checks for the readiness probe.
+
+MongoDB (``ping``), MySQL through the SQLAlchemy pool (``SELECT 1``) and
+MySQL through the saga's aiomysql pool are checked concurrently, each
+under ``health_check_timeout_seconds``: a pool with no free connection
+fails its check instead of hanging the probe. The report also carries
+round-trip latencies and pool saturation.
+
+Reports are cached for ``health_cache_ttl_seconds`` and concurrent probes
+share one in-flight check, so load balancer probes add no database load
+of their own beyond one round of pings per interval.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Optional
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.metrics import pool_collector
+from app.database.mongodb import mongodb
+from app.database.mysql import engine, raw_pool, acquire_raw_connection
+
+settings = get_settings()
+
+
+async def _ping_mongodb():
+    if mongodb.client is None:
+        raise RuntimeError("client not connected")
+    await mongodb.client.admin.command("ping")
+
+
+async def _ping_mysql():
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def _ping_saga_pool():
+    if raw_pool.pool is None:
+        raise RuntimeError("pool not open")
+    async with acquire_raw_connection() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT 1")
+
+
+async def _timed_check(ping: Callable[[], Awaitable[None]], timeout: float) -> dict:
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(ping(), timeout=timeout)
+        status, error = "up", None
+    except asyncio.TimeoutError:
+        status, error = "down", f"no response within {timeout}s"
+    except Exception as e:
+        status, error = "down", str(e) or type(e).__name__
+    result = {"status": status, "latency_ms": round((time.perf_counter() - start) * 1000, 2)}
+    if error:
+        result["error"] = error
+    return result
+
+
+def _pool_saturation() -> dict:
+    pools = {}
+    for name, read in pool_collector.pools.items():
+        in_use, capacity = read()
+        pools[name] = {
+            "in_use": in_use,
+            "max": capacity,
+            "saturation": round(in_use / capacity, 3) if capacity else 0.0,
+        }
+    return pools
+
+
+class HealthChecker:
+    CHECKS = {
+        "mongodb": _ping_mongodb,
+        "mysql": _ping_mysql,
+        "mysql_saga_pool": _ping_saga_pool,
+    }
+
+    def __init__(self):
+        self.report: Optional[dict] = None
+        self.expires_at = 0.0
+        self.lock = asyncio.Lock()
+
+    async def check(self) -> dict:
+        """Cached readiness report; ``report["ready"]`` is False if any check failed"""
+        if self.report is not None and time.monotonic() < self.expires_at:
+            return self.report
+        async with self.lock:
+            # Probes that queued behind a running check reuse its result
+            if self.report is not None and time.monotonic() < self.expires_at:
+                return self.report
+            self.report = await self._run()
+            self.expires_at = time.monotonic() + settings.health_cache_ttl_seconds
+            return self.report
+
+    async def _run(self) -> dict:
+        timeout = settings.health_check_timeout_seconds
+        results = await asyncio.gather(
+            *(_timed_check(ping, timeout) for ping in self.CHECKS.values())
+        )
+        checks = dict(zip(self.CHECKS, results))
+        return {
+            "ready": all(result["status"] == "up" for result in results),
+            "checked_at": datetime.utcnow().isoformat(),
+            "checks": checks,
+            "pools": _pool_saturation(),
+        }
+
+
+health_checker = HealthChecker()
@@ -0,0 +1,183 @@
+"""
+Idempotency-Key records for retried write requests.
+
+A record lives under ``<scope>:<key>`` and is either in progress (claimed
+by the request executing it, expiring after ``idempotency_lock_seconds``
+so a crashed request frees its key) or completed with the response that
+was sent (kept for ``idempotency_ttl_seconds``). Both carry a fingerprint
+of the request body.
+
+A claim returns a random token. The claimant renews its claim while the
+operation runs, and completing, renewing or releasing a record only
+applies while it still holds that token, so a request whose claim lapsed
+cannot overwrite or free the record of the request that took over.
+
+Backends (``idempotency_backend``):
+- redis: the cache's Redis. Records are JSON strings; claiming is
+  SET NX EX, expiry is Redis TTL, and the token checks are Lua scripts.
+- mongodb: the ``idempotency_keys`` collection, keyed by _id, with a TTL
+  index on ``expires_at``. Documents past expiry but not yet removed by
+  the TTL monitor are ignored and may be claimed again.
+- auto: redis when the cache is connected to Redis, otherwise mongodb.
+  The in-process LRU is never used: a retry can land on another pod.
+
+Reading a record is one GET / find_one, so a replayed request costs a
+single lookup.
+"""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import get_settings
+from app.database.cache import cache
+from app.database.mongodb import get_database
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+IN_PROGRESS = "in_progress"
+COMPLETED = "completed"
+
+
+class MongoIdempotencyStore:
+    name = "mongodb"
+
+    def __init__(self):
+        self.collection = get_database().idempotency_keys
+
+    async def get(self, key: str) -> Optional[dict]:
+        doc = await self.collection.find_one({"_id": key})
+        if doc is None or doc["expires_at"] < datetime.utcnow():
+            return None
+        if doc.get("body") is not None:
+            doc["body"] = json.loads(doc["body"])
+        return doc
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[str]:
+        now = datetime.utcnow()
+        token = uuid.uuid4().hex
+        try:
+            # Matches only an expired leftover; otherwise inserts, and a
+            # live record makes the upsert collide on _id
+            await self.collection.update_one(
+                {"_id": key, "expires_at": {"$lt": now}},
+                {"$set": {
+                    "state": IN_PROGRESS,
+                    "token": token,
+                    "fingerprint": fingerprint,
+                    "status_code": None,
+                    "body": None,
+                    "expires_at": now + timedelta(seconds=settings.idempotency_lock_seconds),
+                }},
+                upsert=True,
+            )
+            return token
+        except DuplicateKeyError:
+            return None
+
+    @staticmethod
+    def _held(key: str, token: str) -> dict:
+        return {"_id": key, "token": token, "state": IN_PROGRESS}
+
+    async def renew(self, key: str, token: str) -> bool:
+        expires_at = datetime.utcnow() + timedelta(seconds=settings.idempotency_lock_seconds)
+        result = await self.collection.update_one(
+            self._held(key, token), {"$set": {"expires_at": expires_at}}
+        )
+        return result.matched_count == 1
+
+    async def complete(self, key: str, token: str, fingerprint: str, status_code: int, body) -> bool:
+        result = await self.collection.update_one(self._held(key, token), {
+            "$set": {
+                "state": COMPLETED,
+                "fingerprint": fingerprint,
+                "status_code": status_code,
+                "body": json.dumps(body),
+                "expires_at": datetime.utcnow() + timedelta(seconds=settings.idempotency_ttl_seconds),
+            },
+            "$unset": {"token": ""},
+        })
+        return result.matched_count == 1
+
+    async def release(self, key: str, token: str) -> bool:
+        result = await self.collection.delete_one(self._held(key, token))
+        return result.deleted_count == 1
+
+
+# KEYS[1] record, ARGV[1] token; the token is only set on in-progress records
+_HELD = (
+    "local raw = redis.call('GET', KEYS[1]) "
+    "if not raw or cjson.decode(raw)['token'] ~= ARGV[1] then return 0 end "
+)
+RENEW_SCRIPT = _HELD + "return redis.call('EXPIRE', KEYS[1], ARGV[2])"
+COMPLETE_SCRIPT = _HELD + "redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3]) return 1"
+RELEASE_SCRIPT = _HELD + "return redis.call('DEL', KEYS[1])"
+
+
+class RedisIdempotencyStore:
+    name = "redis"
+
+    def __init__(self, client):
+        self.client = client
+        self.renew_script = client.register_script(RENEW_SCRIPT)
+        self.complete_script = client.register_script(COMPLETE_SCRIPT)
+        self.release_script = client.register_script(RELEASE_SCRIPT)
+
+    @staticmethod
+    def _key(key: str) -> str:
+        return f"idempotency:{key}"
+
+    async def get(self, key: str) -> Optional[dict]:
+        raw = await self.client.get(self._key(key))
+        return json.loads(raw) if raw is not None else None
+
+    async def claim(self, key: str, fingerprint: str) -> Optional[str]:
+        token = uuid.uuid4().hex
+        record = {"state": IN_PROGRESS, "token": token, "fingerprint": fingerprint}
+        claimed = await self.client.set(
+            self._key(key), json.dumps(record), nx=True, ex=settings.idempotency_lock_seconds
+        )
+        return token if claimed else None
+
+    async def renew(self, key: str, token: str) -> bool:
+        return bool(await self.renew_script(
+            keys=[self._key(key)], args=[token, settings.idempotency_lock_seconds]
+        ))
+
+    async def complete(self, key: str, token: str, fingerprint: str, status_code: int, body) -> bool:
+        record = {"state": COMPLETED, "fingerprint": fingerprint, "status_code": status_code, "body": body}
+        return bool(await self.complete_script(
+            keys=[self._key(key)], args=[token, json.dumps(record), settings.idempotency_ttl_seconds]
+        ))
+
+    async def release(self, key: str, token: str) -> bool:
+        return bool(await self.release_script(keys=[self._key(key)], args=[token]))
+
+
+class Idempotency:
+    store = None
+
+idempotency = Idempotency()
+
+
+def connect_idempotency_store():
+    """Pick the record store; call after connect_cache and connect_mongodb"""
+    backend = settings.idempotency_backend
+    redis_backend = cache.backend if getattr(cache.backend, "name", None) == "redis" else None
+    if backend == "redis" and redis_backend is None:
+        logger.warning("Idempotency backend redis requested but the cache is not on Redis; using MongoDB")
+    if backend in ("auto", "redis") and redis_backend is not None:
+        idempotency.store = RedisIdempotencyStore(redis_backend.client)
+    else:
+        idempotency.store = MongoIdempotencyStore()
+    print(f"Idempotency keys stored in {idempotency.store.name}")
+
+
+def get_idempotency_store():
+    # Scripts that skip the lifespan get the MongoDB store
+    return idempotency.store or MongoIdempotencyStore()
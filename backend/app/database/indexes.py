@@ -0,0 +1,178 @@
+"""
+MongoDB Index Registry
+
+Declares every index the services rely on, reconciles them against the
+live collections at startup and reports their usage via ``$indexStats``.
+
+Reconciliation is idempotent:
+  - missing indexes are created (background builds)
+  - an index whose name matches but whose keys/options differ is rebuilt
+  - indexes not in the registry are left alone and only reported
+"""
+
+import logging
+from typing import Dict, List, Any
+
+from pymongo import IndexModel, ASCENDING, DESCENDING
+from pymongo.errors import PyMongoError
+
+from app.core.config import get_settings
+from app.database.mongodb import get_database
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+# Keyset pagination sort order (see app.utils.pagination)
+KEYSET = [("created_at", DESCENDING), ("_id", DESCENDING)]
+# Change feed polling order on standalone mongod (see app.database.change_feed)
+CHANGE_POLL = [("updated_at", ASCENDING), ("_id", ASCENDING)]
+
+
+def _index(keys, name: str, **options) -> IndexModel:
+    # background is ignored by MongoDB 4.2+, which always uses the optimized
+    # hybrid build; kept so older servers don't block the collection
+    return IndexModel(keys, name=name, background=True, **options)
+
+
+MONGO_INDEXES: Dict[str, List[IndexModel]] = {
+    "users": [
+        # Every login goes through UserService.get_user_by_email
+        _index([("email", ASCENDING)], name="email_unique", unique=True),
+        _index(KEYSET, name="created_keyset"),
+        _index([("role", ASCENDING)] + KEYSET, name="role_created_keyset"),
+        # Prefix search in the streamed user listings
+        _index([("profile.name", ASCENDING)], name="profile_name"),
+        _index(CHANGE_POLL, name="updated_poll"),
+    ],
+    "deals": [
+        # Active-deal check in create_deal / create_deal_with_deposit
+        _index([("property_id", ASCENDING), ("status", ASCENDING)], name="property_status"),
+        # Dashboard "completed this month"
+        _index([("status", ASCENDING), ("updated_at", DESCENDING)], name="status_updated"),
+        # Condition updates match on conditions.id
+        _index([("conditions.id", ASCENDING)], name="conditions_id"),
+        # Snapshot refresh finds a user's deals in any participant role
+        _index([("participant_refs.$**", ASCENDING)], name="participant_refs_wildcard"),
+        _index(KEYSET, name="created_keyset"),
+        _index([("status", ASCENDING)] + KEYSET, name="status_created_keyset"),
+        _index([("property_id", ASCENDING)] + KEYSET, name="property_created_keyset"),
+        _index(CHANGE_POLL, name="updated_poll"),
+    ],
+    "properties": [
+        _index([("listing_price", ASCENDING)], name="listing_price"),
+        _index([("address.city", ASCENDING)], name="address_city"),
+        _index([("address.street", ASCENDING)], name="address_street"),
+        _index(KEYSET, name="created_keyset"),
+        _index([("status", ASCENDING)] + KEYSET, name="status_created_keyset"),
+        _index([("type", ASCENDING)] + KEYSET, name="type_created_keyset"),
+        _index(CHANGE_POLL, name="updated_poll"),
+    ],
+    "idempotency_keys": [
+        # Removes records once expired (reads also ignore expired ones)
+        _index([("expires_at", ASCENDING)], name="expires_ttl", expireAfterSeconds=0),
+    ],
+    "saga_log": [
+        # Recovery worker claims open sagas whose lease expired
+        _index([("state", ASCENDING), ("lease_until", ASCENDING)], name="state_lease"),
+        # Finished sagas expire; open ones have no finished_at and are kept
+        _index(
+            [("finished_at", ASCENDING)], name="finished_ttl",
+            expireAfterSeconds=settings.saga_log_retention_days * 86400
+        ),
+    ],
+}
+
+# Index options compared during reconciliation
+_COMPARED_OPTIONS = ("unique", "sparse", "partialFilterExpression", "expireAfterSeconds")
+
+
+def _key_of(index: Dict[str, Any]) -> tuple:
+    """Normalized key pattern of an index_information() entry"""
+    return tuple((field, int(direction)) for field, direction in index["key"])
+
+
+def _matches(existing: Dict[str, Any], model: IndexModel) -> bool:
+    """Whether an existing index (from index_information) matches the declared model"""
+    wanted = model.document
+    if _key_of(existing) != tuple(wanted["key"].items()):
+        return False
+    return all(existing.get(opt) == wanted.get(opt) for opt in _COMPARED_OPTIONS)
+
+
+async def ensure_indexes() -> Dict[str, Dict[str, List[str]]]:
+    """
+    Reconcile MONGO_INDEXES against the database.
+    Returns a per-collection summary of created, rebuilt, unchanged and
+    unmanaged index names. Failures are logged and do not stop startup.
+    """
+    db = get_database()
+    summary = {}
+
+    for collection_name, models in MONGO_INDEXES.items():
+        collection = db[collection_name]
+        result = {"created": [], "rebuilt": [], "unchanged": [], "unmanaged": []}
+
+        try:
+            existing = await collection.index_information()
+            existing_keys = {_key_of(info): name for name, info in existing.items()}
+            to_create = []
+
+            for model in models:
+                name = model.document["name"]
+                current = existing.get(name)
+                if current is None:
+                    if tuple(model.document["key"].items()) in existing_keys:
+                        # Same key pattern already built under another name
+                        result["unchanged"].append(name)
+                    else:
+                        to_create.append(model)
+                        result["created"].append(name)
+                elif not _matches(current, model):
+                    await collection.drop_index(name)
+                    to_create.append(model)
+                    result["rebuilt"].append(name)
+                else:
+                    result["unchanged"].append(name)
+
+            declared = {m.document["name"] for m in models}
+            result["unmanaged"] = [n for n in existing if n != "_id_" and n not in declared]
+
+            if to_create:
+                await collection.create_indexes(to_create)
+
+            logger.info(
+                f"Indexes on {collection_name}: created={result['created']} "
+                f"rebuilt={result['rebuilt']} unmanaged={result['unmanaged']}"
+            )
+        except PyMongoError as e:
+            logger.error(f"Index reconciliation failed for {collection_name}: {e}")
+
+        summary[collection_name] = result
+
+    return summary
+
+
+async def get_index_usage() -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Report per-index usage counters from $indexStats.
+    Counters reset on mongod restart; ``since`` marks when counting began.
+    """
+    db = get_database()
+    usage = {}
+
+    for collection_name in MONGO_INDEXES:
+        stats = []
+        async for doc in db[collection_name].aggregate([{"$indexStats": {}}]):
+            stats.append({
+                "name": doc["name"],
+                "key": doc["key"],
+                "ops": doc.get("accesses", {}).get("ops", 0),
+                "since": doc.get("accesses", {}).get("since"),
+                "managed": any(
+                    m.document["name"] == doc["name"] for m in MONGO_INDEXES[collection_name]
+                ),
+            })
+        usage[collection_name] = sorted(stats, key=lambda s: s["ops"])
+
+    return usage
@@ -1,5 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.core.config import get_settings
+from app.core.metrics import mongo_command_metrics
+from app.core.profiler import mongo_query_profiler
 
 settings = get_settings()
 
@@ -10,7 +12,10 @@ class MongoDB:
 mongodb = MongoDB()
 
 async def connect_mongodb():
-    mongodb.client = AsyncIOMotorClient(settings.mongodb_url)
+    mongodb.client = AsyncIOMotorClient(
+        settings.mongodb_url, event_listeners=[mongo_command_metrics, mongo_query_profiler]
+    )
+    mongo_query_profiler.attach(mongodb.client)
     mongodb.db = mongodb.client[settings.mongodb_database]
     print("Connected to MongoDB")
 
@@ -1,6 +1,12 @@
+import time
+from contextlib import asynccontextmanager
+import aiomysql
+from sqlalchemy import inspect, text
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine, async_sessionmaker
 from sqlalchemy.orm import declarative_base
 from app.core.config import get_settings
+from app.core.metrics import instrument_engine, track_pool, MYSQL_POOL_CHECKOUTS, MYSQL_POOL_WAIT
+from app.core.profiler import profile_engine, ProfiledCursor
 
 settings = get_settings()
 
@@ -8,10 +14,13 @@ settings = get_settings()
 engine = create_async_engine(
     settings.mysql_url,
     echo=settings.debug,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10
+    pool_pre_ping=settings.mysql_pool_pre_ping,
+    pool_size=settings.mysql_pool_size,
+    max_overflow=settings.mysql_max_overflow,
+    pool_recycle=settings.mysql_pool_recycle
 )
+instrument_engine(engine, settings.mysql_pool_size + settings.mysql_max_overflow)
+profile_engine(engine)
 
 # Create async session factory
 async_session_factory = async_sessionmaker(
@@ -23,20 +32,109 @@ async_session_factory = async_sessionmaker(
 # Base class for ORM models
 Base = declarative_base()
 
+# Columns added to models after their tables first shipped; create_all only
+# creates missing tables. table -> [(column, ALTER TABLE clause)]
+ADDED_COLUMNS = {
+    "transactions": [(
+        "idempotency_key",
+        "ADD COLUMN idempotency_key VARCHAR(64) NULL, "
+        "ADD UNIQUE KEY uq_transactions_idempotency_key (idempotency_key, created_at)"
+    )],
+}
+
+
+def _add_missing_columns(sync_conn):
+    inspector = inspect(sync_conn)
+    for table, columns in ADDED_COLUMNS.items():
+        existing = {column["name"] for column in inspector.get_columns(table)}
+        for name, clause in columns:
+            if name not in existing:
+                sync_conn.execute(text(f"ALTER TABLE {table} {clause}"))
+                print(f"Added {table}.{name}")
+
+
+class RawMySQLPool:
+    """
+    aiomysql pool for code that cannot use the SQLAlchemy session
+    (see DealDepositSaga), plus wait-time stats for acquiring from it.
+    """
+    pool: aiomysql.Pool = None
+    acquisitions: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+
+raw_pool = RawMySQLPool()
+track_pool("aiomysql", lambda: (
+    (raw_pool.pool.size - raw_pool.pool.freesize, raw_pool.pool.maxsize)
+    if raw_pool.pool else (0, settings.mysql_saga_pool_maxsize)
+))
+
 
 async def connect_mysql():
-    """Initialize MySQL connection and create tables"""
+    """Initialize MySQL connection, create tables and open the raw pool"""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        await conn.run_sync(_add_missing_columns)
+    raw_pool.pool = await aiomysql.create_pool(
+        host=settings.mysql_host,
+        port=settings.mysql_port,
+        user=settings.mysql_user,
+        password=settings.mysql_password,
+        db=settings.mysql_database,
+        minsize=settings.mysql_saga_pool_minsize,
+        maxsize=settings.mysql_saga_pool_maxsize,
+        pool_recycle=settings.mysql_pool_recycle,
+        autocommit=False,
+        cursorclass=ProfiledCursor
+    )
     print("Connected to MySQL")
 
 
 async def close_mysql():
     """Close MySQL connection"""
+    if raw_pool.pool:
+        raw_pool.pool.close()
+        await raw_pool.pool.wait_closed()
     await engine.dispose()
     print("MySQL connection closed")
 
 
+@asynccontextmanager
+async def acquire_raw_connection():
+    """
+    Borrow a connection from the raw aiomysql pool, recording how long the
+    caller waited for it. With pre-ping enabled the connection is pinged
+    (and transparently reconnected) before use.
+    """
+    start = time.perf_counter()
+    async with raw_pool.pool.acquire() as conn:
+        wait = time.perf_counter() - start
+        raw_pool.acquisitions += 1
+        raw_pool.total_wait_seconds += wait
+        raw_pool.max_wait_seconds = max(raw_pool.max_wait_seconds, wait)
+        MYSQL_POOL_CHECKOUTS.labels("aiomysql").inc()
+        MYSQL_POOL_WAIT.labels("aiomysql").observe(wait)
+        if settings.mysql_pool_pre_ping:
+            await conn.ping(reconnect=True)
+        yield conn
+
+
+def get_raw_pool_stats() -> dict:
+    """Size and acquisition wait-time stats of the raw aiomysql pool"""
+    pool = raw_pool.pool
+    return {
+        "size": pool.size if pool else 0,
+        "free": pool.freesize if pool else 0,
+        "maxsize": pool.maxsize if pool else 0,
+        "acquisitions": raw_pool.acquisitions,
+        "avg_wait_ms": (
+            raw_pool.total_wait_seconds / raw_pool.acquisitions * 1000
+            if raw_pool.acquisitions else 0.0
+        ),
+        "max_wait_ms": raw_pool.max_wait_seconds * 1000,
+    }
+
+
 async def get_session() -> AsyncSession:
     """Dependency for getting async session"""
     async with async_session_factory() as session:
@@ -0,0 +1,395 @@
+"""
+Monthly RANGE partitions for the append-only MySQL tables.
+
+``transactions`` and ``audit_logs`` are partitioned on
+``UNIX_TIMESTAMP(created_at)``: partition ``pYYYYMM`` holds the rows created
+before the first day of the following month and ``pmax`` catches anything
+past the last pre-created month. Queries that bound ``created_at`` are
+pruned to the partitions overlapping the range, and a whole month can be
+archived and dropped instead of DELETEd row by row.
+
+MySQL requires the partitioning column in every unique key, so both tables
+use ``(id, created_at)`` as their primary key; ``id`` stays AUTO_INCREMENT.
+
+Lifecycle:
+- startup partitions the tables while they are still empty and pre-creates
+  ``partition_months_ahead`` months; a background task keeps doing so
+- ``python -m maintenance.partitions convert`` partitions tables that
+  already hold rows (rebuilds them; run off-peak)
+- ``python -m maintenance.partitions archive`` exports months older than
+  ``archive_after_months`` to gzip-NDJSON or Parquet under ``archive_dir``,
+  verifies the row count and drops the partition
+"""
+
+import asyncio
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, Optional
+
+from sqlalchemy import JSON, DateTime, Integer, Numeric, Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import get_settings
+from app.database.mysql import engine
+from app.models.transaction import Transaction, AuditLog
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # pyarrow is optional; gzip-NDJSON needs nothing extra
+    pa = None
+    pq = None
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARTITIONED_TABLES: Dict[str, Table] = {
+    Transaction.__tablename__: Transaction.__table__,
+    AuditLog.__tablename__: AuditLog.__table__,
+}
+MAXVALUE_PARTITION = "pmax"
+ARCHIVE_EXTENSIONS = {"ndjson": "ndjson.gz", "parquet": "parquet"}
+EXPORT_BATCH_SIZE = 5000
+
+
+def month_start(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def add_months(month: date, count: int) -> date:
+    index = month.year * 12 + month.month - 1 + count
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_range(first: date, last: date) -> List[date]:
+    """Month starts from ``first`` to ``last`` inclusive"""
+    months = []
+    while first <= last:
+        months.append(first)
+        first = add_months(first, 1)
+    return months
+
+
+def partition_name(month: date) -> str:
+    return f"p{month:%Y%m}"
+
+
+def partition_month(name: str) -> Optional[date]:
+    """Month held by a ``pYYYYMM`` partition, None for pmax or foreign names"""
+    try:
+        return datetime.strptime(name, "p%Y%m").date()
+    except (TypeError, ValueError):
+        return None
+
+
+def _partition_definition(month: date) -> str:
+    return (
+        f"PARTITION {partition_name(month)} VALUES LESS THAN "
+        f"(UNIX_TIMESTAMP('{add_months(month, 1):%Y-%m-%d} 00:00:00'))"
+    )
+
+
+def _partition_definitions(months: List[date]) -> str:
+    definitions = [_partition_definition(month) for month in months]
+    definitions.append(f"PARTITION {MAXVALUE_PARTITION} VALUES LESS THAN MAXVALUE")
+    return "(" + ", ".join(definitions) + ")"
+
+
+async def get_partitions(conn: AsyncConnection, table: str) -> List[dict]:
+    """Partitions of ``table`` in order, [] when it is not partitioned"""
+    result = await conn.execute(
+        text(
+            "SELECT PARTITION_NAME AS name, TABLE_ROWS AS estimated_rows "
+            "FROM information_schema.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        ),
+        {"table": table}
+    )
+    return [dict(row) for row in result.mappings() if row["name"] is not None]
+
+
+async def convert_table(conn: AsyncConnection, table: str) -> List[str]:
+    """
+    Partition an existing table by month, from the month of its oldest row
+    through ``partition_months_ahead`` months from now. MySQL rebuilds the
+    table, so on a large table this takes as long as copying it.
+    """
+    if await get_partitions(conn, table):
+        return []
+    current = month_start(datetime.utcnow())
+    oldest = (await conn.execute(text(f"SELECT MIN(created_at) FROM {table}"))).scalar()
+    first = min(month_start(oldest), current) if oldest else current
+    months = month_range(first, add_months(current, settings.partition_months_ahead))
+    await conn.execute(text(
+        f"ALTER TABLE {table} "
+        f"MODIFY created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, "
+        f"DROP PRIMARY KEY, ADD PRIMARY KEY (id, created_at) "
+        f"PARTITION BY RANGE (UNIX_TIMESTAMP(created_at)) {_partition_definitions(months)}"
+    ))
+    logger.info(f"Partitioned {table} into {len(months)} monthly partitions")
+    return [partition_name(month) for month in months]
+
+
+async def ensure_future_partitions(
+    conn: AsyncConnection, table: str, months_ahead: int = None
+) -> List[str]:
+    """
+    Split months off ``pmax`` until the table has a partition for each of
+    the next ``months_ahead`` months. ``pmax`` is normally empty, so this is
+    a metadata-only change.
+    """
+    if months_ahead is None:
+        months_ahead = settings.partition_months_ahead
+    partitions = await get_partitions(conn, table)
+    if not partitions:
+        return []
+    existing = [m for m in (partition_month(p["name"]) for p in partitions) if m]
+    current = month_start(datetime.utcnow())
+    first = add_months(max(existing), 1) if existing else current
+    months = month_range(first, add_months(current, months_ahead))
+    if not months:
+        return []
+    await conn.execute(text(
+        f"ALTER TABLE {table} REORGANIZE PARTITION {MAXVALUE_PARTITION} "
+        f"INTO {_partition_definitions(months)}"
+    ))
+    created = [partition_name(month) for month in months]
+    logger.info(f"Created partitions {', '.join(created)} on {table}")
+    return created
+
+
+async def ensure_past_partitions(conn: AsyncConnection, table: str, since: date) -> List[str]:
+    """
+    Split months from ``since`` off the oldest monthly partition, which
+    otherwise takes every older row. For backfills and imports; cheap while
+    the oldest partition is still small.
+    """
+    partitions = await get_partitions(conn, table)
+    existing = sorted(m for m in (partition_month(p["name"]) for p in partitions) if m)
+    since = date(since.year, since.month, 1)
+    if not existing or since >= existing[0]:
+        return []
+    oldest = existing[0]
+    months = month_range(since, add_months(oldest, -1))
+    definitions = ", ".join(_partition_definition(month) for month in months + [oldest])
+    await conn.execute(text(
+        f"ALTER TABLE {table} REORGANIZE PARTITION {partition_name(oldest)} INTO ({definitions})"
+    ))
+    created = [partition_name(month) for month in months]
+    logger.info(f"Created partitions {', '.join(created)} on {table}")
+    return created
+
+
+async def prepare_partitions():
+    """
+    Startup: partition the tables while they are still empty and pre-create
+    upcoming months. Tables that already hold unpartitioned rows are left
+    for the maintenance command, since converting them rebuilds the table.
+    """
+    async with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            if await get_partitions(conn, table):
+                await ensure_future_partitions(conn, table)
+                continue
+            has_rows = (await conn.execute(text(f"SELECT 1 FROM {table} LIMIT 1"))).first()
+            if has_rows:
+                logger.warning(
+                    f"{table} is not partitioned; run "
+                    f"`python -m maintenance.partitions convert` off-peak"
+                )
+            else:
+                await convert_table(conn, table)
+
+
+async def run_partition_maintenance():
+    """Background job: keep ``partition_months_ahead`` months pre-created"""
+    interval = settings.partition_maintenance_interval_seconds
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with engine.begin() as conn:
+                for table in PARTITIONED_TABLES:
+                    await ensure_future_partitions(conn, table)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Partition maintenance failed: {e}")
+
+
+async def archivable_partitions(
+    conn: AsyncConnection, table: str, older_than_months: int = None
+) -> List[str]:
+    """Monthly partitions that ended at least ``older_than_months`` months ago"""
+    if older_than_months is None:
+        older_than_months = settings.archive_after_months
+    cutoff = add_months(month_start(datetime.utcnow()), -older_than_months)
+    names = []
+    for partition in await get_partitions(conn, table):
+        month = partition_month(partition["name"])
+        if month and add_months(month, 1) <= cutoff:
+            names.append(partition["name"])
+    return names
+
+
+async def count_partition_rows(conn: AsyncConnection, table: str, name: str) -> int:
+    result = await conn.execute(text(f"SELECT COUNT(*) FROM {table} PARTITION ({name})"))
+    return int(result.scalar())
+
+
+def _ndjson_default(value):
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__}")
+
+
+def _arrow_schema(table: Table):
+    fields = []
+    for column in table.columns:
+        column_type = column.type
+        if isinstance(column_type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column_type, Numeric):
+            arrow_type = pa.decimal128(column_type.precision, column_type.scale)
+        elif isinstance(column_type, DateTime):
+            arrow_type = pa.timestamp("us")
+        else:  # strings, enums and JSON (kept as its JSON text)
+            arrow_type = pa.string()
+        fields.append(pa.field(column.name, arrow_type, nullable=column.nullable))
+    return pa.schema(fields)
+
+
+class _NDJSONWriter:
+    def __init__(self, path: str, table: Table):
+        self.file = gzip.open(path, "wt", encoding="utf-8")
+        self.json_columns = [c.name for c in table.columns if isinstance(c.type, JSON)]
+
+    def write(self, rows: List[dict]):
+        lines = []
+        for row in rows:
+            for name in self.json_columns:
+                if isinstance(row[name], str):
+                    row[name] = json.loads(row[name])
+            lines.append(json.dumps(row, default=_ndjson_default))
+        self.file.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class _ParquetWriter:
+    def __init__(self, path: str, table: Table):
+        self.schema = _arrow_schema(table)
+        self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+
+    def write(self, rows: List[dict]):
+        self.writer.write_table(pa.Table.from_pylist(rows, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+
+def _sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+async def export_partition(
+    table: str, name: str, dest_dir: str = None, fmt: str = None
+) -> dict:
+    """
+    Stream one partition to ``<dest_dir>/<table>/<table>-<YYYY-MM>.<ext>``
+    with a ``.manifest.json`` next to it. The file is written under a
+    temporary name and only renamed once its row count matches the
+    partition's. Returns the manifest.
+    """
+    dest_dir = dest_dir or settings.archive_dir
+    fmt = fmt or settings.archive_format
+    if fmt not in ARCHIVE_EXTENSIONS:
+        raise ValueError(f"Unknown archive format: {fmt}")
+    if fmt == "parquet" and pa is None:
+        raise ValueError("Parquet archives need pyarrow (pip install pyarrow)")
+
+    model_table = PARTITIONED_TABLES[table]
+    month = partition_month(name)
+    directory = os.path.join(dest_dir, table)
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{table}-{month:%Y-%m}.{ARCHIVE_EXTENSIONS[fmt]}")
+    partial = path + ".partial"
+
+    columns = ", ".join(column.name for column in model_table.columns)
+    writer = _ParquetWriter(partial, model_table) if fmt == "parquet" else _NDJSONWriter(partial, model_table)
+    written = 0
+    try:
+        async with engine.connect() as conn:
+            expected = await count_partition_rows(conn, table, name)
+            result = await conn.stream(
+                text(f"SELECT {columns} FROM {table} PARTITION ({name}) ORDER BY id")
+            )
+            async for batch in result.mappings().partitions(EXPORT_BATCH_SIZE):
+                rows = [dict(row) for row in batch]
+                # Compression is CPU-bound; keep it off the event loop
+                await asyncio.to_thread(writer.write, rows)
+                written += len(rows)
+    finally:
+        writer.close()
+
+    if written != expected:
+        os.remove(partial)
+        raise RuntimeError(
+            f"Export of {table} {name} wrote {written} rows, partition has {expected}"
+        )
+    os.replace(partial, path)
+
+    manifest = {
+        "table": table,
+        "partition": name,
+        "month": f"{month:%Y-%m}",
+        "format": fmt,
+        "path": path,
+        "rows": written,
+        "sha256": await asyncio.to_thread(_sha256, path),
+        "exported_at": datetime.utcnow().isoformat(),
+    }
+    with open(path + ".manifest.json", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+async def drop_partition(table: str, name: str, expected_rows: int):
+    """Drop an exported partition, refusing if its row count has changed since"""
+    async with engine.begin() as conn:
+        rows = await count_partition_rows(conn, table, name)
+        if rows != expected_rows:
+            raise RuntimeError(
+                f"{table} {name} has {rows} rows but {expected_rows} were archived; not dropping"
+            )
+        await conn.execute(text(f"ALTER TABLE {table} DROP PARTITION {name}"))
+    logger.info(f"Dropped partition {name} of {table} ({rows} rows archived)")
+
+
+async def archive_partitions(
+    older_than_months: int = None, dest_dir: str = None, fmt: str = None, drop: bool = True
+) -> List[dict]:
+    """Export (and by default drop) every partition past the archive horizon"""
+    manifests = []
+    for table in PARTITIONED_TABLES:
+        async with engine.connect() as conn:
+            names = await archivable_partitions(conn, table, older_than_months)
+        for name in names:
+            manifest = await export_partition(table, name, dest_dir, fmt)
+            if drop:
+                await drop_partition(table, name, manifest["rows"])
+            manifest["dropped"] = drop
+            manifests.append(manifest)
+    return manifests
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, Integer, String, Numeric, Enum, Text, TIMESTAMP, JSON, BigInteger
+from sqlalchemy import (
+    Column, Integer, String, Numeric, Enum, Text, TIMESTAMP, JSON, BigInteger, UniqueConstraint
+)
 from sqlalchemy.sql import func
 from app.database.mysql import Base
 import enum
@@ -26,7 +28,16 @@ class AccountStatusEnum(enum.Enum):
 
 
 class Transaction(Base):
+    """
+    Range-partitioned by month on created_at (see app.database.partitions),
+    so created_at is part of the primary key and of every unique key.
+    ``idempotency_key`` is set by writers that must not record a row twice
+    (the saga deposit); they also fix created_at, so a repeat collides.
+    """
     __tablename__ = "transactions"
+    __table_args__ = (
+        UniqueConstraint("idempotency_key", "created_at", name="uq_transactions_idempotency_key"),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     deal_id = Column(String(50), nullable=False, index=True)
@@ -42,7 +53,8 @@ class Transaction(Base):
     from_account = Column(String(100), nullable=True)
     to_account = Column(String(100), nullable=True)
     description = Column(Text, nullable=True)
-    created_at = Column(TIMESTAMP, server_default=func.now())
+    idempotency_key = Column(String(64), nullable=True)
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=func.now(), index=True)
 
 
 class TrustAccount(Base):
@@ -61,6 +73,7 @@ class TrustAccount(Base):
 
 
 class AuditLog(Base):
+    """Range-partitioned by month on created_at, like Transaction"""
     __tablename__ = "audit_logs"
 
     id = Column(BigInteger, primary_key=True, autoincrement=True)
@@ -71,4 +84,14 @@ class AuditLog(Base):
     old_value = Column(JSON, nullable=True)
     new_value = Column(JSON, nullable=True)
     ip_address = Column(String(45), nullable=True)
-    created_at = Column(TIMESTAMP, server_default=func.now(), index=True)
+    created_at = Column(TIMESTAMP, primary_key=True, server_default=func.now(), index=True)
+
+
+class TransactionStat(Base):
+    """Running per-type, per-month transaction totals for the dashboard"""
+    __tablename__ = "transaction_stats"
+
+    transaction_type = Column(Enum(TransactionTypeEnum), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    tx_count = Column(Integer, nullable=False, default=0)
+    amount_sum = Column(Numeric(16, 2), nullable=False, default=0)
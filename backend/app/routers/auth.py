@@ -5,7 +5,7 @@ from pydantic import BaseModel, EmailStr
 from typing import Optional
 
 from app.core.security import (
-    Token, verify_password, get_password_hash,
+    Token, verify_password_async,
     create_access_token, get_current_user, TokenData
 )
 from app.core.config import get_settings
@@ -55,7 +55,7 @@ async def login(request: LoginRequest):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(request.password, user.get("password_hash", "")):
+    if not await verify_password_async(request.password, user.get("password_hash", "")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -94,7 +94,7 @@ async def login_for_token(form_data: OAuth2PasswordRequestForm = Depends()):
             headers={"WWW-Authenticate": "Bearer"},
         )
 
-    if not verify_password(form_data.password, user.get("password_hash", "")):
+    if not await verify_password_async(form_data.password, user.get("password_hash", "")):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
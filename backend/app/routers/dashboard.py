@@ -1,15 +1,27 @@
+import asyncio
 from fastapi import APIRouter, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Any
 from datetime import datetime, timedelta
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select, func, case
 
 from app.database.mongodb import get_database
-from app.database.mysql import get_session
-from app.models.transaction import Transaction
-from app.core.security import get_current_user, TokenData
-
+from app.database.indexes import get_index_usage
+from app.database.mysql import get_session, engine, get_raw_pool_stats
+from app.database.cache import (
+    cached, DASHBOARD_STATS_KEY, DASHBOARD_PROPERTIES_KEY,
+    DASHBOARD_DEALS_KEY, DASHBOARD_TRANSACTIONS_KEY
+)
+from app.models.transaction import TransactionStat
+from app.services.stats_service import StatsService, PROPERTY_STATS_ID, DEAL_STATS_ID
+from app.services.audit_writer import audit_writer
+from app.services.snapshot_refresher import snapshot_refresher
+from app.database.change_feed import change_feed
+from app.core.security import get_current_user, TokenData, password_hasher
+from app.core.config import get_settings
+
+settings = get_settings()
 router = APIRouter(prefix="/api/dashboard", tags=["dashboard"])
 
 
@@ -47,54 +59,70 @@ class TransactionStats(BaseModel):
     this_month_amount: float
 
 
+def _nonzero(counters: Dict[str, Any]) -> Dict[str, int]:
+    """Drop buckets whose running counter has fallen back to zero"""
+    return {k: v for k, v in (counters or {}).items() if v}
+
+
+def _average(total_sum: float, count: int) -> float:
+    return total_sum / count if count else 0
+
+
+def _current_month() -> str:
+    return datetime.utcnow().strftime("%Y-%m")
+
+
 @router.get("/stats", response_model=DashboardStats)
 async def get_dashboard_stats(
     session: AsyncSession = Depends(get_session),
     _current_user: TokenData = Depends(get_current_user)
 ):
-    """Get overall dashboard statistics"""
-    db = get_database()
+    """Get overall dashboard statistics (cached)"""
+    return await cached(
+        DASHBOARD_STATS_KEY, lambda: _load_dashboard_stats(session),
+        ttl=settings.cache_dashboard_ttl_seconds
+    )
 
-    # MongoDB stats
-    total_users = await db.users.count_documents({})
-    total_properties = await db.properties.count_documents({})
-    active_properties = await db.properties.count_documents({"status": "active"})
-    total_deals = await db.deals.count_documents({})
 
-    # Deals by status
-    pipeline = [
-        {"$group": {"_id": "$status", "count": {"$sum": 1}}}
-    ]
-    deals_by_status = {}
-    async for doc in db.deals.aggregate(pipeline):
-        deals_by_status[doc["_id"]] = doc["count"]
+async def _load_dashboard_stats(session: AsyncSession) -> DashboardStats:
+    """Build overall dashboard statistics from the materialized counters"""
+    db = get_database()
+
+    stats, total_users, recent = await asyncio.gather(
+        StatsService().get_all(),
+        db.users.estimated_document_count(),
+        # Recent activity (last 10 deals), served by the created_at index
+        db.deals.find({}, {"status": 1, "offer_price": 1, "created_at": 1})
+        .sort("created_at", -1).limit(10).to_list(length=10),
+    )
+    property_stats = stats.get(PROPERTY_STATS_ID, {})
+    deal_stats = stats.get(DEAL_STATS_ID, {})
 
     # MySQL transaction stats
     result = await session.execute(
-        select(func.count(Transaction.id), func.sum(Transaction.amount))
+        select(func.sum(TransactionStat.tx_count), func.sum(TransactionStat.amount_sum))
     )
     row = result.one()
-    total_transactions = row[0] or 0
+    total_transactions = int(row[0] or 0)
     total_transaction_amount = float(row[1] or 0)
 
-    # Recent activity (last 10 deals)
-    recent_deals = []
-    cursor = db.deals.find().sort("created_at", -1).limit(10)
-    async for deal in cursor:
-        recent_deals.append({
+    recent_deals = [
+        {
             "id": str(deal["_id"]),
             "type": "deal",
             "status": deal["status"],
             "amount": deal["offer_price"],
             "created_at": deal["created_at"].isoformat()
-        })
+        }
+        for deal in recent
+    ]
 
     return DashboardStats(
         total_users=total_users,
-        total_properties=total_properties,
-        active_properties=active_properties,
-        total_deals=total_deals,
-        deals_by_status=deals_by_status,
+        total_properties=property_stats.get("total", 0),
+        active_properties=property_stats.get("by_status", {}).get("active", 0),
+        total_deals=deal_stats.get("total", 0),
+        deals_by_status=_nonzero(deal_stats.get("by_status")),
         total_transactions=total_transactions,
         total_transaction_amount=total_transaction_amount,
         recent_activity=recent_deals
@@ -103,92 +131,50 @@ async def get_dashboard_stats(
 
 @router.get("/properties", response_model=PropertyStats)
 async def get_property_stats(_current_user: TokenData = Depends(get_current_user)):
-    """Get property statistics"""
-    db = get_database()
+    """Get property statistics (cached)"""
+    return await cached(
+        DASHBOARD_PROPERTIES_KEY, _load_property_stats,
+        ttl=settings.cache_dashboard_ttl_seconds
+    )
 
-    total = await db.properties.count_documents({})
 
-    # By type
-    type_pipeline = [{"$group": {"_id": "$type", "count": {"$sum": 1}}}]
-    by_type = {}
-    async for doc in db.properties.aggregate(type_pipeline):
-        by_type[doc["_id"]] = doc["count"]
-
-    # By status
-    status_pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
-    by_status = {}
-    async for doc in db.properties.aggregate(status_pipeline):
-        by_status[doc["_id"]] = doc["count"]
-
-    # Price stats
-    price_pipeline = [
-        {"$group": {
-            "_id": None,
-            "avg_price": {"$avg": "$listing_price"},
-            "min_price": {"$min": "$listing_price"},
-            "max_price": {"$max": "$listing_price"}
-        }}
-    ]
-    avg_price = 0
-    price_range = {"min": 0, "max": 0}
-    async for doc in db.properties.aggregate(price_pipeline):
-        avg_price = doc.get("avg_price", 0) or 0
-        price_range = {
-            "min": doc.get("min_price", 0) or 0,
-            "max": doc.get("max_price", 0) or 0
-        }
+async def _load_property_stats() -> PropertyStats:
+    """Build property statistics from the materialized counters"""
+    stats = await StatsService().get_property_stats()
+    total = stats.get("total", 0)
 
     return PropertyStats(
         total=total,
-        by_type=by_type,
-        by_status=by_status,
-        avg_price=avg_price,
-        price_range=price_range
+        by_type=_nonzero(stats.get("by_type")),
+        by_status=_nonzero(stats.get("by_status")),
+        avg_price=_average(stats.get("price_sum", 0), total),
+        price_range={
+            "min": stats.get("price_min") or 0,
+            "max": stats.get("price_max") or 0
+        }
     )
 
 
 @router.get("/deals", response_model=DealStats)
 async def get_deal_stats(_current_user: TokenData = Depends(get_current_user)):
-    """Get deal statistics"""
-    db = get_database()
+    """Get deal statistics (cached)"""
+    return await cached(
+        DASHBOARD_DEALS_KEY, _load_deal_stats,
+        ttl=settings.cache_dashboard_ttl_seconds
+    )
 
-    total = await db.deals.count_documents({})
-
-    # By status
-    status_pipeline = [{"$group": {"_id": "$status", "count": {"$sum": 1}}}]
-    by_status = {}
-    async for doc in db.deals.aggregate(status_pipeline):
-        by_status[doc["_id"]] = doc["count"]
-
-    # Average offer price
-    price_pipeline = [{"$group": {"_id": None, "avg": {"$avg": "$offer_price"}}}]
-    avg_offer_price = 0
-    async for doc in db.deals.aggregate(price_pipeline):
-        avg_offer_price = doc.get("avg", 0) or 0
-
-    # Completed this month
-    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    completed_this_month = await db.deals.count_documents({
-        "status": "completed",
-        "updated_at": {"$gte": month_start}
-    })
-
-    # Pending conditions count
-    pending_pipeline = [
-        {"$unwind": "$conditions"},
-        {"$match": {"conditions.status": "pending"}},
-        {"$count": "total"}
-    ]
-    pending_conditions = 0
-    async for doc in db.deals.aggregate(pending_pipeline):
-        pending_conditions = doc.get("total", 0)
+
+async def _load_deal_stats() -> DealStats:
+    """Build deal statistics from the materialized counters"""
+    stats = await StatsService().get_deal_stats()
+    total = stats.get("total", 0)
 
     return DealStats(
         total=total,
-        by_status=by_status,
-        avg_offer_price=avg_offer_price,
-        completed_this_month=completed_this_month,
-        pending_conditions=pending_conditions
+        by_status=_nonzero(stats.get("by_status")),
+        avg_offer_price=_average(stats.get("offer_sum", 0), total),
+        completed_this_month=stats.get("completed_by_month", {}).get(_current_month(), 0),
+        pending_conditions=stats.get("pending_conditions", 0)
     )
 
 
@@ -197,33 +183,44 @@ async def get_transaction_stats(
     session: AsyncSession = Depends(get_session),
     _current_user: TokenData = Depends(get_current_user)
 ):
-    """Get transaction statistics"""
-    from app.models.transaction import TransactionTypeEnum
+    """Get transaction statistics (cached)"""
+    return await cached(
+        DASHBOARD_TRANSACTIONS_KEY, lambda: _load_transaction_stats(session),
+        ttl=settings.cache_dashboard_ttl_seconds
+    )
 
-    # Total count and amount
+
+async def _load_transaction_stats(session: AsyncSession) -> TransactionStats:
+    """Build transaction statistics from the transaction_stats counters"""
+    # One grouped statement over the (type, month) counter rows: per-type sums
+    # plus a ROLLUP grand-total row (transaction_type IS NULL), with this
+    # month's amount as a conditional sum
+    month_amount = func.sum(case(
+        (TransactionStat.month == func.date_format(func.utc_timestamp(), "%Y-%m"), TransactionStat.amount_sum),
+        else_=0
+    ))
     result = await session.execute(
-        select(func.count(Transaction.id), func.sum(Transaction.amount))
+        select(
+            TransactionStat.transaction_type,
+            func.sum(TransactionStat.tx_count),
+            func.sum(TransactionStat.amount_sum),
+            month_amount
+        )
+        .group_by(TransactionStat.transaction_type)
+        .suffix_with("WITH ROLLUP")
     )
-    row = result.one()
-    total_count = row[0] or 0
-    total_amount = float(row[1] or 0)
 
-    # By type
-    type_result = await session.execute(
-        select(Transaction.transaction_type, func.sum(Transaction.amount))
-        .group_by(Transaction.transaction_type)
-    )
+    total_count = 0
+    total_amount = 0.0
+    this_month_amount = 0.0
     by_type = {}
-    for row in type_result:
-        by_type[row[0].value] = float(row[1] or 0)
-
-    # This month
-    month_start = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    month_result = await session.execute(
-        select(func.sum(Transaction.amount))
-        .where(Transaction.created_at >= month_start)
-    )
-    this_month_amount = float(month_result.scalar() or 0)
+    for tx_type, count, amount, month in result:
+        if tx_type is None:
+            total_count = int(count or 0)
+            total_amount = float(amount or 0)
+            this_month_amount = float(month or 0)
+        else:
+            by_type[tx_type.value] = float(amount or 0)
 
     return TransactionStats(
         total_count=total_count,
@@ -231,3 +228,27 @@ async def get_transaction_stats(
         by_type=by_type,
         this_month_amount=this_month_amount
     )
+
+
+@router.get("/indexes")
+async def get_index_stats(_current_user: TokenData = Depends(get_current_user)):
+    """Get MongoDB index usage counters ($indexStats), least used first"""
+    return await get_index_usage()
+
+
+@router.get("/pools")
+async def get_pool_stats(_current_user: TokenData = Depends(get_current_user)):
+    """Get MySQL connection pool, bcrypt pool, audit queue, snapshot refresh and change feed usage, depth and wait times"""
+    pool = engine.sync_engine.pool
+    return {
+        "sqlalchemy": {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "overflow": pool.overflow(),
+        },
+        "saga": get_raw_pool_stats(),
+        "password_hashing": password_hasher.stats(),
+        "audit_writer": audit_writer.stats(),
+        "snapshot_refresher": snapshot_refresher.stats(),
+        "change_feed": change_feed.stats()
+    }
@@ -1,4 +1,5 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Header
 from typing import Optional
 from bson import ObjectId
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -9,12 +10,18 @@ from app.schemas.deal import (
     DealStatus, DealStatusUpdate, ConditionCreate, ConditionUpdate,
     DealWithDepositCreate, DealWithDepositResponse
 )
-from app.services.deal_service import DealService
-from app.services.saga_service import DealDepositSaga
+from app.services.deal_service import DealService, ACTIVE_DEAL_STATUSES
+from app.services.saga_service import DealDepositSaga, SagaInDoubt
 from app.database.mongodb import get_database
 from app.database.mysql import get_session, async_session_factory
 from app.models.transaction import Transaction
+from app.utils.serialization import list_response
+from app.utils.bulk import read_bulk_rows
+from app.utils.idempotency import run_idempotent, InDoubt, IDEMPOTENCY_HEADER
+from app.schemas.bulk import BulkResult
+from app.core.config import get_settings
 
+settings = get_settings()
 router = APIRouter(prefix="/api/deals", tags=["deals"])
 
 
@@ -29,6 +36,34 @@ def validate_object_id(id_value: str, field_name: str):
         )
 
 
+async def validate_property_available(property_id: str):
+    """
+    Validate the property exists, is not sold and has no active deal.
+    The property lookup and the active-deal count run concurrently.
+    """
+    db = get_database()
+    prop, active_deal_count = await asyncio.gather(
+        db.properties.find_one({"_id": ObjectId(property_id)}, {"status": 1}),
+        db.deals.count_documents({
+            "property_id": ObjectId(property_id),
+            "status": {"$in": ACTIVE_DEAL_STATUSES}
+        })
+    )
+    if not prop:
+        raise HTTPException(status_code=400, detail="Property not found")
+    if prop.get("status") == "sold":
+        raise HTTPException(
+            status_code=400,
+            detail="Cannot create deal: this property is already sold."
+        )
+    if active_deal_count > 0:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot create deal: this property already has {active_deal_count} active deal(s). "
+                   f"Complete or cancel existing deals first."
+        )
+
+
 @router.post("", response_model=DealResponse, status_code=201)
 async def create_deal(deal_data: DealCreate):
     """Create a new deal with participant snapshots"""
@@ -48,29 +83,8 @@ async def create_deal(deal_data: DealCreate):
         if deal_data.participants.seller_lawyer_id:
             validate_object_id(str(deal_data.participants.seller_lawyer_id), "seller_lawyer_id")
     
-    # Validate property exists and is not sold
-    db = get_database()
-    prop = await db.properties.find_one({"_id": ObjectId(str(deal_data.property_id))})
-    if not prop:
-        raise HTTPException(status_code=400, detail="Property not found")
-    if prop.get("status") == "sold":
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot create deal: this property is already sold."
-        )
-
-    # Check for existing active deals on this property
-    active_statuses = ["draft", "submitted", "conditional", "firm", "closing"]
-    active_deal_count = await db.deals.count_documents({
-        "property_id": ObjectId(str(deal_data.property_id)),
-        "status": {"$in": active_statuses}
-    })
-    if active_deal_count > 0:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot create deal: this property already has {active_deal_count} active deal(s). "
-                   f"Complete or cancel existing deals first."
-        )
+    # Validate property exists, is not sold and has no active deals
+    await validate_property_available(str(deal_data.property_id))
 
     service = DealService()
     try:
@@ -79,14 +93,45 @@ async def create_deal(deal_data: DealCreate):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@router.post("/with-deposit", response_model=DealWithDepositResponse, status_code=201)
-async def create_deal_with_deposit(data: DealWithDepositCreate):
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_deals(request: Request):
+    """
+    Create many deals from a JSON array or NDJSON body (one DealCreate per
+    row). Rows are checked like POST /api/deals; failures are reported per
+    row by zero-based index and do not stop the other rows.
+    """
+    rows = await read_bulk_rows(request)
+    service = DealService()
+    return await service.bulk_create_deals(rows)
+
+
+@router.post(
+    "/with-deposit", response_model=DealWithDepositResponse, status_code=201,
+    responses={202: {"description": "Outcome not settled yet: detail, saga_id and deal_id (GET the deal later)"}}
+)
+async def create_deal_with_deposit(
+    data: DealWithDepositCreate,
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_HEADER, description="Replay the stored response on retries"
+    )
+):
     """
     Create a deal with initial deposit using cross-database Saga Pattern.
 
     This endpoint coordinates writes across MongoDB (deal) and MySQL (deposit transaction).
     If the MySQL write fails, the MongoDB deal is automatically rolled back (compensated).
+    A retry with the same Idempotency-Key gets the first response back instead of a new saga.
+    If the saga could not settle (compensation failed, or crash recovery took
+    it over) the answer is 202 with the saga and deal ids, stored for the key
+    like any other response: the deal may still be created or removed.
     """
+    return await run_idempotent(
+        idempotency_key, "POST /api/deals/with-deposit", data,
+        lambda: _create_deal_with_deposit(data), DealWithDepositResponse, 201
+    )
+
+
+async def _create_deal_with_deposit(data: DealWithDepositCreate) -> dict:
     # Validate ObjectId fields
     validate_object_id(str(data.property_id), "property_id")
     if data.participants:
@@ -96,30 +141,6 @@ async def create_deal_with_deposit(data: DealWithDepositCreate):
             if value:
                 validate_object_id(str(value), field)
 
-    # ── Validate property exists and is available ──
-    db = get_database()
-    prop = await db.properties.find_one({"_id": ObjectId(str(data.property_id))})
-    if not prop:
-        raise HTTPException(status_code=400, detail="Property not found")
-    if prop.get("status") == "sold":
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot create deal: this property is already sold."
-        )
-
-    # ── Check no active deals on this property ──
-    active_statuses = ["draft", "submitted", "conditional", "firm", "closing"]
-    active_deal_count = await db.deals.count_documents({
-        "property_id": ObjectId(str(data.property_id)),
-        "status": {"$in": active_statuses}
-    })
-    if active_deal_count > 0:
-        raise HTTPException(
-            status_code=400,
-            detail=f"Cannot create deal: this property already has {active_deal_count} active deal(s). "
-                   f"Complete or cancel existing deals first."
-        )
-
     # ── Validate deposit amount <= offer price ──
     if data.deposit_amount > data.offer_price:
         raise HTTPException(
@@ -127,10 +148,19 @@ async def create_deal_with_deposit(data: DealWithDepositCreate):
             detail=f"Deposit amount cannot exceed offer price."
         )
 
+    # ── Validate property exists, is available and has no active deals ──
+    await validate_property_available(str(data.property_id))
+
     saga = DealDepositSaga()
     try:
         result = await saga.execute(data)
         return result
+    except SagaInDoubt as e:
+        raise InDoubt(202, {
+            "detail": str(e),
+            "saga_id": str(e.saga_id) if e.saga_id else None,
+            "deal_id": str(e.deal_id),
+        })
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
@@ -145,20 +175,31 @@ async def list_deals(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
     status: Optional[DealStatus] = None,
-    property_id: Optional[str] = None
+    property_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    include_total: bool = Query(True, description="Set false to skip the exact count")
 ):
-    """Get paginated list of deals"""
+    """Get paginated list of deals (page number or keyset cursor)"""
     if property_id:
         validate_object_id(property_id, "property_id")
     
     service = DealService()
     status_value = status.value if status else None
-    deals, total = await service.get_deals(page, page_size, status_value, property_id)
-    return DealListResponse(
+    try:
+        deals, total, next_cursor = await service.get_deals(
+            page, page_size, status_value, property_id, cursor, include_total,
+            trusted=settings.trusted_responses
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_response(
+        DealListResponse,
+        settings.trusted_responses,
         deals=deals,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
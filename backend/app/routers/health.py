@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from app.database.health import health_checker
+
+router = APIRouter(prefix="/health", tags=["health"])
+
+
+@router.get("/live")
+async def liveness():
+    """Liveness probe: the process is up and its event loop is serving requests"""
+    return {"status": "alive"}
+
+
+@router.get("/ready")
+async def readiness():
+    """
+    Readiness probe: MongoDB and both MySQL pools answer a ping in time.
+    Returns 503 with the failing checks otherwise. Results are cached for
+    a few seconds.
+    """
+    report = await health_checker.check()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
+@router.get("")
+async def health_check():
+    """Overall health: the readiness report, summarized per database"""
+    report = await health_checker.check()
+    checks = report["checks"]
+    return JSONResponse(
+        {
+            "status": "healthy" if report["ready"] else "unhealthy",
+            "databases": {
+                "mongodb": "connected" if checks["mongodb"]["status"] == "up" else "unavailable",
+                "mysql": "connected" if checks["mysql"]["status"] == "up" else "unavailable",
+            },
+        },
+        status_code=200 if report["ready"] else 503
+    )
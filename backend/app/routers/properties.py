@@ -1,13 +1,19 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Request
 from typing import Optional
 from bson import ObjectId
 
 from app.schemas.property import (
     PropertyCreate, PropertyUpdate, PropertyResponse, 
-    PropertyListResponse, PropertyType, PropertyStatus
+    PropertyListResponse, PropertySummary, PropertyType, PropertyStatus
 )
 from app.services.property_service import PropertyService
+from app.utils.streaming import StreamFormat, ListView, stream_response, stream_responses
+from app.utils.serialization import list_response
+from app.utils.bulk import read_bulk_rows
+from app.schemas.bulk import BulkResult
+from app.core.config import get_settings
 
+settings = get_settings()
 router = APIRouter(prefix="/api/properties", tags=["properties"])
 
 
@@ -29,6 +35,18 @@ async def create_property(property_data: PropertyCreate):
     return await service.create_property(property_data)
 
 
+@router.post("/bulk", response_model=BulkResult)
+async def bulk_create_properties(request: Request):
+    """
+    Create many property listings from a JSON array or NDJSON body (one
+    PropertyCreate per row). Invalid rows are reported per row by zero-based
+    index and do not stop the other rows.
+    """
+    rows = await read_bulk_rows(request)
+    service = PropertyService()
+    return await service.bulk_create_properties(rows)
+
+
 @router.get("", response_model=PropertyListResponse)
 async def list_properties(
     page: int = Query(1, ge=1),
@@ -37,29 +55,43 @@ async def list_properties(
     status: Optional[PropertyStatus] = None,
     min_price: Optional[float] = Query(None, ge=0),
     max_price: Optional[float] = Query(None, ge=0),
-    city: Optional[str] = None
+    city: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    include_total: bool = Query(True, description="Set false to skip the exact count")
 ):
-    """Get paginated list of properties with filters"""
+    """Get paginated list of properties with filters (page number or keyset cursor)"""
     service = PropertyService()
     type_value = type.value if type else None
     status_value = status.value if status else None
     
-    properties, total = await service.get_properties(
-        page, page_size, type_value, status_value, min_price, max_price, city
-    )
-    return PropertyListResponse(
+    try:
+        properties, total, next_cursor = await service.get_properties(
+            page, page_size, type_value, status_value, min_price, max_price, city,
+            cursor, include_total, trusted=settings.trusted_responses
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_response(
+        PropertyListResponse,
+        settings.trusted_responses,
         properties=properties,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
-@router.get("/active", response_model=list[PropertyResponse])
-async def get_active_properties():
-    """Get all active property listings for selection"""
+@router.get("/active", responses=stream_responses(PropertyResponse, PropertySummary))
+async def get_active_properties(
+    format: StreamFormat = StreamFormat.json,
+    view: ListView = Query(ListView.full, description="summary returns id/address/price/type only"),
+    q: Optional[str] = Query(None, min_length=1, description="Street or city prefix"),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """Stream active property listings for selection"""
     service = PropertyService()
-    return await service.get_active_properties()
+    return stream_response(service.iter_active_properties(view, q, limit), format)
 
 
 @router.get("/{property_id}", response_model=PropertyResponse)
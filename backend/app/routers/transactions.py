@@ -1,16 +1,20 @@
-from fastapi import APIRouter, HTTPException, Query, Depends
-from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Depends, Response, Request, Header
+from datetime import datetime
+from typing import Optional, List
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.database.mysql import get_session
 from app.schemas.transaction import (
     TransactionCreate, TransactionResponse, TransactionListResponse,
     TrustAccountCreate, TrustAccountUpdate, TrustAccountResponse, TrustAccountListResponse,
-    TransactionType, AuditLogResponse
+    TransactionType, TotalMode, AuditLogResponse
 )
 from app.services.transaction_service import (
     TransactionService, TrustAccountService, AuditLogService
 )
+from app.utils.bulk import read_bulk_rows
+from app.utils.idempotency import run_idempotent, IDEMPOTENCY_HEADER
+from app.schemas.bulk import BulkResult
 
 router = APIRouter(prefix="/api", tags=["transactions"])
 
@@ -19,11 +23,48 @@ router = APIRouter(prefix="/api", tags=["transactions"])
 @router.post("/transactions", response_model=TransactionResponse, status_code=201)
 async def create_transaction(
     transaction_data: TransactionCreate,
+    session: AsyncSession = Depends(get_session),
+    idempotency_key: Optional[str] = Header(
+        None, alias=IDEMPOTENCY_HEADER, description="Replay the stored response on retries"
+    )
+):
+    """
+    Record a new financial transaction (once per Idempotency-Key).
+    Trust account balances are not changed; use /transactions/bulk with
+    update_balances to record transactions and move balances together.
+    """
+    service = TransactionService(session)
+    return await run_idempotent(
+        idempotency_key, "POST /api/transactions", transaction_data,
+        lambda: service.create_transaction(transaction_data), TransactionResponse, 201
+    )
+
+
+@router.post("/transactions/bulk", response_model=BulkResult)
+async def bulk_create_transactions(
+    request: Request,
+    update_balances: bool = Query(
+        True, description="Apply the net delta per trust account (to_account +, from_account -)"
+    ),
+    external_accounts: List[str] = Query(
+        [], description="Account numbers of outside parties; balances are not tracked for them"
+    ),
     session: AsyncSession = Depends(get_session)
 ):
-    """Record a new financial transaction"""
+    """
+    Record many transactions from a JSON array or NDJSON body in one MySQL
+    transaction. Invalid rows are reported per row; a balance error
+    rejects the whole batch. With update_balances (the default, unlike
+    POST /transactions) trust account balances move with the rows, and a
+    row naming an account that is neither a trust account nor listed in
+    external_accounts is rejected.
+    """
+    rows = await read_bulk_rows(request)
     service = TransactionService(session)
-    return await service.create_transaction(transaction_data)
+    try:
+        return await service.create_transactions_bulk(rows, update_balances, external_accounts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.get("/transactions", response_model=TransactionListResponse)
@@ -32,17 +73,28 @@ async def list_transactions(
     page_size: int = Query(10, ge=1, le=100),
     deal_id: Optional[str] = None,
     type: Optional[TransactionType] = None,
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    total: TotalMode = Query(TotalMode.exact, description="exact, estimate (InnoDB statistics) or none"),
+    created_from: Optional[datetime] = Query(None, description="Only rows created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only rows created before this time"),
     session: AsyncSession = Depends(get_session)
 ):
-    """Get paginated list of transactions"""
+    """Get paginated list of transactions (page number or keyset cursor)"""
     service = TransactionService(session)
     type_value = type.value if type else None
-    transactions, total = await service.get_transactions(page, page_size, deal_id, type_value)
+    try:
+        transactions, total_count, next_cursor = await service.get_transactions(
+            page, page_size, deal_id, type_value, cursor, total.value,
+            created_from, created_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     return TransactionListResponse(
         transactions=transactions,
-        total=total,
+        total=total_count,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
@@ -123,13 +175,33 @@ async def update_trust_account(
 # Audit Log endpoints
 @router.get("/audit-logs", response_model=list[AuditLogResponse])
 async def list_audit_logs(
+    response: Response,
     page: int = Query(1, ge=1),
     page_size: int = Query(50, ge=1, le=200),
     entity_type: Optional[str] = None,
     entity_id: Optional[str] = None,
+    cursor: Optional[str] = Query(None, description="Opaque X-Next-Cursor from a previous page"),
+    total: TotalMode = Query(TotalMode.none, description="exact, estimate (InnoDB statistics) or none"),
+    created_from: Optional[datetime] = Query(None, description="Only entries created at or after this time"),
+    created_to: Optional[datetime] = Query(None, description="Only entries created before this time"),
     session: AsyncSession = Depends(get_session)
 ):
-    """Get audit logs"""
+    """
+    Get audit logs (page number or keyset cursor).
+
+    The body stays a plain list; the next page cursor and the total (when
+    requested) are returned in the X-Next-Cursor / X-Total-Count headers.
+    """
     service = AuditLogService(session)
-    logs, _ = await service.get_logs(page, page_size, entity_type, entity_id)
+    try:
+        logs, total_count, next_cursor = await service.get_logs(
+            page, page_size, entity_type, entity_id, cursor, total.value,
+            created_from, created_to
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    if total_count is not None:
+        response.headers["X-Total-Count"] = str(total_count)
     return logs
@@ -3,12 +3,18 @@ from typing import Optional
 from bson import ObjectId
 
 from app.schemas.user import (
-    UserCreate, UserUpdate, UserResponse, UserListResponse, UserRole
+    UserCreate, UserUpdate, UserResponse, UserListResponse, UserSummary, UserRole
 )
 from app.services.user_service import UserService
+from app.utils.streaming import StreamFormat, ListView, stream_response, stream_responses
+from app.utils.serialization import list_response
+from app.core.config import get_settings
 
+settings = get_settings()
 router = APIRouter(prefix="/api/users", tags=["users"])
 
+ALL_USERS_LIMIT = 1000
+
 
 def validate_object_id(id_value: str, field_name: str):
     """Validate that a string is a valid MongoDB ObjectId"""
@@ -35,26 +41,41 @@ async def create_user(user_data: UserCreate):
 async def list_users(
     page: int = Query(1, ge=1),
     page_size: int = Query(10, ge=1, le=100),
-    role: Optional[UserRole] = None
+    role: Optional[UserRole] = None,
+    cursor: Optional[str] = Query(None, description="Opaque next_cursor from a previous page"),
+    include_total: bool = Query(True, description="Set false to skip the exact count")
 ):
-    """Get paginated list of users"""
+    """Get paginated list of users (page number or keyset cursor)"""
     service = UserService()
     role_value = role.value if role else None
-    users, total = await service.get_users(page, page_size, role_value)
-    return UserListResponse(
+    try:
+        users, total, next_cursor = await service.get_users(
+            page, page_size, role_value, cursor, include_total,
+            trusted=settings.trusted_responses
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return list_response(
+        UserListResponse,
+        settings.trusted_responses,
         users=users,
         total=total,
         page=page,
-        page_size=page_size
+        page_size=page_size,
+        next_cursor=next_cursor
     )
 
 
-@router.get("/all", response_model=list[UserResponse])
-async def get_all_users():
-    """Get all users for selection dropdowns"""
+@router.get("/all", responses=stream_responses(UserResponse, UserSummary))
+async def get_all_users(
+    format: StreamFormat = StreamFormat.json,
+    view: ListView = Query(ListView.full, description="summary returns id/email/role/name only"),
+    q: Optional[str] = Query(None, min_length=1, description="Email or name prefix"),
+    limit: int = Query(ALL_USERS_LIMIT, ge=1, le=ALL_USERS_LIMIT)
+):
+    """Stream users for selection dropdowns, newest first (1000 at most)"""
     service = UserService()
-    users, _ = await service.get_users(1, 1000, None)
-    return users
+    return stream_response(service.iter_users(None, view, q, limit), format)
 
 
 @router.get("/{user_id}", response_model=UserResponse)
@@ -95,8 +116,14 @@ async def delete_user(user_id: str):
         raise HTTPException(status_code=404, detail="User not found")
 
 
-@router.get("/role/{role}", response_model=list[UserResponse])
-async def get_users_by_role(role: UserRole):
-    """Get all users with a specific role"""
+@router.get("/role/{role}", responses=stream_responses(UserResponse, UserSummary))
+async def get_users_by_role(
+    role: UserRole,
+    format: StreamFormat = StreamFormat.json,
+    view: ListView = Query(ListView.full, description="summary returns id/email/role/name only"),
+    q: Optional[str] = Query(None, min_length=1, description="Email or name prefix"),
+    limit: Optional[int] = Query(None, ge=1)
+):
+    """Stream all users with a specific role"""
     service = UserService()
-    return await service.get_users_by_role(role.value)
+    return stream_response(service.iter_users(role.value, view, q, limit), format)
@@ -0,0 +1,20 @@
+from pydantic import BaseModel
+from typing import List
+
+
+class BulkRowCreated(BaseModel):
+    index: int
+    id: str
+
+
+class BulkRowError(BaseModel):
+    index: int
+    error: str
+
+
+class BulkResult(BaseModel):
+    received: int
+    inserted: int
+    failed: int
+    created: List[BulkRowCreated]
+    errors: List[BulkRowError]
@@ -107,6 +107,25 @@ class DealResponse(BaseModel):
 
 class DealListResponse(BaseModel):
     deals: list[DealResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
+
+
+class DealWithDepositCreate(BaseModel):
+    property_id: PyObjectId
+    offer_price: float = Field(gt=0)
+    participants: ParticipantRefs
+    closing_date: Optional[datetime] = None
+    conditions: List[ConditionCreate] = []
+    notes: Optional[str] = None
+    deposit_amount: float = Field(gt=0)
+    trust_account_number: str
+    deposit_description: Optional[str] = None
+
+
+class DealWithDepositResponse(BaseModel):
+    deal: DealResponse
+    transaction: Dict[str, Any]
+    message: str
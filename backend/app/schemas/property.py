@@ -78,8 +78,17 @@ class PropertyResponse(BaseModel):
         from_attributes = True
 
 
+class PropertySummary(BaseModel):
+    """A listing as streamed with view=summary"""
+    id: str = Field(alias="_id")
+    type: PropertyType
+    address: AddressSchema
+    listing_price: float
+
+
 class PropertyListResponse(BaseModel):
     properties: list[PropertyResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
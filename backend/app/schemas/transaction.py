@@ -19,6 +19,12 @@ class TransactionStatus(str, Enum):
     reversed = "reversed"
 
 
+class TotalMode(str, Enum):
+    exact = "exact"
+    estimate = "estimate"
+    none = "none"
+
+
 class AccountStatus(str, Enum):
     active = "active"
     frozen = "frozen"
@@ -51,9 +57,10 @@ class TransactionResponse(BaseModel):
 
 class TransactionListResponse(BaseModel):
     transactions: List[TransactionResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
 
 
 class TrustAccountCreate(BaseModel):
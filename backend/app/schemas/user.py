@@ -60,8 +60,21 @@ class UserResponse(BaseModel):
         from_attributes = True
 
 
+class UserSummaryProfile(BaseModel):
+    name: str
+
+
+class UserSummary(BaseModel):
+    """A user as streamed with view=summary"""
+    id: str = Field(alias="_id")
+    email: EmailStr
+    role: UserRole
+    profile: UserSummaryProfile
+
+
 class UserListResponse(BaseModel):
     users: list[UserResponse]
-    total: int
+    total: Optional[int] = None
     page: int
     page_size: int
+    next_cursor: Optional[str] = None
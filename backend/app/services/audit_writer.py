@@ -0,0 +1,228 @@
+"""
+Buffered Audit Log Writer
+
+Audit entries are queued in-process and written to ``audit_logs`` by a
+background task in multi-row INSERT batches, flushed when
+``audit_batch_size`` entries are waiting or every
+``audit_flush_interval_ms``, whichever comes first. Business transactions
+no longer pay an extra INSERT (and ``created_at`` index contention) each.
+
+Entries are queued only after the business transaction has committed, so
+a rolled-back write never leaves an audit row. ``created_at`` is captured
+at enqueue time, not at flush time.
+
+Durable entries: the caller writes the audit row inside its own
+transaction instead, so it commits or rolls back with the business write.
+Callers choose per entry with ``is_durable(durable=True)`` (payments;
+the saga deposit and its reversal always write theirs in-transaction);
+``audit_durable`` makes every entry durable. Use it where losing the last few hundred milliseconds of audit
+entries on a crash is not acceptable.
+
+Backpressure: once ``audit_queue_max`` entries are waiting, ``submit``
+blocks its caller until the writer catches up. The queue drains on
+shutdown; entries it could not write in ``audit_drain_timeout_seconds``
+(including a batch cut off mid-write) are logged as not written, and
+later submits are written directly.
+"""
+
+import asyncio
+import json
+import logging
+import time
+from collections import deque
+from datetime import datetime
+from typing import Optional
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import insert
+
+from app.core.config import get_settings
+from app.database.mysql import engine
+from app.models.transaction import AuditLog
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+
+def audit_entry(
+    action: str,
+    entity_type: str,
+    entity_id: str = None,
+    old_value: dict = None,
+    new_value: dict = None,
+    user_id: str = None,
+    ip_address: str = None
+) -> dict:
+    """Build an audit_logs row, timestamped now"""
+    return {
+        "user_id": user_id,
+        "action": action,
+        "entity_type": entity_type,
+        "entity_id": entity_id,
+        "old_value": old_value,
+        "new_value": new_value,
+        "ip_address": ip_address,
+        "created_at": datetime.utcnow(),
+    }
+
+
+class AuditWriter:
+    def __init__(self):
+        self.durable = settings.audit_durable
+        self.batch_size = settings.audit_batch_size
+        self.flush_interval = settings.audit_flush_interval_ms / 1000
+        self.max_queue = settings.audit_queue_max
+        self.pending: deque = deque()  # (enqueued monotonic time, entry)
+        self.in_flight: list = []  # batch being written
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        self.space: Optional[asyncio.Event] = None
+        self.stopping = False
+        # Metrics
+        self.enqueued = 0
+        self.written = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.dropped = 0
+        self.backpressure_waits = 0
+        self.last_lag_seconds = 0.0
+        self.max_lag_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def is_durable(self, durable: bool = False) -> bool:
+        """Whether an entry goes in the caller's transaction: asked for per call, or always with audit_durable"""
+        return durable or self.durable
+
+    def start(self):
+        self.wakeup = asyncio.Event()
+        self.space = asyncio.Event()
+        self.stopping = False
+        self.task = asyncio.create_task(self._run())
+        logger.info(
+            f"Audit writer started (batch={self.batch_size}, "
+            f"interval={self.flush_interval * 1000:.0f}ms, durable={self.durable})"
+        )
+
+    async def stop(self):
+        """Flush everything still queued, then stop the background task"""
+        if not self.running:
+            return
+        self.stopping = True
+        self.wakeup.set()
+        try:
+            await asyncio.wait_for(self.task, timeout=settings.audit_drain_timeout_seconds)
+        except asyncio.TimeoutError:
+            # wait_for cancelled the writer, possibly in the middle of a batch
+            unwritten = self.in_flight + [entry for _, entry in self.pending]
+            logger.error(f"Audit writer drain timed out; {len(unwritten)} entries not written")
+            self._drop(unwritten)
+            self.in_flight = []
+            self.pending.clear()
+        self.task = None
+        # Blocked submitters find the writer stopped and write directly
+        self.space.set()
+
+    async def submit(self, *entries: dict):
+        """
+        Queue entries for the next batch. Blocks while the queue is full.
+        Without a running writer (scripts that skip the lifespan) the entries
+        are written immediately.
+        """
+        for entry in entries:
+            while len(self.pending) >= self.max_queue and self.running:
+                self.backpressure_waits += 1
+                self.space.clear()
+                await self.space.wait()
+            if not self.running:
+                await self._write([entry])
+                continue
+            self.pending.append((time.monotonic(), entry))
+            self.enqueued += 1
+
+        if self.running and len(self.pending) >= self.batch_size:
+            self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            if self.stopping and not self.pending:
+                return
+            if not self.stopping and len(self.pending) < self.batch_size:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), timeout=self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.wakeup.clear()
+            await self._flush_pending()
+
+    async def _flush_pending(self):
+        while self.pending:
+            count = min(len(self.pending), self.batch_size)
+            batch = [self.pending.popleft() for _ in range(count)]
+            self.space.set()
+
+            lag = time.monotonic() - batch[0][0]
+            self.last_lag_seconds = lag
+            self.max_lag_seconds = max(self.max_lag_seconds, lag)
+            self.in_flight = [entry for _, entry in batch]
+            await self._write(self.in_flight)
+            self.in_flight = []
+
+            if not self.stopping and len(self.pending) < self.batch_size:
+                return
+
+    async def _write(self, entries: list):
+        """One multi-row INSERT, retried with backoff before giving up"""
+        if not entries:
+            return
+        for attempt in range(settings.audit_flush_retries + 1):
+            try:
+                async with engine.begin() as conn:
+                    await conn.execute(insert(AuditLog).values(entries))
+                self.written += len(entries)
+                self.flushes += 1
+                return
+            except Exception as e:
+                self.failed_flushes += 1
+                logger.warning(f"Audit flush of {len(entries)} entries failed: {e}")
+                if attempt < settings.audit_flush_retries:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+        self._drop(entries)
+
+    def _drop(self, entries: list):
+        # Last resort: keep the entries recoverable from the application log
+        self.dropped += len(entries)
+        for entry in entries:
+            logger.error(f"AUDIT ENTRY NOT WRITTEN: {json.dumps(jsonable_encoder(entry))}")
+
+    def stats(self) -> dict:
+        oldest = time.monotonic() - self.pending[0][0] if self.pending else 0.0
+        return {
+            "durable": self.durable,
+            "running": self.running,
+            "queue_depth": len(self.pending),
+            "max_queue": self.max_queue,
+            "batch_size": self.batch_size,
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "dropped": self.dropped,
+            "backpressure_waits": self.backpressure_waits,
+            "oldest_pending_seconds": round(oldest, 3),
+            "last_lag_seconds": round(self.last_lag_seconds, 3),
+            "max_lag_seconds": round(self.max_lag_seconds, 3),
+        }
+
+
+audit_writer = AuditWriter()
+
+
+def start_audit_writer():
+    audit_writer.start()
+
+
+async def stop_audit_writer():
+    await audit_writer.stop()
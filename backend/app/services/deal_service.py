@@ -1,15 +1,27 @@
+import asyncio
 from datetime import datetime
 from typing import Optional, List, Dict, Any, Tuple
 from bson import ObjectId
+from pymongo import ReturnDocument
 import logging
 
 from app.database.mongodb import get_database
+from app.database.cache import (
+    cached, invalidate, deal_key, property_key, DASHBOARD_KEYS
+)
+from app.services.stats_service import StatsService
+from app.utils.pagination import encode_cursor, mongo_keyset_filter, MONGO_KEYSET_SORT
+from app.utils.serialization import dump_trusted
+from app.utils.bulk import validate_rows, chunked, insert_unordered, bulk_result
+from app.core.config import get_settings
+from app.schemas.bulk import BulkResult, BulkRowCreated, BulkRowError
 from app.schemas.deal import (
     DealCreate, DealUpdate, DealResponse, DealStatus,
     DealStatusUpdate, ConditionCreate, ConditionUpdate, ConditionStatus
 )
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
 
 
 # Valid status transitions
@@ -24,6 +36,21 @@ VALID_TRANSITIONS = {
     DealStatus.expired: []
 }
 
+# Deals in these statuses block another deal on the same property
+ACTIVE_DEAL_STATUSES = [
+    DealStatus.draft.value, DealStatus.submitted.value, DealStatus.conditional.value,
+    DealStatus.firm.value, DealStatus.closing.value
+]
+
+# The same rules inverted: status -> statuses it may be entered from.
+# Used as the update filter so a transition is one atomic round trip.
+ALLOWED_PREDECESSORS = {
+    status: [current.value for current, targets in VALID_TRANSITIONS.items() if status in targets]
+    for status in DealStatus
+}
+
+NO_PENDING_CONDITIONS = {"conditions": {"$not": {"$elemMatch": {"status": ConditionStatus.pending.value}}}}
+
 
 class DealService:
     def __init__(self):
@@ -31,33 +58,76 @@ class DealService:
         self.deals = self.db.deals
         self.users = self.db.users
         self.properties = self.db.properties
+        self.stats = StatsService()
 
     def _doc_to_response(self, doc: dict) -> DealResponse:
         doc["_id"] = str(doc["_id"])
         doc["property_id"] = str(doc["property_id"])
         return DealResponse(**doc)
 
-    async def _create_participants_snapshot(
-        self, participant_refs: Dict[str, str]
+    def _doc_to_trusted(self, doc: dict) -> dict:
+        return dump_trusted(DealResponse, doc)
+
+    # Only the fields copied into participants_snapshot
+    SNAPSHOT_PROJECTION = {
+        "email": 1, "role": 1,
+        "profile.name": 1, "profile.phone": 1,
+        "role_specific.license_number": 1,
+        "role_specific.brokerage": 1,
+        "role_specific.law_firm": 1,
+    }
+
+    @staticmethod
+    def _participant_refs(deal_data: DealCreate) -> Dict[str, str]:
+        participant_refs = {}
+        for field in ["buyer_id", "seller_id", "buyer_agent_id",
+                      "seller_agent_id", "buyer_lawyer_id", "seller_lawyer_id"]:
+            value = getattr(deal_data.participants, field, None)
+            if value:
+                participant_refs[field.replace("_id", "")] = str(value)
+        return participant_refs
+
+    async def _fetch_participants(self, user_ids) -> Dict[str, dict]:
+        """Resolve participant users with a single $in query, keyed by id"""
+        object_ids = {
+            ObjectId(user_id) for user_id in user_ids
+            if user_id and ObjectId.is_valid(user_id)
+        }
+        users_by_id = {}
+        if object_ids:
+            cursor = self.users.find(
+                {"_id": {"$in": list(object_ids)}}, self.SNAPSHOT_PROJECTION
+            )
+            async for user in cursor:
+                users_by_id[str(user["_id"])] = user
+        return users_by_id
+
+    @staticmethod
+    def _snapshot_entry(user: dict) -> Dict[str, Any]:
+        """The participants_snapshot entry for a user (SNAPSHOT_PROJECTION fields)"""
+        return {
+            "user_id": str(user["_id"]),
+            "name": user.get("profile", {}).get("name", "Unknown"),
+            "email": user.get("email", ""),
+            "phone": user.get("profile", {}).get("phone", ""),
+            "role_type": user.get("role", ""),
+            "license_number": user.get("role_specific", {}).get("license_number"),
+            "brokerage": user.get("role_specific", {}).get("brokerage"),
+            "law_firm": user.get("role_specific", {}).get("law_firm"),
+        }
+
+    def _build_participants_snapshot(
+        self, participant_refs: Dict[str, str], users_by_id: Dict[str, dict]
     ) -> Dict[str, Any]:
         snapshot = {}
 
         for role, user_id in participant_refs.items():
             if not user_id:
                 continue
-            user = await self.users.find_one({"_id": ObjectId(user_id)})
+            user = users_by_id.get(user_id)
 
             if user:
-                snapshot[role] = {
-                    "user_id": str(user["_id"]),
-                    "name": user.get("profile", {}).get("name", "Unknown"),
-                    "email": user.get("email", ""),
-                    "phone": user.get("profile", {}).get("phone", ""),
-                    "role_type": user.get("role", ""),
-                    "license_number": user.get("role_specific", {}).get("license_number"),
-                    "brokerage": user.get("role_specific", {}).get("brokerage"),
-                    "law_firm": user.get("role_specific", {}).get("law_firm"),
-                }
+                snapshot[role] = self._snapshot_entry(user)
             else:
                 logger.warning(f"User {user_id} not found for role {role}")
                 snapshot[role] = {
@@ -68,16 +138,18 @@ class DealService:
 
         return snapshot
 
-    async def create_deal(self, deal_data: DealCreate) -> DealResponse:
-        participant_refs = {}
-        for field in ["buyer_id", "seller_id", "buyer_agent_id",
-                      "seller_agent_id", "buyer_lawyer_id", "seller_lawyer_id"]:
-            value = getattr(deal_data.participants, field, None)
-            if value:
-                participant_refs[field.replace("_id", "")] = str(value)
-
-        participants_snapshot = await self._create_participants_snapshot(participant_refs)
+    async def _create_participants_snapshot(
+        self, participant_refs: Dict[str, str]
+    ) -> Dict[str, Any]:
+        users_by_id = await self._fetch_participants(participant_refs.values())
+        return self._build_participants_snapshot(participant_refs, users_by_id)
 
+    def _build_deal_doc(
+        self,
+        deal_data: DealCreate,
+        participant_refs: Dict[str, str],
+        participants_snapshot: Dict[str, Any]
+    ) -> dict:
         conditions = []
         for cond in deal_data.conditions:
             conditions.append({
@@ -89,7 +161,7 @@ class DealService:
                 "created_at": datetime.utcnow()
             })
 
-        deal_doc = {
+        return {
             "property_id": ObjectId(str(deal_data.property_id)),
             "offer_price": deal_data.offer_price,
             "status": DealStatus.draft.value,
@@ -106,15 +178,92 @@ class DealService:
             "updated_at": datetime.utcnow()
         }
 
+    async def create_deal(self, deal_data: DealCreate, deal_id: Optional[ObjectId] = None) -> DealResponse:
+        """Create a deal; ``deal_id`` presets its _id (the saga's idempotency key)"""
+        participant_refs = self._participant_refs(deal_data)
+        participants_snapshot = await self._create_participants_snapshot(participant_refs)
+        deal_doc = self._build_deal_doc(deal_data, participant_refs, participants_snapshot)
+        if deal_id is not None:
+            deal_doc["_id"] = deal_id
+
         result = await self.deals.insert_one(deal_doc)
         deal_doc["_id"] = result.inserted_id
+        await self.stats.record_deal_change(None, deal_doc)
+        await invalidate(*DASHBOARD_KEYS)
 
         logger.info(f"Deal created with ID {result.inserted_id}")
         return self._doc_to_response(deal_doc)
 
+    async def bulk_create_deals(self, rows: List[Any]) -> BulkResult:
+        """
+        Create many deals from raw JSON rows, applying the same checks as
+        POST /api/deals. Per chunk of ``bulk_insert_chunk_size`` rows the
+        referenced properties, their active deals and all participants are
+        resolved with one $in query each, then the deals are inserted with
+        an unordered insert_many. A property may receive at most one deal
+        per import.
+        """
+        valid, errors = validate_rows(DealCreate, rows)
+        created = []
+        claimed = set()  # properties given a deal earlier in this import
+
+        for chunk in chunked(valid, settings.bulk_insert_chunk_size):
+            property_ids = list({ObjectId(str(data.property_id)) for _, data in chunk})
+            refs = [(index, data, self._participant_refs(data)) for index, data in chunk]
+
+            properties, busy, users_by_id = await asyncio.gather(
+                self.properties.find(
+                    {"_id": {"$in": property_ids}}, {"status": 1}
+                ).to_list(length=None),
+                self.deals.distinct("property_id", {
+                    "property_id": {"$in": property_ids},
+                    "status": {"$in": ACTIVE_DEAL_STATUSES}
+                }),
+                self._fetch_participants(
+                    {user_id for _, _, r in refs for user_id in r.values()}
+                ),
+            )
+            status_by_property = {p["_id"]: p.get("status") for p in properties}
+            busy = set(busy)
+
+            docs = []
+            for index, data, participant_refs in refs:
+                property_id = ObjectId(str(data.property_id))
+                if property_id not in status_by_property:
+                    error = "Property not found"
+                elif status_by_property[property_id] == "sold":
+                    error = "Cannot create deal: this property is already sold."
+                elif property_id in busy:
+                    error = "Cannot create deal: this property already has an active deal."
+                elif property_id in claimed:
+                    error = "Cannot create deal: this property already has a deal earlier in this import."
+                else:
+                    error = None
+
+                if error:
+                    errors.append(BulkRowError(index=index, error=error))
+                    continue
+                claimed.add(property_id)
+                snapshot = self._build_participants_snapshot(participant_refs, users_by_id)
+                docs.append((index, self._build_deal_doc(data, participant_refs, snapshot)))
+
+            inserted, write_errors = await insert_unordered(self.deals, docs)
+            errors.extend(write_errors)
+            created.extend(BulkRowCreated(index=i, id=str(doc["_id"])) for i, doc in inserted)
+            await self.stats.record_deal_inserts([doc for _, doc in inserted])
+
+        if created:
+            await invalidate(*DASHBOARD_KEYS)
+        logger.info(f"Bulk deal import: {len(created)} created, {len(errors)} failed")
+        return bulk_result(len(rows), created, errors)
+
     async def get_deal(self, deal_id: str) -> Optional[DealResponse]:
         if not ObjectId.is_valid(deal_id):
             return None
+        data = await cached(deal_key(deal_id), lambda: self._load_deal(deal_id))
+        return DealResponse(**data) if data else None
+
+    async def _load_deal(self, deal_id: str) -> Optional[DealResponse]:
         doc = await self.deals.find_one({"_id": ObjectId(deal_id)})
         if doc:
             return self._doc_to_response(doc)
@@ -125,23 +274,42 @@ class DealService:
         page: int = 1,
         page_size: int = 10,
         status: Optional[str] = None,
-        property_id: Optional[str] = None
-    ) -> Tuple[List[DealResponse], int]:
+        property_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        trusted: bool = False
+    ) -> Tuple[List[DealResponse], Optional[int], Optional[str]]:
+        """
+        Get a page of deals, newest first.
+
+        When ``cursor`` is given the page is located by seeking on
+        ``(created_at, _id)`` and ``page`` is ignored. Returns the deals,
+        the exact total (None if ``include_total`` is False) and the cursor
+        of the next page (None on the last page). With ``trusted`` the deals
+        are plain JSON-ready dicts (see app.utils.serialization).
+        """
         query = {}
         if status:
             query["status"] = status
         if property_id and ObjectId.is_valid(property_id):
             query["property_id"] = ObjectId(property_id)
 
-        total = await self.deals.count_documents(query)
-        skip = (page - 1) * page_size
+        total = await self.deals.count_documents(query) if include_total else None
+
+        query.update(mongo_keyset_filter(cursor))
+        find = self.deals.find(query).sort(MONGO_KEYSET_SORT)
+        if not cursor:
+            find = find.skip((page - 1) * page_size)
+        docs = await find.limit(page_size + 1).to_list(length=page_size + 1)
 
-        cursor = self.deals.find(query).skip(skip).limit(page_size).sort("created_at", -1)
-        deals = []
-        async for doc in cursor:
-            deals.append(self._doc_to_response(doc))
+        next_cursor = None
+        if len(docs) > page_size:
+            docs = docs[:page_size]
+            next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"])
 
-        return deals, total
+        convert = self._doc_to_trusted if trusted else self._doc_to_response
+        deals = [convert(doc) for doc in docs]
+        return deals, total, next_cursor
 
     async def update_deal(self, deal_id: str, deal_data: DealUpdate) -> Optional[DealResponse]:
         if not ObjectId.is_valid(deal_id):
@@ -156,43 +324,40 @@ class DealService:
         if deal_data.notes is not None:
             update_doc["notes"] = deal_data.notes
 
-        result = await self.deals.find_one_and_update(
+        # Fetch the pre-image so the dashboard counters can be adjusted
+        before = await self.deals.find_one_and_update(
             {"_id": ObjectId(deal_id)},
             {"$set": update_doc},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result:
+        if before:
+            result = {**before, **update_doc}
+            await self.stats.record_deal_change(before, result)
+            await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
             return self._doc_to_response(result)
         return None
 
     async def update_deal_status(
         self, deal_id: str, status_update: DealStatusUpdate
     ) -> Optional[DealResponse]:
+        """
+        Move a deal to a new status in one conditional update: the filter
+        only matches when the current status may transition to the new one
+        (and, for completion, no condition is pending). Returns None if the
+        deal does not exist, raises ValueError if the transition is invalid.
+        """
         if not ObjectId.is_valid(deal_id):
             return None
 
-        deal = await self.deals.find_one({"_id": ObjectId(deal_id)})
-        if not deal:
-            return None
-
-        current_status = DealStatus(deal["status"])
         new_status = status_update.status
-
-        if new_status not in VALID_TRANSITIONS.get(current_status, []):
-            raise ValueError(
-                f"Invalid status transition from {current_status.value} to {new_status.value}"
-            )
-
+        query = {
+            "_id": ObjectId(deal_id),
+            "status": {"$in": ALLOWED_PREDECESSORS[new_status]}
+        }
         # Business rule: cannot complete a deal with pending conditions
         if new_status == DealStatus.completed:
-            conditions = deal.get("conditions", [])
-            pending = [c for c in conditions if c.get("status") == "pending"]
-            if pending:
-                raise ValueError(
-                    f"Cannot complete deal: {len(pending)} condition(s) are still pending. "
-                    f"All conditions must be satisfied or waived before completing."
-                )
+            query.update(NO_PENDING_CONDITIONS)
 
         update_doc = {
             "status": new_status.value,
@@ -205,23 +370,68 @@ class DealService:
             "note": status_update.note
         }
 
-        result = await self.deals.find_one_and_update(
-            {"_id": ObjectId(deal_id)},
+        deal = await self.deals.find_one_and_update(
+            query,
             {
                 "$set": update_doc,
                 "$push": {"status_history": history_entry}
             },
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result:
-            if new_status == DealStatus.completed:
-                await self.properties.update_one(
-                    {"_id": deal["property_id"]},
-                    {"$set": {"status": "sold", "updated_at": datetime.utcnow()}}
-                )
-            return self._doc_to_response(result)
-        return None
+        if not deal:
+            await self._explain_rejected_transition(deal_id, new_status)
+            return None
+
+        result = {
+            **deal,
+            **update_doc,
+            "status_history": deal.get("status_history", []) + [history_entry]
+        }
+        await self.stats.record_deal_change(deal, result)
+        await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
+        if new_status == DealStatus.completed:
+            sold_update = {"status": "sold", "updated_at": datetime.utcnow()}
+            prop = await self.properties.find_one_and_update(
+                {"_id": deal["property_id"]},
+                {"$set": sold_update},
+                return_document=ReturnDocument.BEFORE
+            )
+            if prop:
+                await self.stats.record_property_change(prop, {**prop, **sold_update})
+            await invalidate(property_key(str(deal["property_id"])))
+        return self._doc_to_response(result)
+
+    async def _explain_rejected_transition(self, deal_id: str, new_status: DealStatus):
+        """
+        Work out why the conditional status update matched nothing. Returns
+        quietly if the deal does not exist, otherwise raises ValueError.
+        Only runs on the failure path.
+        """
+        deal = await self.deals.find_one(
+            {"_id": ObjectId(deal_id)}, {"status": 1, "conditions.status": 1}
+        )
+        if not deal:
+            return
+
+        current_status = DealStatus(deal["status"])
+        if new_status not in VALID_TRANSITIONS.get(current_status, []):
+            raise ValueError(
+                f"Invalid status transition from {current_status.value} to {new_status.value}"
+            )
+
+        pending = [
+            c for c in deal.get("conditions", [])
+            if c.get("status") == ConditionStatus.pending.value
+        ]
+        if new_status == DealStatus.completed and pending:
+            raise ValueError(
+                f"Cannot complete deal: {len(pending)} condition(s) are still pending. "
+                f"All conditions must be satisfied or waived before completing."
+            )
+
+        # The deal changed between the update and this read
+        raise ValueError("Deal was modified concurrently; please retry")
 
     async def add_condition(
         self, deal_id: str, condition: ConditionCreate
@@ -248,25 +458,22 @@ class DealService:
         )
 
         if result:
+            await self.stats.record_pending_conditions(1)
+            await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
             return self._doc_to_response(result)
         return None
 
     async def update_condition(
         self, deal_id: str, condition_id: str, update: ConditionUpdate
     ) -> Optional[DealResponse]:
+        """
+        Update a pending condition in one conditional update. Returns None
+        if the deal or condition does not exist, raises ValueError if the
+        condition is no longer pending.
+        """
         if not ObjectId.is_valid(deal_id):
             return None
 
-        # Only pending conditions can be updated
-        deal = await self.deals.find_one({"_id": ObjectId(deal_id)})
-        if deal:
-            cond = next((c for c in deal.get("conditions", []) if c["id"] == condition_id), None)
-            if cond and cond["status"] != "pending":
-                raise ValueError(
-                    f"Cannot update condition: status is already '{cond['status']}'. "
-                    f"Only pending conditions can be modified."
-                )
-
         update_fields = {
             "conditions.$.status": update.status.value,
             "updated_at": datetime.utcnow()
@@ -278,21 +485,44 @@ class DealService:
         if update.description:
             update_fields["conditions.$.description"] = update.description
 
+        # Only pending conditions can be updated
         result = await self.deals.find_one_and_update(
-            {"_id": ObjectId(deal_id), "conditions.id": condition_id},
+            {
+                "_id": ObjectId(deal_id),
+                "conditions": {"$elemMatch": {
+                    "id": condition_id, "status": ConditionStatus.pending.value
+                }}
+            },
             {"$set": update_fields},
-            return_document=True
+            return_document=ReturnDocument.AFTER
         )
 
-        if result:
-            return self._doc_to_response(result)
-        return None
+        if not result:
+            deal = await self.deals.find_one(
+                {"_id": ObjectId(deal_id)},
+                {"conditions": {"$elemMatch": {"id": condition_id}}}
+            )
+            cond = (deal or {}).get("conditions", [None])[0]
+            if cond:
+                raise ValueError(
+                    f"Cannot update condition: status is already '{cond['status']}'. "
+                    f"Only pending conditions can be modified."
+                )
+            return None
+
+        if update.status != ConditionStatus.pending:
+            await self.stats.record_pending_conditions(-1)
+        await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
+        return self._doc_to_response(result)
 
     async def delete_deal(self, deal_id: str) -> bool:
         if not ObjectId.is_valid(deal_id):
             return False
-        result = await self.deals.delete_one({
+        deleted = await self.deals.find_one_and_delete({
             "_id": ObjectId(deal_id),
             "status": DealStatus.draft.value
         })
-        return result.deleted_count > 0
+        if deleted:
+            await self.stats.record_deal_change(deleted, None)
+            await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
+        return deleted is not None
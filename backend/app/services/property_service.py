@@ -1,25 +1,47 @@
+import json
+import re
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator, Any
 from bson import ObjectId
+from pymongo import ReturnDocument
 
 from app.database.mongodb import get_database
+from app.database.cache import (
+    cached, invalidate, property_key, DASHBOARD_KEYS
+)
+from app.services.stats_service import StatsService
+from app.utils.streaming import ListView
+from app.core.config import get_settings
+from app.utils.pagination import encode_cursor, mongo_keyset_filter, MONGO_KEYSET_SORT
+from app.utils.serialization import dump_trusted, dumps
+from app.utils.bulk import validate_rows, chunked, insert_unordered, bulk_result
+from app.schemas.bulk import BulkResult, BulkRowCreated
 from app.schemas.property import (
     PropertyCreate, PropertyUpdate, PropertyResponse, PropertyType, PropertyStatus
 )
 
 
+settings = get_settings()
+
+
 class PropertyService:
+    # Fields returned by the summary view (e.g. deal form dropdowns)
+    SUMMARY_PROJECTION = {"address": 1, "listing_price": 1, "type": 1}
+
     def __init__(self):
         self.db = get_database()
         self.collection = self.db.properties
+        self.stats = StatsService()
 
     def _doc_to_response(self, doc: dict) -> PropertyResponse:
         doc["_id"] = str(doc["_id"])
         return PropertyResponse(**doc)
 
-    async def create_property(self, property_data: PropertyCreate) -> PropertyResponse:
-        """Create a new property listing"""
-        property_doc = {
+    def _doc_to_trusted(self, doc: dict) -> dict:
+        return dump_trusted(PropertyResponse, doc)
+
+    def _build_property_doc(self, property_data: PropertyCreate) -> dict:
+        return {
             "type": property_data.type.value,
             "address": property_data.address.model_dump(),
             "listing_price": property_data.listing_price,
@@ -31,14 +53,45 @@ class PropertyService:
             "updated_at": datetime.utcnow()
         }
 
+    async def create_property(self, property_data: PropertyCreate) -> PropertyResponse:
+        """Create a new property listing"""
+        property_doc = self._build_property_doc(property_data)
         result = await self.collection.insert_one(property_doc)
         property_doc["_id"] = result.inserted_id
+        await self.stats.record_property_change(None, property_doc)
+        await invalidate(*DASHBOARD_KEYS)
         return self._doc_to_response(property_doc)
 
+    async def bulk_create_properties(self, rows: List[Any]) -> BulkResult:
+        """
+        Create many properties from raw JSON rows. Valid rows are inserted
+        with unordered insert_many in chunks of ``bulk_insert_chunk_size``;
+        invalid or rejected rows are reported per row.
+        """
+        valid, errors = validate_rows(PropertyCreate, rows)
+        created = []
+
+        for chunk in chunked(valid, settings.bulk_insert_chunk_size):
+            docs = [(index, self._build_property_doc(data)) for index, data in chunk]
+            inserted, write_errors = await insert_unordered(self.collection, docs)
+            errors.extend(write_errors)
+            created.extend(BulkRowCreated(index=i, id=str(doc["_id"])) for i, doc in inserted)
+            await self.stats.record_property_inserts([doc for _, doc in inserted])
+
+        if created:
+            await invalidate(*DASHBOARD_KEYS)
+        return bulk_result(len(rows), created, errors)
+
     async def get_property(self, property_id: str) -> Optional[PropertyResponse]:
-        """Get property by ID"""
+        """Get property by ID (read-through cached)"""
         if not ObjectId.is_valid(property_id):
             return None
+        data = await cached(
+            property_key(property_id), lambda: self._load_property(property_id)
+        )
+        return PropertyResponse(**data) if data else None
+
+    async def _load_property(self, property_id: str) -> Optional[PropertyResponse]:
         doc = await self.collection.find_one({"_id": ObjectId(property_id)})
         if doc:
             return self._doc_to_response(doc)
@@ -52,9 +105,19 @@ class PropertyService:
         status: Optional[str] = None,
         min_price: Optional[float] = None,
         max_price: Optional[float] = None,
-        city: Optional[str] = None
-    ) -> tuple[List[PropertyResponse], int]:
-        """Get paginated list of properties with filters"""
+        city: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        trusted: bool = False
+    ) -> tuple[List[PropertyResponse], Optional[int], Optional[str]]:
+        """
+        Get paginated list of properties with filters.
+
+        With ``cursor`` set, the page is found by seeking on
+        ``(created_at, _id)`` instead of skipping. Returns the properties,
+        the total (None if ``include_total`` is False) and the next cursor.
+        With ``trusted`` the properties are plain JSON-ready dicts.
+        """
         query = {}
         
         if property_type:
@@ -70,15 +133,22 @@ class PropertyService:
         if city:
             query["address.city"] = {"$regex": city, "$options": "i"}
 
-        total = await self.collection.count_documents(query)
-        skip = (page - 1) * page_size
+        total = await self.collection.count_documents(query) if include_total else None
 
-        cursor = self.collection.find(query).skip(skip).limit(page_size).sort("created_at", -1)
-        properties = []
-        async for doc in cursor:
-            properties.append(self._doc_to_response(doc))
+        query.update(mongo_keyset_filter(cursor))
+        find = self.collection.find(query).sort(MONGO_KEYSET_SORT)
+        if not cursor:
+            find = find.skip((page - 1) * page_size)
+        docs = await find.limit(page_size + 1).to_list(length=page_size + 1)
 
-        return properties, total
+        next_cursor = None
+        if len(docs) > page_size:
+            docs = docs[:page_size]
+            next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"])
+
+        convert = self._doc_to_trusted if trusted else self._doc_to_response
+        properties = [convert(doc) for doc in docs]
+        return properties, total, next_cursor
 
     async def update_property(
         self, property_id: str, property_data: PropertyUpdate
@@ -100,13 +170,17 @@ class PropertyService:
         if property_data.images is not None:
             update_doc["images"] = property_data.images
 
-        result = await self.collection.find_one_and_update(
+        # Fetch the pre-image so the dashboard counters can be adjusted
+        before = await self.collection.find_one_and_update(
             {"_id": ObjectId(property_id)},
             {"$set": update_doc},
-            return_document=True
+            return_document=ReturnDocument.BEFORE
         )
 
-        if result:
+        if before:
+            result = {**before, **update_doc}
+            await self.stats.record_property_change(before, result)
+            await invalidate(property_key(property_id), *DASHBOARD_KEYS)
             return self._doc_to_response(result)
         return None
 
@@ -114,13 +188,40 @@ class PropertyService:
         """Delete property"""
         if not ObjectId.is_valid(property_id):
             return False
-        result = await self.collection.delete_one({"_id": ObjectId(property_id)})
-        return result.deleted_count > 0
+        deleted = await self.collection.find_one_and_delete({"_id": ObjectId(property_id)})
+        if deleted:
+            await self.stats.record_property_change(deleted, None)
+            await invalidate(property_key(property_id), *DASHBOARD_KEYS)
+        return deleted is not None
+
+    async def iter_active_properties(
+        self,
+        view: ListView = ListView.full,
+        search: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield active listings as serialized JSON straight from the cursor.
+        ``search`` is an anchored (index-friendly, case-sensitive) prefix
+        matched against the street or city.
+        """
+        query = {"status": "active"}
+        if search:
+            prefix = {"$regex": f"^{re.escape(search)}"}
+            query["$or"] = [{"address.street": prefix}, {"address.city": prefix}]
+
+        projection = self.SUMMARY_PROJECTION if view == ListView.summary else None
+        cursor = self.collection.find(
+            query, projection, batch_size=settings.stream_batch_size
+        )
+        if limit:
+            cursor = cursor.limit(limit)
 
-    async def get_active_properties(self) -> List[PropertyResponse]:
-        """Get all active property listings"""
-        cursor = self.collection.find({"status": "active"})
-        properties = []
         async for doc in cursor:
-            properties.append(self._doc_to_response(doc))
-        return properties
+            if view == ListView.summary:
+                doc["_id"] = str(doc["_id"])
+                yield json.dumps(doc)
+            elif settings.trusted_responses:
+                yield dumps(self._doc_to_trusted(doc)).decode()
+            else:
+                yield self._doc_to_response(doc).model_dump_json(by_alias=True)
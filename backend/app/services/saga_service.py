@@ -10,25 +10,235 @@ When a deal with a deposit is created:
 This ensures data consistency across the two database systems without
 requiring distributed transactions.
 
+Saga log: each saga is recorded in the ``saga_log`` collection before
+step 1 and marked finished after it settles, so a saga cut short by a
+crash or a failed compensation is still known after a restart. Step
+states need no writes of their own: the deal's _id is generated up front
+and is the idempotency key of both steps (the deal document, and the
+deposit row's ``idempotency_key``, whose unique key turns a second
+deposit for the deal into a no-op), so whether a step took effect is
+read from its own database. A successful saga costs one extra write per
+step: the log insert before step 1 and the completion after step 2.
+
+Leases: whoever runs a saga (the request, or a recovery worker that
+claimed it) holds it under a random owner token. A SagaLease heartbeat
+renews ``lease_until`` every third of the lease while it works (so a
+saga finishing within that time renews nothing), and state changes only
+apply while the token still owns the saga. Recovery actions and
+compensations additionally renew and check the claim before acting; a
+holder that lost its saga stops and leaves it to the new owner.
+
+Recovery: ``run_saga_recovery`` periodically claims sagas that are still
+open after their lease (``saga_lease_seconds``) expired and settles them:
+  - deal and deposit both present: completed
+  - deal present, no deposit (died between steps): step 2 is resumed,
+    compensated if the deposit is rejected
+  - deposit without a deal: the deposit is reversed
+  - neither: aborted
+A saga whose in-process compensation failed is compensated again.
+Finished records expire after ``saga_log_retention_days``.
+
 Note: Step 2 uses raw aiomysql instead of SQLAlchemy ORM to avoid
 greenlet context conflicts between Motor (MongoDB async) and
-SQLAlchemy's greenlet-based async session.
+SQLAlchemy's greenlet-based async session. Connections come from the
+lifespan-managed aiomysql pool in app.database.mysql.
 """
 
+import asyncio
 import json
 import logging
-from datetime import datetime
+import uuid
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Optional
 from bson import ObjectId
-import aiomysql
+from pymongo import ReturnDocument
+from pymysql.constants.ER import DUP_ENTRY
+from pymysql.err import IntegrityError
 
 from app.database.mongodb import get_database
-from app.core.config import get_settings
+from app.database.cache import invalidate, deal_key, DASHBOARD_KEYS, DASHBOARD_TRANSACTIONS_KEY
+from app.database.mysql import acquire_raw_connection
 from app.services.deal_service import DealService
+from app.services.stats_service import StatsService, TRANSACTION_STATS_UPSERT_SQL
+from app.services.audit_writer import audit_entry
+from app.core.config import get_settings
+from app.core.metrics import saga_step
 from app.schemas.deal import (
     DealCreate, DealResponse, DealWithDepositCreate, ParticipantRefs
 )
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+SAGA_NAME = "deal_deposit"
+# Deposit lookups search transactions created from this long before the
+# saga started (clock skew between pods), so partition pruning still applies
+DEPOSIT_LOOKBACK = timedelta(hours=1)
+
+
+class SagaState(str, Enum):
+    started = "started"
+    compensating = "compensating"
+    completed = "completed"
+    compensated = "compensated"
+    aborted = "aborted"
+    failed = "failed"  # recovery gave up; needs manual attention
+
+
+OPEN_STATES = [SagaState.started.value, SagaState.compensating.value]
+
+
+class SagaClaimLost(Exception):
+    """The saga's lease was taken over by another worker"""
+
+
+class SagaInDoubt(Exception):
+    """
+    The saga stopped without settling (taken over by recovery, or its
+    compensation failed): the deal and deposit may still be created or
+    removed later, so the caller must not report a plain failure.
+    """
+
+    def __init__(self, message: str, saga_id: Optional[ObjectId], deal_id: ObjectId):
+        super().__init__(message)
+        self.saga_id = saga_id
+        self.deal_id = deal_id
+
+
+class SagaLog:
+    """Persistent saga records (saga_log collection)"""
+
+    def __init__(self):
+        self.collection = get_database().saga_log
+
+    def _lease(self, now: datetime) -> datetime:
+        return now + timedelta(seconds=settings.saga_lease_seconds)
+
+    async def start(self, deal_id: ObjectId, deposit: dict, owner: str) -> ObjectId:
+        now = datetime.utcnow()
+        result = await self.collection.insert_one({
+            "saga": SAGA_NAME,
+            "state": SagaState.started.value,
+            "deal_id": deal_id,
+            "deposit": deposit,
+            "owner": owner,
+            "attempts": 0,
+            "started_at": now,
+            "updated_at": now,
+            "lease_until": self._lease(now),
+        })
+        return result.inserted_id
+
+    async def set_state(
+        self, saga_id: ObjectId, owner: str, state: SagaState, error: str = None
+    ) -> bool:
+        """Record a state change; False (and nothing written) if ``owner`` lost the saga"""
+        now = datetime.utcnow()
+        update = {"state": state.value, "updated_at": now}
+        if state.value not in OPEN_STATES:
+            update["finished_at"] = now  # TTL field
+        if error:
+            update["error"] = error
+        result = await self.collection.update_one({"_id": saga_id, "owner": owner}, {"$set": update})
+        return result.matched_count == 1
+
+    async def renew(self, saga_id: ObjectId, owner: str) -> bool:
+        """Extend the lease of an open saga ``owner`` still holds; False if it lost it"""
+        now = datetime.utcnow()
+        result = await self.collection.update_one(
+            {"_id": saga_id, "owner": owner, "state": {"$in": OPEN_STATES}},
+            {"$set": {"lease_until": self._lease(now), "updated_at": now}},
+        )
+        return result.matched_count == 1
+
+    async def claim(self) -> Optional[dict]:
+        """Take one open saga whose lease expired under a new owner token"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            {"state": {"$in": OPEN_STATES}, "lease_until": {"$lt": now}},
+            {
+                "$set": {"owner": new_owner(), "lease_until": self._lease(now), "updated_at": now},
+                "$inc": {"attempts": 1},
+            },
+            sort=[("lease_until", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+
+def new_owner() -> str:
+    return uuid.uuid4().hex
+
+
+def deposit_key(deal_id: str) -> str:
+    """transactions.idempotency_key of a deal's saga deposit"""
+    return f"{SAGA_NAME}:{deal_id}"
+
+
+def deposit_created_at(deal_id: str) -> datetime:
+    """The deposit's created_at: the deal id's (UTC, whole-second) creation time, same on every attempt"""
+    return ObjectId(deal_id).generation_time.replace(tzinfo=None)
+
+
+class SagaLease:
+    """
+    Holds a saga for ``owner`` while it works on it: renews the lease in
+    the background and fences each side effect with ``check``. A no-op
+    without a saga log (``saga_id`` None).
+    """
+
+    def __init__(self, saga_log: Optional[SagaLog], saga_id: Optional[ObjectId], owner: Optional[str]):
+        self.saga_log = saga_log
+        self.saga_id = saga_id
+        self.owner = owner
+        self.lost = False
+        self.task: Optional[asyncio.Task] = None
+
+    async def __aenter__(self) -> "SagaLease":
+        if self.saga_id is not None:
+            self.task = asyncio.create_task(self._heartbeat())
+        return self
+
+    async def __aexit__(self, *exc_info):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+
+    async def _heartbeat(self):
+        while not self.lost:
+            await asyncio.sleep(settings.saga_lease_seconds / 3)
+            try:
+                self.lost = not await self.saga_log.renew(self.saga_id, self.owner)
+            except Exception as e:
+                # Retried on the next beat; the lease outlives two misses
+                logger.warning(f"Saga lease renewal failed for saga {self.saga_id}: {e}")
+
+    def ensure_held(self):
+        """Raise SagaClaimLost if the heartbeat found the saga taken (no write)"""
+        if self.lost:
+            raise SagaClaimLost(f"Saga {self.saga_id} was claimed by another worker")
+
+    async def check(self):
+        """Renew the lease now; raises SagaClaimLost if another worker took the saga"""
+        if self.saga_id is None:
+            return
+        if not self.lost:
+            self.lost = not await self.saga_log.renew(self.saga_id, self.owner)
+        if self.lost:
+            raise SagaClaimLost(f"Saga {self.saga_id} was claimed by another worker")
+
+    async def set_state(self, state: SagaState, error: str = None) -> bool:
+        """Record a state change while still holding the saga"""
+        if self.saga_id is None:
+            return True
+        if self.lost or not await self.saga_log.set_state(self.saga_id, self.owner, state, error):
+            self.lost = True
+            logger.warning(f"Saga {self.saga_id} not marked {state.value}: claimed by another worker")
+            return False
+        return True
 
 
 class DealDepositSaga:
@@ -40,169 +250,347 @@ class DealDepositSaga:
       Step 2: Create deposit in MySQL with ACID transaction (raw aiomysql)
 
     Compensation:
-      If Step 2 fails, delete the MongoDB deal to prevent orphaned data.
+      If Step 2 fails, delete the MongoDB deal to prevent orphaned data
+      (and reverse the deposit, should it have been committed).
     """
 
     def __init__(self):
         self.deal_service = DealService()
+        self.saga_log = SagaLog() if settings.saga_log_enabled else None
+
+    async def _log_state(self, lease: SagaLease, state: SagaState, error: str = None):
+        """Record a state change; on failure the recovery worker settles the saga later"""
+        try:
+            await lease.set_state(state, error)
+        except Exception as e:
+            logger.warning(f"Saga log update to {state.value} failed for saga {lease.saga_id}: {e}")
 
     async def execute(self, data: DealWithDepositCreate) -> dict:
         """
         Execute the saga: create deal in MongoDB, then deposit in MySQL.
         Returns both the deal and transaction responses.
-        Raises on failure after compensating any partial writes.
+        Raises on failure after compensating any partial writes, or
+        SagaInDoubt when the saga was left for recovery to settle.
         """
         deal_response: DealResponse = None
+        deal_id = ObjectId()
+        deposit = {
+            "amount": data.deposit_amount,
+            "to_account": data.trust_account_number,
+            "description": data.deposit_description or f"Initial deposit for deal {deal_id}",
+        }
+        owner = new_owner()
+        saga_id = await self.saga_log.start(deal_id, deposit, owner) if self.saga_log else None
 
-        try:
-            # ── Step 1: Create deal document in MongoDB ──
-            deal_create = DealCreate(
-                property_id=data.property_id,
-                offer_price=data.offer_price,
-                participants=data.participants,
-                closing_date=data.closing_date,
-                conditions=data.conditions,
-                notes=data.notes
-            )
-            deal_response = await self.deal_service.create_deal(deal_create)
-            deal_id = str(deal_response.id)
-
-            logger.info(f"Saga Step 1 complete: deal {deal_id} created in MongoDB")
-
-            # ── Step 2: Create deposit transaction in MySQL (ACID) ──
-            # Uses raw aiomysql to avoid greenlet context conflict with Motor
-            tx_result = await self._create_deposit_mysql(
-                deal_id=deal_id,
-                amount=data.deposit_amount,
-                to_account=data.trust_account_number,
-                description=data.deposit_description or f"Initial deposit for deal {deal_id}"
-            )
-
-            logger.info(
-                f"Saga Step 2 complete: transaction {tx_result['id']} created in MySQL "
-                f"for deal {deal_id}"
-            )
-
-            return {
-                "deal": deal_response,
-                "transaction": tx_result,
-                "message": "Deal and deposit created successfully (cross-database saga)"
-            }
+        async with SagaLease(self.saga_log, saga_id, owner) as lease:
+            try:
+                # ── Step 1: Create deal document in MongoDB ──
+                deal_create = DealCreate(
+                    property_id=data.property_id,
+                    offer_price=data.offer_price,
+                    participants=data.participants,
+                    closing_date=data.closing_date,
+                    conditions=data.conditions,
+                    notes=data.notes
+                )
+                with saga_step("deal_deposit", "create_deal"):
+                    deal_response = await self.deal_service.create_deal(deal_create, deal_id=deal_id)
 
-        except Exception as e:
-            # ── Compensation: undo MongoDB write if MySQL failed ──
-            if deal_response is not None:
+                logger.info(f"Saga Step 1 complete: deal {deal_id} created in MongoDB")
+
+                # ── Step 2: Create deposit transaction in MySQL (ACID) ──
+                # Uses raw aiomysql to avoid greenlet context conflict with Motor.
+                # Idempotent, so no lease write here: completion is fenced instead
+                lease.ensure_held()
+                with saga_step("deal_deposit", "create_deposit"):
+                    tx_result = await self._create_deposit_mysql(deal_id=str(deal_id), **deposit)
+
+                logger.info(
+                    f"Saga Step 2 complete: transaction {tx_result['id']} created in MySQL "
+                    f"for deal {deal_id}"
+                )
+                await self._log_state(lease, SagaState.completed)
+                await invalidate(DASHBOARD_TRANSACTIONS_KEY)
+
+                return {
+                    "deal": deal_response,
+                    "transaction": tx_result,
+                    "message": "Deal and deposit created successfully (cross-database saga)"
+                }
+
+            except SagaClaimLost as e:
+                # The recovery worker owns the saga now and settles it
+                logger.error(f"Saga for deal {deal_id} was taken over by recovery; stopping")
+                raise SagaInDoubt(
+                    "The saga was taken over by the recovery worker", saga_id, deal_id
+                ) from e
+
+            except Exception as e:
+                if deal_response is None and isinstance(e, ValueError):
+                    # Step 1 rejected the deal; nothing was written
+                    logger.error(f"Saga failed at Step 1: {str(e)}")
+                    await self._log_state(lease, SagaState.aborted, str(e))
+                    raise e
+
+                # ── Compensation: undo MongoDB write if MySQL failed ──
+                await self._log_state(lease, SagaState.compensating, str(e))
                 try:
-                    await self._compensate_deal(str(deal_response.id))
+                    await lease.check()
+                    with saga_step("deal_deposit", "compensate_deal"):
+                        await self._compensate(str(deal_id), datetime.utcnow() - DEPOSIT_LOOKBACK)
+                    await self._log_state(lease, SagaState.compensated)
                     logger.error(
-                        f"Saga failed at Step 2 for deal {deal_response.id}: {str(e)}. "
+                        f"Saga failed for deal {deal_id}: {str(e)}. "
                         f"Compensation executed — MongoDB deal deleted."
                     )
                 except Exception as comp_err:
-                    logger.critical(
-                        f"SAGA COMPENSATION FAILED for deal {deal_response.id}: {comp_err}. "
-                        f"ORPHANED DEAL in MongoDB requires manual cleanup!"
+                    if saga_id is not None:
+                        logger.critical(
+                            f"SAGA COMPENSATION FAILED for deal {deal_id}: {comp_err}. "
+                            f"Saga {saga_id} is left to the recovery worker."
+                        )
+                        message = f"Saga failed ({e}) and is left to the recovery worker"
+                    else:
+                        logger.critical(
+                            f"SAGA COMPENSATION FAILED for deal {deal_id}: {comp_err}. "
+                            f"ORPHANED DEAL in MongoDB requires manual cleanup!"
+                        )
+                        message = f"Saga failed ({e}); the deal needs manual cleanup"
+                    raise SagaInDoubt(message, saga_id, deal_id) from e
+
+                raise e
+
+    async def recover(self, saga: dict, lease: SagaLease) -> SagaState:
+        """
+        Settle an open saga from the log; returns its final state. Each
+        action is fenced by ``lease`` (SagaClaimLost once another worker
+        holds the saga).
+        """
+        deal_id = str(saga["deal_id"])
+        since = saga["started_at"] - DEPOSIT_LOOKBACK
+        if saga["state"] == SagaState.compensating.value:
+            await lease.check()
+            await self._compensate(deal_id, since)
+            return SagaState.compensated
+
+        deal_exists = await get_database().deals.count_documents({"_id": saga["deal_id"]}, limit=1)
+        deposit_id = await self._find_deposit(deal_id, since)
+        if deal_exists and deposit_id is not None:
+            return SagaState.completed
+        if not deal_exists:
+            if deposit_id is None:
+                return SagaState.aborted
+            await lease.check()
+            await self._compensate(deal_id, since)
+            return SagaState.compensated
+
+        # Died between the steps: resume step 2 (a no-op if it raced in)
+        await lease.check()
+        try:
+            with saga_step("deal_deposit", "resume_deposit"):
+                await self._create_deposit_mysql(deal_id=deal_id, **saga["deposit"])
+            await invalidate(DASHBOARD_TRANSACTIONS_KEY)
+            return SagaState.completed
+        except ValueError as e:
+            logger.error(f"Resumed deposit for deal {deal_id} rejected: {e}; compensating")
+            await lease.check()
+            await self._compensate(deal_id, since)
+            return SagaState.compensated
+
+    async def _compensate(self, deal_id: str, since: datetime):
+        """Undo both steps; each part is a no-op when its step did not take effect"""
+        await self._reverse_deposit(deal_id, since)
+        await self._compensate_deal(deal_id)
+
+    async def _find_deposit(self, deal_id: str, since: datetime) -> Optional[int]:
+        async with acquire_raw_connection() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(
+                    "SELECT id FROM transactions "
+                    "WHERE deal_id = %s AND transaction_type = 'deposit' AND created_at >= %s",
+                    (deal_id, since)
+                )
+                row = await cur.fetchone()
+            await conn.commit()  # end the read snapshot before returning the connection
+        return row[0] if row else None
+
+    async def _reverse_deposit(self, deal_id: str, since: datetime):
+        """
+        Compensation action: mark the deal's completed deposit reversed and
+        take its amount back out of the trust account, in one transaction.
+        """
+        async with acquire_raw_connection() as conn:
+            try:
+                async with conn.cursor() as cur:
+                    await cur.execute(
+                        "SELECT id, amount, to_account, created_at FROM transactions "
+                        "WHERE deal_id = %s AND transaction_type = 'deposit' "
+                        "AND status = 'completed' AND created_at >= %s FOR UPDATE",
+                        (deal_id, since)
                     )
-            else:
-                logger.error(f"Saga failed at Step 1: {str(e)}")
+                    deposits = await cur.fetchall()
+                    audits = []
+                    for txn_id, amount, to_account, created_at in deposits:
+                        await cur.execute(
+                            "UPDATE trust_accounts SET balance = balance - %s WHERE account_number = %s",
+                            (amount, to_account)
+                        )
+                        await cur.execute(
+                            "UPDATE transactions SET status = 'reversed' WHERE id = %s AND created_at = %s",
+                            (txn_id, created_at)
+                        )
+                        audits.append(audit_entry(
+                            action="reverse",
+                            entity_type="transaction",
+                            entity_id=str(txn_id),
+                            old_value={"status": "completed"},
+                            new_value={"status": "reversed", "deal_id": deal_id,
+                                       "amount": float(amount), "to_account": to_account}
+                        ))
+                    # The saga's money movements always commit their audit rows
+                    for audit in audits:
+                        await cur.execute(
+                            "INSERT INTO audit_logs "
+                            "(action, entity_type, entity_id, old_value, new_value, created_at) "
+                            "VALUES (%s, %s, %s, %s, %s, %s)",
+                            (audit["action"], audit["entity_type"], audit["entity_id"],
+                             json.dumps(audit["old_value"]), json.dumps(audit["new_value"]),
+                             audit["created_at"])
+                        )
+                    await conn.commit()
+            except Exception:
+                await conn.rollback()
+                raise
 
-            raise e
+        if audits:
+            await invalidate(DASHBOARD_TRANSACTIONS_KEY)
+            logger.warning(f"Saga compensation: reversed deposit for deal {deal_id}")
 
     async def _create_deposit_mysql(
         self, deal_id: str, amount: float, to_account: str, description: str
     ) -> dict:
         """
         Create a deposit transaction in MySQL with ACID compliance.
-        Uses raw aiomysql to avoid SQLAlchemy greenlet conflicts.
+        Uses a pooled raw aiomysql connection to avoid SQLAlchemy greenlet conflicts.
+
+        Idempotent per deal: the row carries ``deposit_key(deal_id)`` and the
+        deal's creation time as created_at, so a second deposit for the deal
+        (a resumed saga racing the original) hits the unique key, rolls back
+        and returns the deposit already recorded.
 
         Atomically:
-        1. INSERT transaction record
+        1. INSERT transaction record (and bump the transaction_stats counters)
         2. UPDATE trust account balance (with SELECT ... FOR UPDATE row lock)
-        3. INSERT audit log entry
+        3. INSERT audit log entry (always durable, never buffered)
         All in a single MySQL transaction — commits together or rolls back entirely.
         """
-        settings = get_settings()
-        conn = await aiomysql.connect(
-            host=settings.mysql_host,
-            port=settings.mysql_port,
-            user=settings.mysql_user,
-            password=settings.mysql_password,
-            db=settings.mysql_database,
-            autocommit=False
-        )
+        async with acquire_raw_connection() as conn:
+            try:
+                async with conn.cursor() as cur:
+                    # 1. Insert transaction record
+                    created_at = deposit_created_at(deal_id)
+                    try:
+                        await cur.execute(
+                            "INSERT INTO transactions "
+                            "(deal_id, amount, transaction_type, status, to_account, description, "
+                            "idempotency_key, created_at) "
+                            "VALUES (%s, %s, %s, %s, %s, %s, %s, %s)",
+                            (deal_id, amount, 'deposit', 'completed', to_account,
+                             description, deposit_key(deal_id), created_at)
+                        )
+                    except IntegrityError as e:
+                        if e.args[0] != DUP_ENTRY:
+                            raise
+                        await conn.rollback()
+                        logger.warning(f"Deposit for deal {deal_id} already recorded; not repeated")
+                        return await self._recorded_deposit(cur, deal_id)
+                    txn_id = cur.lastrowid
+                    await cur.execute(
+                        TRANSACTION_STATS_UPSERT_SQL, ('deposit', created_at, amount)
+                    )
 
-        try:
-            async with conn.cursor() as cur:
-                # 1. Insert transaction record
-                await cur.execute(
-                    "INSERT INTO transactions "
-                    "(deal_id, amount, transaction_type, status, to_account, description, created_at) "
-                    "VALUES (%s, %s, %s, %s, %s, %s, %s)",
-                    (deal_id, amount, 'deposit', 'completed', to_account,
-                     description, datetime.utcnow())
-                )
-                txn_id = cur.lastrowid
+                    # 2. Update trust account balance with row-level lock
+                    await cur.execute(
+                        "SELECT id, balance FROM trust_accounts "
+                        "WHERE account_number = %s FOR UPDATE",
+                        (to_account,)
+                    )
+                    row = await cur.fetchone()
+                    if not row:
+                        raise ValueError(
+                            f"Trust account '{to_account}' not found. "
+                            f"Please select a valid trust account."
+                        )
+                    old_balance = float(row[1])
+                    new_balance = old_balance + amount
+                    await cur.execute(
+                        "UPDATE trust_accounts SET balance = %s WHERE id = %s",
+                        (new_balance, row[0])
+                    )
+                    logger.info(
+                        f"Trust account {to_account} balance: "
+                        f"{old_balance} -> {new_balance}"
+                    )
 
-                # 2. Update trust account balance with row-level lock
-                await cur.execute(
-                    "SELECT id, balance FROM trust_accounts "
-                    "WHERE account_number = %s FOR UPDATE",
-                    (to_account,)
-                )
-                row = await cur.fetchone()
-                if not row:
-                    raise ValueError(
-                        f"Trust account '{to_account}' not found. "
-                        f"Please select a valid trust account."
+                    # 3. Audit log: in this transaction, whatever audit_durable says
+                    audit = audit_entry(
+                        action="create",
+                        entity_type="transaction",
+                        entity_id=str(txn_id),
+                        new_value={
+                            "deal_id": deal_id,
+                            "amount": amount,
+                            "type": "deposit",
+                            "to_account": to_account
+                        }
                     )
-                old_balance = float(row[1])
-                new_balance = old_balance + amount
-                await cur.execute(
-                    "UPDATE trust_accounts SET balance = %s WHERE id = %s",
-                    (new_balance, row[0])
-                )
-                logger.info(
-                    f"Trust account {to_account} balance: "
-                    f"{old_balance} -> {new_balance}"
-                )
+                    await cur.execute(
+                        "INSERT INTO audit_logs "
+                        "(action, entity_type, entity_id, new_value, created_at) "
+                        "VALUES (%s, %s, %s, %s, %s)",
+                        (audit["action"], audit["entity_type"], audit["entity_id"],
+                         json.dumps(audit["new_value"]), audit["created_at"])
+                    )
+
+                    # COMMIT: all operations succeed atomically
+                    await conn.commit()
 
-                # 3. Insert audit log
-                audit_value = json.dumps({
+                return {
+                    "id": txn_id,
                     "deal_id": deal_id,
                     "amount": amount,
-                    "type": "deposit",
-                    "to_account": to_account
-                })
-                await cur.execute(
-                    "INSERT INTO audit_logs "
-                    "(action, entity_type, entity_id, new_value, created_at) "
-                    "VALUES (%s, %s, %s, %s, %s)",
-                    ('create', 'transaction', str(txn_id), audit_value,
-                     datetime.utcnow())
-                )
+                    "transaction_type": "deposit",
+                    "status": "completed",
+                    "to_account": to_account,
+                    "from_account": None,
+                    "description": description,
+                    "created_at": created_at.isoformat()
+                }
 
-                # COMMIT: all 3 operations succeed atomically
-                await conn.commit()
-
-            return {
-                "id": txn_id,
-                "deal_id": deal_id,
-                "amount": amount,
-                "transaction_type": "deposit",
-                "status": "completed",
-                "to_account": to_account,
-                "from_account": None,
-                "description": description,
-                "created_at": datetime.utcnow().isoformat()
-            }
-
-        except Exception:
-            # ROLLBACK: undo all MySQL changes
-            await conn.rollback()
-            raise
+            except Exception:
+                # ROLLBACK: undo all MySQL changes
+                await conn.rollback()
+                raise
 
-        finally:
-            conn.close()
+    async def _recorded_deposit(self, cur, deal_id: str) -> dict:
+        """The deal's saga deposit, found by its idempotency key"""
+        await cur.execute(
+            "SELECT id, amount, status, to_account, description, created_at FROM transactions "
+            "WHERE idempotency_key = %s AND created_at = %s",
+            (deposit_key(deal_id), deposit_created_at(deal_id))
+        )
+        txn_id, amount, status, to_account, description, created_at = await cur.fetchone()
+        return {
+            "id": txn_id,
+            "deal_id": deal_id,
+            "amount": float(amount),
+            "transaction_type": "deposit",
+            "status": status,
+            "to_account": to_account,
+            "from_account": None,
+            "description": description,
+            "created_at": created_at.isoformat()
+        }
 
     async def _compensate_deal(self, deal_id: str):
         """
@@ -210,9 +598,52 @@ class DealDepositSaga:
         Uses direct delete (bypasses DealService.delete_deal which only allows draft deletion).
         """
         db = get_database()
-        result = await db.deals.delete_one({"_id": ObjectId(deal_id)})
+        deleted = await db.deals.find_one_and_delete({"_id": ObjectId(deal_id)})
 
-        if result.deleted_count > 0:
+        if deleted:
+            await StatsService().record_deal_change(deleted, None)
+            await invalidate(deal_key(deal_id), *DASHBOARD_KEYS)
             logger.warning(f"Saga compensation: deleted deal {deal_id} from MongoDB")
         else:
-            logger.error(f"Saga compensation: failed to delete deal {deal_id} — not found")
+            logger.info(f"Saga compensation: deal {deal_id} not found, nothing to delete")
+
+
+async def recover_open_sagas() -> int:
+    """Settle every open saga whose lease has expired; returns how many were settled"""
+    saga_log = SagaLog()
+    coordinator = DealDepositSaga()
+    settled = 0
+    while (saga := await saga_log.claim()) is not None:
+        async with SagaLease(saga_log, saga["_id"], saga["owner"]) as lease:
+            try:
+                state = await coordinator.recover(saga, lease)
+            except SagaClaimLost as e:
+                logger.warning(f"Saga recovery stopped: {e}")
+                continue
+            except Exception as e:
+                if saga["attempts"] >= settings.saga_recovery_max_attempts:
+                    if await lease.set_state(SagaState.failed, str(e)):
+                        logger.critical(
+                            f"SAGA RECOVERY GAVE UP on saga {saga['_id']} (deal {saga['deal_id']}) "
+                            f"after {saga['attempts']} attempts: {e}. Manual cleanup required!"
+                        )
+                else:
+                    # Retried once the renewed lease expires
+                    logger.warning(f"Saga recovery attempt {saga['attempts']} for saga {saga['_id']} failed: {e}")
+                continue
+            if await lease.set_state(state):
+                logger.warning(f"Recovered saga {saga['_id']} (deal {saga['deal_id']}): {state.value}")
+                settled += 1
+    return settled
+
+
+async def run_saga_recovery():
+    """Background job: settle sagas left open by a crash or a failed compensation"""
+    while True:
+        try:
+            await recover_open_sagas()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Saga recovery failed: {e}")
+        await asyncio.sleep(settings.saga_recovery_interval_seconds)
@@ -0,0 +1,192 @@
+"""
+Participant Snapshot Refresher
+
+Deals copy their participants' contact details into
+``participants_snapshot`` at creation. When a user changes their email,
+profile or role-specific details, UserService queues the user here and a
+background task patches the snapshots of that user's open deals
+(statuses in ACTIVE_DEAL_STATUSES); completed, cancelled and expired
+deals keep the details they were closed with.
+
+Per user: the current user document is read once, the open deals that
+reference it in any role are found through the ``participant_refs.$**``
+wildcard index, and the snapshot entries are rewritten with unordered
+``bulk_write`` batches of ``snapshot_refresh_batch_size`` updates. Each
+update only matches while the stored entry differs and the deal is still
+open, so re-running a refresh writes nothing. Batches are paced to
+``snapshot_refresh_max_writes_per_second`` so an agent on thousands of
+deals does not saturate MongoDB.
+
+Repeated updates of a queued user coalesce into one refresh, which reads
+the user as it is when the refresh runs. Without a running refresher
+(scripts that skip the lifespan) the refresh runs inline. Users still
+queued at shutdown are logged; their deals can be refreshed with
+``refresh_user`` later.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import UpdateOne
+
+from app.core.config import get_settings
+from app.database.cache import invalidate, deal_key
+from app.database.mongodb import get_database
+from app.services.deal_service import DealService, ACTIVE_DEAL_STATUSES
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+PARTICIPANT_ROLES = (
+    "buyer", "seller", "buyer_agent", "seller_agent", "buyer_lawyer", "seller_lawyer"
+)
+
+
+class SnapshotRefresher:
+    def __init__(self):
+        self.batch_size = settings.snapshot_refresh_batch_size
+        self.max_writes_per_second = settings.snapshot_refresh_max_writes_per_second
+        # Insertion-ordered set of user ids waiting for a refresh
+        self.pending: Dict[str, None] = {}
+        self.task: Optional[asyncio.Task] = None
+        self.wakeup: Optional[asyncio.Event] = None
+        # Metrics
+        self.refreshes = 0
+        self.deals_matched = 0
+        self.deals_updated = 0
+        self.batches = 0
+        self.throttled_seconds = 0.0
+        self.failures = 0
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def start(self):
+        self.wakeup = asyncio.Event()
+        self.task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if not self.running:
+            return
+        self.task.cancel()
+        try:
+            await self.task
+        except asyncio.CancelledError:
+            pass
+        self.task = None
+        if self.pending:
+            logger.warning(f"Snapshot refresh not run for users: {', '.join(self.pending)}")
+
+    async def submit(self, user_id: str):
+        """Queue a refresh of the user's open deals (inline without a running refresher)"""
+        if not self.running:
+            await self.refresh_user(user_id)
+            return
+        self.pending[user_id] = None
+        self.wakeup.set()
+
+    async def _run(self):
+        while True:
+            if not self.pending:
+                self.wakeup.clear()
+                await self.wakeup.wait()
+            user_id = next(iter(self.pending))
+            del self.pending[user_id]
+            try:
+                await self.refresh_user(user_id)
+            except asyncio.CancelledError:
+                self.pending[user_id] = None  # reported as not run by stop()
+                raise
+            except Exception as e:
+                self.failures += 1
+                logger.error(f"Snapshot refresh for user {user_id} failed: {e}")
+
+    async def refresh_user(self, user_id: str) -> int:
+        """Patch the participants_snapshot entries of the user's open deals; returns deals updated"""
+        db = get_database()
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, DealService.SNAPSHOT_PROJECTION)
+        if user is None:
+            return 0
+        entry = DealService._snapshot_entry(user)
+
+        cursor = db.deals.find(
+            {
+                "status": {"$in": ACTIVE_DEAL_STATUSES},
+                "$or": [{f"participant_refs.{role}": user_id} for role in PARTICIPANT_ROLES],
+            },
+            {"participant_refs": 1},
+            batch_size=self.batch_size,
+        )
+        updated = 0
+        batch: List[UpdateOne] = []
+        batch_ids: List[str] = []
+        async for deal in cursor:
+            roles = [role for role, ref in deal["participant_refs"].items() if ref == user_id]
+            now = datetime.utcnow()
+            batch.append(UpdateOne(
+                {
+                    "_id": deal["_id"],
+                    "status": {"$in": ACTIVE_DEAL_STATUSES},
+                    "$or": [{f"participants_snapshot.{role}": {"$ne": entry}} for role in roles],
+                },
+                {"$set": {
+                    **{f"participants_snapshot.{role}": entry for role in roles},
+                    "snapshot_timestamp": now,
+                    "updated_at": now,
+                }},
+            ))
+            batch_ids.append(str(deal["_id"]))
+            if len(batch) >= self.batch_size:
+                updated += await self._write(db, batch, batch_ids)
+                batch, batch_ids = [], []
+        if batch:
+            updated += await self._write(db, batch, batch_ids)
+
+        self.refreshes += 1
+        if updated:
+            logger.info(f"Refreshed user {user_id} in {updated} open deal snapshots")
+        return updated
+
+    async def _write(self, db, batch: List[UpdateOne], deal_ids: List[str]) -> int:
+        start = time.monotonic()
+        result = await db.deals.bulk_write(batch, ordered=False)
+        await invalidate(*(deal_key(deal_id) for deal_id in deal_ids))
+        self.batches += 1
+        self.deals_matched += len(batch)
+        self.deals_updated += result.modified_count
+
+        # Pace batches so the sustained rate stays under the limit
+        if self.max_writes_per_second > 0:
+            delay = len(batch) / self.max_writes_per_second - (time.monotonic() - start)
+            if delay > 0:
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+        return result.modified_count
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued_users": len(self.pending),
+            "refreshes": self.refreshes,
+            "deals_matched": self.deals_matched,
+            "deals_updated": self.deals_updated,
+            "batches": self.batches,
+            "throttled_seconds": round(self.throttled_seconds, 3),
+            "failures": self.failures,
+        }
+
+
+snapshot_refresher = SnapshotRefresher()
+
+
+def start_snapshot_refresher():
+    snapshot_refresher.start()
+
+
+async def stop_snapshot_refresher():
+    await snapshot_refresher.stop()
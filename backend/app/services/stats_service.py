@@ -0,0 +1,308 @@
+"""
+Materialized Dashboard Statistics
+
+Running counters that the services update on every write, so the
+dashboard reads O(1) documents/rows instead of re-aggregating whole
+collections on each page load.
+
+MongoDB ``stats`` collection:
+  {_id: "properties", total, by_type.<type>, by_status.<status>,
+   price_sum, price_min, price_max}
+  {_id: "deals", total, by_status.<status>, offer_sum,
+   pending_conditions, completed_by_month.<YYYY-MM>}
+
+MySQL ``transaction_stats`` table: one row per (transaction_type, month)
+with the transaction count and amount sum, upserted in the same MySQL
+transaction as the transaction itself.
+
+Counters are updated from the before/after documents of each write: the
+delta is contribution(after) - contribution(before). ``price_min`` and
+``price_max`` only widen on writes; a periodic reconciliation job
+recomputes everything from the source collections and tables.
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional, Dict, Any, List
+
+from sqlalchemy import text, func
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database.mongodb import get_database
+from app.database.mysql import async_session_factory
+from app.database.cache import invalidate, DASHBOARD_KEYS
+from app.models.transaction import TransactionStat, TransactionTypeEnum
+from app.core.config import get_settings
+
+logger = logging.getLogger(__name__)
+
+PROPERTY_STATS_ID = "properties"
+DEAL_STATS_ID = "deals"
+
+
+def _completion_month(deal: dict) -> Optional[str]:
+    """YYYY-MM in which a completed deal moved to completed, else None"""
+    if deal.get("status") != "completed":
+        return None
+    completed = [
+        h["timestamp"] for h in deal.get("status_history", [])
+        if h.get("status") == "completed"
+    ]
+    return completed[-1].strftime("%Y-%m") if completed else None
+
+
+def _property_contribution(doc: Optional[dict]) -> Dict[str, float]:
+    if not doc:
+        return {}
+    return {
+        "total": 1,
+        f"by_type.{doc.get('type')}": 1,
+        f"by_status.{doc.get('status')}": 1,
+        "price_sum": doc.get("listing_price", 0) or 0,
+    }
+
+
+def _deal_contribution(doc: Optional[dict]) -> Dict[str, float]:
+    if not doc:
+        return {}
+    contribution = {
+        "total": 1,
+        f"by_status.{doc.get('status')}": 1,
+        "offer_sum": doc.get("offer_price", 0) or 0,
+        "pending_conditions": sum(
+            1 for c in doc.get("conditions", []) if c.get("status") == "pending"
+        ),
+    }
+    month = _completion_month(doc)
+    if month:
+        contribution[f"completed_by_month.{month}"] = 1
+    return contribution
+
+
+def _sum_contributions(docs: List[dict], contribution) -> Dict[str, float]:
+    total: Dict[str, float] = {}
+    for doc in docs:
+        for key, value in contribution(doc).items():
+            total[key] = total.get(key, 0) + value
+    return {k: v for k, v in total.items() if v != 0}
+
+
+def _delta(before: Dict[str, float], after: Dict[str, float]) -> Dict[str, float]:
+    keys = set(before) | set(after)
+    delta = {k: after.get(k, 0) - before.get(k, 0) for k in keys}
+    return {k: v for k, v in delta.items() if v != 0}
+
+
+class StatsService:
+    def __init__(self):
+        self.db = get_database()
+        self.stats = self.db.stats
+
+    async def _increment(self, stats_id: str, inc: Dict[str, float], extra: dict = None):
+        update = dict(extra or {})
+        if inc:
+            update["$inc"] = inc
+        if update:
+            await self.stats.update_one({"_id": stats_id}, update, upsert=True)
+
+    async def record_property_change(self, before: Optional[dict], after: Optional[dict]):
+        """Apply a property create (before=None), update or delete (after=None)"""
+        inc = _delta(_property_contribution(before), _property_contribution(after))
+        extra = {}
+        if after and after.get("listing_price") is not None:
+            extra = {
+                "$min": {"price_min": after["listing_price"]},
+                "$max": {"price_max": after["listing_price"]},
+            }
+        await self._increment(PROPERTY_STATS_ID, inc, extra)
+
+    async def record_deal_change(self, before: Optional[dict], after: Optional[dict]):
+        """Apply a deal create (before=None), update or delete (after=None)"""
+        inc = _delta(_deal_contribution(before), _deal_contribution(after))
+        await self._increment(DEAL_STATS_ID, inc)
+
+    async def record_property_inserts(self, docs: List[dict]):
+        """Apply many property creates with a single counter update"""
+        prices = [d["listing_price"] for d in docs if d.get("listing_price") is not None]
+        extra = {}
+        if prices:
+            extra = {"$min": {"price_min": min(prices)}, "$max": {"price_max": max(prices)}}
+        await self._increment(
+            PROPERTY_STATS_ID, _sum_contributions(docs, _property_contribution), extra
+        )
+
+    async def record_deal_inserts(self, docs: List[dict]):
+        """Apply many deal creates with a single counter update"""
+        await self._increment(DEAL_STATS_ID, _sum_contributions(docs, _deal_contribution))
+
+    async def record_pending_conditions(self, change: int):
+        """Adjust the pending-condition counter without the full deal documents"""
+        if change:
+            await self._increment(DEAL_STATS_ID, {"pending_conditions": change})
+
+    async def get_property_stats(self) -> dict:
+        return await self.stats.find_one({"_id": PROPERTY_STATS_ID}) or {}
+
+    async def get_deal_stats(self) -> dict:
+        return await self.stats.find_one({"_id": DEAL_STATS_ID}) or {}
+
+    async def get_all(self) -> Dict[str, dict]:
+        """Both stats documents in one round trip, keyed by _id"""
+        docs = {}
+        async for doc in self.stats.find({"_id": {"$in": [PROPERTY_STATS_ID, DEAL_STATS_ID]}}):
+            docs[doc["_id"]] = doc
+        return docs
+
+    async def reconcile(self):
+        """Recompute both stats documents from the source collections"""
+        properties = await self._facet(self.db.properties, {
+            "by_type": [{"$group": {"_id": "$type", "count": {"$sum": 1}}}],
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "price": [{"$group": {
+                "_id": None,
+                "sum": {"$sum": "$listing_price"},
+                "min": {"$min": "$listing_price"},
+                "max": {"$max": "$listing_price"}
+            }}],
+        })
+        deals = await self._facet(self.db.deals, {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "offer": [{"$group": {"_id": None, "sum": {"$sum": "$offer_price"}}}],
+            "pending": [
+                {"$project": {"pending": {"$size": {"$filter": {
+                    "input": {"$ifNull": ["$conditions", []]},
+                    "cond": {"$eq": ["$$this.status", "pending"]}
+                }}}}},
+                {"$group": {"_id": None, "total": {"$sum": "$pending"}}}
+            ],
+            "completed_by_month": [
+                {"$match": {"status": "completed"}},
+                {"$project": {"completed_at": {"$last": {"$filter": {
+                    "input": "$status_history",
+                    "cond": {"$eq": ["$$this.status", "completed"]}
+                }}}}},
+                {"$match": {"completed_at": {"$ne": None}}},
+                {"$group": {
+                    "_id": {"$dateToString": {
+                        "format": "%Y-%m", "date": "$completed_at.timestamp"
+                    }},
+                    "count": {"$sum": 1}
+                }}
+            ],
+        })
+
+        by_type = _counts(properties["by_type"])
+        price = properties["price"][0] if properties["price"] else {}
+        property_stats = {
+            "total": sum(by_type.values()),
+            "by_type": by_type,
+            "by_status": _counts(properties["by_status"]),
+            "price_sum": price.get("sum", 0) or 0,
+            "reconciled_at": datetime.utcnow(),
+        }
+        # Leave min/max unset when empty: a null would win every later $min
+        if price.get("min") is not None:
+            property_stats["price_min"] = price["min"]
+            property_stats["price_max"] = price["max"]
+        await self.stats.replace_one({"_id": PROPERTY_STATS_ID}, property_stats, upsert=True)
+
+        by_status = _counts(deals["by_status"])
+        await self.stats.replace_one({"_id": DEAL_STATS_ID}, {
+            "total": sum(by_status.values()),
+            "by_status": by_status,
+            "offer_sum": deals["offer"][0].get("sum", 0) if deals["offer"] else 0,
+            "pending_conditions": deals["pending"][0].get("total", 0) if deals["pending"] else 0,
+            "completed_by_month": _counts(deals["completed_by_month"]),
+            "reconciled_at": datetime.utcnow(),
+        }, upsert=True)
+
+    @staticmethod
+    async def _facet(collection, facets: Dict[str, list]) -> Dict[str, Any]:
+        """Run several sub-pipelines over a collection in one $facet round trip"""
+        result = await collection.aggregate([{"$facet": facets}]).to_list(length=1)
+        return result[0] if result else {name: [] for name in facets}
+
+
+def _counts(buckets: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Turn [{"_id": key, "count": n}, ...] facet output into {key: n}"""
+    return {doc["_id"]: doc["count"] for doc in buckets if doc["_id"] is not None}
+
+
+async def record_transaction_stats(
+    session: AsyncSession, transaction_type: TransactionTypeEnum, amount,
+    created_at: datetime, count: int = 1
+):
+    """
+    Upsert the (type, month of ``created_at``) counter row by ``count``
+    transactions totalling ``amount``. Bucketed by the rows' created_at,
+    like the saga path and the reconcile, not the server clock. Pass the
+    stored whole-second value: the column rounds microseconds, so a row
+    at 23:59:59.6 on a month's last day is stored in the next month. Runs
+    inside the caller's session so it commits atomically with the
+    transactions themselves.
+    """
+    stmt = insert(TransactionStat).values(
+        transaction_type=transaction_type,
+        month=func.date_format(created_at, "%Y-%m"),
+        tx_count=count,
+        amount_sum=amount
+    )
+    stmt = stmt.on_duplicate_key_update(
+        tx_count=TransactionStat.tx_count + stmt.inserted.tx_count,
+        amount_sum=TransactionStat.amount_sum + stmt.inserted.amount_sum
+    )
+    await session.execute(stmt)
+
+
+# Raw SQL equivalent for callers on the aiomysql connection (DealDepositSaga)
+TRANSACTION_STATS_UPSERT_SQL = (
+    "INSERT INTO transaction_stats (transaction_type, month, tx_count, amount_sum) "
+    "VALUES (%s, DATE_FORMAT(%s, '%%Y-%%m'), 1, %s) "
+    "ON DUPLICATE KEY UPDATE tx_count = tx_count + 1, "
+    "amount_sum = amount_sum + VALUES(amount_sum)"
+)
+
+
+async def reconcile_transaction_stats(session: AsyncSession):
+    """
+    Rebuild transaction_stats from the transactions table in one MySQL
+    transaction. Only months still held in ``transactions`` are rebuilt:
+    archived (dropped) partitions keep the counters they had.
+    """
+    oldest = (await session.execute(text("SELECT MIN(created_at) FROM transactions"))).scalar()
+    if oldest is None:
+        return
+    since = datetime(oldest.year, oldest.month, 1)
+    await session.execute(
+        text("DELETE FROM transaction_stats WHERE month >= :month"),
+        {"month": since.strftime("%Y-%m")}
+    )
+    await session.execute(
+        text(
+            "INSERT INTO transaction_stats (transaction_type, month, tx_count, amount_sum) "
+            "SELECT transaction_type, DATE_FORMAT(created_at, '%Y-%m'), COUNT(*), SUM(amount) "
+            "FROM transactions WHERE created_at >= :since "
+            "GROUP BY transaction_type, DATE_FORMAT(created_at, '%Y-%m')"
+        ),
+        {"since": since}
+    )
+    await session.commit()
+
+
+async def run_stats_reconciliation():
+    """Background job: reconcile all materialized stats now and then periodically"""
+    interval = get_settings().stats_reconcile_interval_seconds
+    while True:
+        try:
+            await StatsService().reconcile()
+            async with async_session_factory() as session:
+                await reconcile_transaction_stats(session)
+            await invalidate(*DASHBOARD_KEYS)
+            logger.info("Dashboard statistics reconciled")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Stats reconciliation failed: {e}")
+        await asyncio.sleep(interval)
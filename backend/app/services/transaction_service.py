@@ -1,10 +1,17 @@
+from collections import defaultdict
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, Any, Dict, Tuple, Collection
 from decimal import Decimal
-from sqlalchemy import select, func
+from sqlalchemy import select, insert
 from sqlalchemy.ext.asyncio import AsyncSession
 import logging
 
+from app.utils.pagination import encode_cursor, sql_keyset_condition, sql_created_range, count_rows
+from app.utils.bulk import validate_rows, chunked, bulk_result
+from app.core.config import get_settings
+from app.services.stats_service import record_transaction_stats
+from app.services.audit_writer import audit_writer, audit_entry
+from app.database.cache import invalidate, DASHBOARD_STATS_KEY, DASHBOARD_TRANSACTIONS_KEY
 from app.models.transaction import (
     Transaction, TrustAccount, AuditLog,
     TransactionTypeEnum, TransactionStatusEnum, AccountStatusEnum
@@ -14,8 +21,13 @@ from app.schemas.transaction import (
     TrustAccountCreate, TrustAccountUpdate, TrustAccountResponse,
     AuditLogResponse
 )
+from app.schemas.bulk import BulkResult, BulkRowCreated, BulkRowError
 
 logger = logging.getLogger(__name__)
+settings = get_settings()
+
+# Audit rows of these types commit with the transaction, never buffered
+DURABLE_AUDIT_TYPES = {TransactionTypeEnum.payment}
 
 
 class TransactionService:
@@ -25,7 +37,11 @@ class TransactionService:
     async def create_transaction(
         self, transaction_data: TransactionCreate
     ) -> TransactionResponse:
-        """Create a new financial transaction"""
+        """
+        Create a new financial transaction (committed once, with its audit row).
+        Records the transaction only: trust account balances are not
+        changed here, unlike the bulk import with ``update_balances``.
+        """
         transaction = Transaction(
             deal_id=transaction_data.deal_id,
             amount=Decimal(str(transaction_data.amount)),
@@ -33,15 +49,17 @@ class TransactionService:
             status=TransactionStatusEnum.completed,
             from_account=transaction_data.from_account,
             to_account=transaction_data.to_account,
-            description=transaction_data.description
+            description=transaction_data.description,
+            # Whole seconds, as stored: the stats month must match the partition
+            created_at=datetime.utcnow().replace(microsecond=0)
         )
 
         self.session.add(transaction)
-        await self.session.commit()
-        await self.session.refresh(transaction)
-
-        # Create audit log
-        await self._create_audit_log(
+        await self.session.flush()  # assigns transaction.id for the audit row
+        await record_transaction_stats(
+            self.session, transaction.transaction_type, transaction.amount, transaction.created_at
+        )
+        audit = audit_entry(
             action="create",
             entity_type="transaction",
             entity_id=str(transaction.id),
@@ -51,10 +69,168 @@ class TransactionService:
                 "type": transaction.transaction_type.value
             }
         )
+        durable = audit_writer.is_durable(transaction.transaction_type in DURABLE_AUDIT_TYPES)
+        if durable:
+            self.session.add(AuditLog(**audit))
+        await self.session.commit()
+        if not durable:
+            await audit_writer.submit(audit)
+
+        await invalidate(DASHBOARD_STATS_KEY, DASHBOARD_TRANSACTIONS_KEY)
 
         logger.info(f"Transaction {transaction.id} created for deal {transaction.deal_id}")
         return self._to_response(transaction)
 
+    async def create_transactions_bulk(
+        self, rows: List[Any], update_balances: bool = True,
+        external_accounts: Collection[str] = ()
+    ) -> BulkResult:
+        """
+        Record many transactions in a single MySQL transaction.
+
+        Valid rows are written with one multi-row INSERT per chunk of
+        ``bulk_insert_chunk_size`` for the transactions and one for their
+        durable audit rows (payments, or all in durable audit mode); the
+        other audit rows go to the audit writer after commit. The
+        transaction_stats counters get one
+        upsert per type.
+        With ``update_balances`` the net delta per trust account (credit
+        ``to_account``, debit ``from_account``) is applied with a single
+        locked UPDATE per account. A row naming an account that is not a
+        trust account is rejected as a row error unless the number is listed
+        in ``external_accounts`` (outside parties, whose balances are not
+        tracked). Invalid rows are reported per row; a balance error (frozen
+        account, insufficient funds) raises ValueError and rolls the whole
+        batch back.
+        """
+        valid, errors = validate_rows(TransactionCreate, rows)
+        if not valid:
+            return bulk_result(len(rows), [], errors)
+
+        created_at = datetime.utcnow().replace(microsecond=0)
+        created = []
+        audits = []  # queued for the audit writer once committed
+        totals: Dict[TransactionTypeEnum, List] = defaultdict(lambda: [0, Decimal("0")])
+
+        try:
+            if update_balances:
+                valid, account_errors = await self._apply_balance_deltas(valid, set(external_accounts))
+                errors = sorted(errors + account_errors, key=lambda error: error.index)
+
+            for chunk in chunked(valid, settings.bulk_insert_chunk_size):
+                values = []
+                for _, data in chunk:
+                    tx_type = TransactionTypeEnum(data.transaction_type.value)
+                    amount = Decimal(str(data.amount))
+                    totals[tx_type][0] += 1
+                    totals[tx_type][1] += amount
+                    values.append({
+                        "deal_id": data.deal_id,
+                        "amount": amount,
+                        "transaction_type": tx_type,
+                        "status": TransactionStatusEnum.completed,
+                        "from_account": data.from_account,
+                        "to_account": data.to_account,
+                        "description": data.description,
+                        "created_at": created_at,
+                    })
+
+                result = await self.session.execute(insert(Transaction).values(values))
+                # InnoDB hands a multi-row INSERT consecutive ids starting at lastrowid
+                ids = range(result.lastrowid, result.lastrowid + len(values))
+
+                durable_audits = []
+                for tx_id, value in zip(ids, values):
+                    audit = audit_entry(
+                        action="create",
+                        entity_type="transaction",
+                        entity_id=str(tx_id),
+                        new_value={
+                            "deal_id": value["deal_id"],
+                            "amount": float(value["amount"]),
+                            "type": value["transaction_type"].value
+                        }
+                    )
+                    if audit_writer.is_durable(value["transaction_type"] in DURABLE_AUDIT_TYPES):
+                        durable_audits.append(audit)
+                    else:
+                        audits.append(audit)
+                if durable_audits:
+                    await self.session.execute(insert(AuditLog).values(durable_audits))
+                created.extend(
+                    BulkRowCreated(index=index, id=str(tx_id))
+                    for (index, _), tx_id in zip(chunk, ids)
+                )
+
+            for tx_type, (count, amount) in totals.items():
+                await record_transaction_stats(self.session, tx_type, amount, created_at, count)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+        await audit_writer.submit(*audits)
+        await invalidate(DASHBOARD_STATS_KEY, DASHBOARD_TRANSACTIONS_KEY)
+        logger.info(f"Bulk transactions: {len(created)} recorded, {len(errors)} rejected")
+        return bulk_result(len(rows), created, errors)
+
+    async def _apply_balance_deltas(
+        self, valid: List[Tuple[int, TransactionCreate]], external_accounts: Collection[str]
+    ) -> Tuple[List[Tuple[int, TransactionCreate]], List[BulkRowError]]:
+        """
+        Lock the touched trust accounts (in id order) and apply each net delta
+        once. Rows naming an unknown account that is not in
+        ``external_accounts`` are returned as row errors and left out.
+        """
+        numbers = {
+            number for _, data in valid for number in (data.to_account, data.from_account)
+            if number and number not in external_accounts
+        }
+        accounts: Dict[str, TrustAccount] = {}
+        if numbers:
+            result = await self.session.execute(
+                select(TrustAccount)
+                .where(TrustAccount.account_number.in_(list(numbers)))
+                .order_by(TrustAccount.id)
+                .with_for_update()
+            )
+            accounts = {account.account_number: account for account in result.scalars()}
+
+        kept, errors = [], []
+        deltas: Dict[str, Decimal] = defaultdict(Decimal)
+        for index, data in valid:
+            unknown = [
+                number for number in (data.to_account, data.from_account)
+                if number and number not in external_accounts and number not in accounts
+            ]
+            if unknown:
+                errors.append(BulkRowError(
+                    index=index,
+                    error=f"Unknown trust account {', '.join(unknown)} "
+                          f"(list outside parties in external_accounts)"
+                ))
+                continue
+            kept.append((index, data))
+            amount = Decimal(str(data.amount))
+            if data.to_account in accounts:
+                deltas[data.to_account] += amount
+            if data.from_account in accounts:
+                deltas[data.from_account] -= amount
+
+        for number, delta in deltas.items():
+            if not delta:
+                continue
+            account = accounts[number]
+            if account.status != AccountStatusEnum.active:
+                raise ValueError(
+                    f"Cannot update balance on non-active account {account.account_number}"
+                )
+            new_balance = account.balance + delta
+            if new_balance < 0:
+                raise ValueError(f"Insufficient balance in trust account {account.account_number}")
+            account.balance = new_balance
+        return kept, errors
+
     async def get_transaction(self, transaction_id: int) -> Optional[TransactionResponse]:
         """Get transaction by ID"""
         result = await self.session.execute(
@@ -70,29 +246,53 @@ class TransactionService:
         page: int = 1,
         page_size: int = 10,
         deal_id: Optional[str] = None,
-        transaction_type: Optional[str] = None
-    ) -> tuple[List[TransactionResponse], int]:
-        """Get paginated list of transactions"""
-        query = select(Transaction)
+        transaction_type: Optional[str] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact",
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> tuple[List[TransactionResponse], Optional[int], Optional[str]]:
+        """
+        Get paginated list of transactions, newest first.
+
+        With ``cursor`` set, the page is found by seeking on ``(created_at, id)``
+        instead of OFFSET. ``total_mode`` is one of exact / estimate / none.
+        ``created_from`` / ``created_to`` bound ``created_at`` (half-open) so
+        only the matching monthly partitions are read.
+        """
+        date_range = sql_created_range(Transaction, created_from, created_to)
+        query = select(Transaction).where(*date_range)
 
         if deal_id:
             query = query.where(Transaction.deal_id == deal_id)
         if transaction_type:
             query = query.where(Transaction.transaction_type == TransactionTypeEnum(transaction_type))
 
-        # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.session.execute(count_query)
-        total = total_result.scalar()
+        total = await count_rows(
+            self.session, query, Transaction.__tablename__,
+            filtered=bool(deal_id or transaction_type or date_range), mode=total_mode
+        )
 
         # Get paginated results
-        offset = (page - 1) * page_size
-        query = query.order_by(Transaction.created_at.desc()).offset(offset).limit(page_size)
+        keyset = sql_keyset_condition(Transaction, cursor)
+        if keyset is not None:
+            query = query.where(keyset)
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.order_by(
+            Transaction.created_at.desc(), Transaction.id.desc()
+        ).limit(page_size + 1)
 
         result = await self.session.execute(query)
         transactions = result.scalars().all()
 
-        return [self._to_response(t) for t in transactions], total
+        next_cursor = None
+        if len(transactions) > page_size:
+            transactions = transactions[:page_size]
+            last = transactions[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return [self._to_response(t) for t in transactions], total, next_cursor
 
     async def get_deal_transactions(self, deal_id: str) -> List[TransactionResponse]:
         """Get all transactions for a deal"""
@@ -117,27 +317,6 @@ class TransactionService:
             created_at=transaction.created_at
         )
 
-    async def _create_audit_log(
-        self,
-        action: str,
-        entity_type: str,
-        entity_id: str = None,
-        old_value: dict = None,
-        new_value: dict = None,
-        user_id: str = None
-    ):
-        """Create an audit log entry"""
-        audit = AuditLog(
-            user_id=user_id,
-            action=action,
-            entity_type=entity_type,
-            entity_id=entity_id,
-            old_value=old_value,
-            new_value=new_value
-        )
-        self.session.add(audit)
-        await self.session.commit()
-
 
 class TrustAccountService:
     def __init__(self, session: AsyncSession):
@@ -267,29 +446,53 @@ class AuditLogService:
         page: int = 1,
         page_size: int = 50,
         entity_type: Optional[str] = None,
-        entity_id: Optional[str] = None
-    ) -> tuple[List[AuditLogResponse], int]:
-        """Get audit logs with filters"""
-        query = select(AuditLog)
+        entity_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        total_mode: str = "exact",
+        created_from: Optional[datetime] = None,
+        created_to: Optional[datetime] = None
+    ) -> tuple[List[AuditLogResponse], Optional[int], Optional[str]]:
+        """
+        Get audit logs with filters, newest first.
+
+        With ``cursor`` set, the page is found by seeking on ``(created_at, id)``
+        instead of OFFSET. ``total_mode`` is one of exact / estimate / none.
+        ``created_from`` / ``created_to`` bound ``created_at`` (half-open) so
+        only the matching monthly partitions are read.
+        """
+        date_range = sql_created_range(AuditLog, created_from, created_to)
+        query = select(AuditLog).where(*date_range)
 
         if entity_type:
             query = query.where(AuditLog.entity_type == entity_type)
         if entity_id:
             query = query.where(AuditLog.entity_id == entity_id)
 
-        # Count total
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.session.execute(count_query)
-        total = total_result.scalar()
+        total = await count_rows(
+            self.session, query, AuditLog.__tablename__,
+            filtered=bool(entity_type or entity_id or date_range), mode=total_mode
+        )
 
         # Get paginated results
-        offset = (page - 1) * page_size
-        query = query.order_by(AuditLog.created_at.desc()).offset(offset).limit(page_size)
+        keyset = sql_keyset_condition(AuditLog, cursor)
+        if keyset is not None:
+            query = query.where(keyset)
+        else:
+            query = query.offset((page - 1) * page_size)
+        query = query.order_by(
+            AuditLog.created_at.desc(), AuditLog.id.desc()
+        ).limit(page_size + 1)
 
         result = await self.session.execute(query)
         logs = result.scalars().all()
 
-        return [self._to_response(log) for log in logs], total
+        next_cursor = None
+        if len(logs) > page_size:
+            logs = logs[:page_size]
+            last = logs[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
+
+        return [self._to_response(log) for log in logs], total, next_cursor
 
     def _to_response(self, log: AuditLog) -> AuditLogResponse:
         return AuditLogResponse(
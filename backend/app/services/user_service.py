@@ -1,30 +1,44 @@
+import json
+import re
 from datetime import datetime
-from typing import Optional, List
+from typing import Optional, List, AsyncIterator
 from bson import ObjectId
-from passlib.context import CryptContext
 
 from app.database.mongodb import get_database
+from app.database.cache import cached, invalidate, user_key, DASHBOARD_STATS_KEY
+from app.utils.pagination import encode_cursor, mongo_keyset_filter, MONGO_KEYSET_SORT
+from app.utils.serialization import dump_trusted, dumps
 from app.schemas.user import UserCreate, UserUpdate, UserResponse
 from app.core.types import PyObjectId
+from app.core.config import get_settings
+from app.core.security import get_password_hash_async, verify_password_async
+from app.utils.streaming import ListView
+from app.services.snapshot_refresher import snapshot_refresher
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+settings = get_settings()
 
 
 class UserService:
+    # Fields returned by the summary view (e.g. participant dropdowns)
+    SUMMARY_PROJECTION = {"email": 1, "role": 1, "profile.name": 1}
+
     def __init__(self):
         self.db = get_database()
         self.collection = self.db.users
 
-    def _hash_password(self, password: str) -> str:
-        return pwd_context.hash(password)
+    async def _hash_password(self, password: str) -> str:
+        return await get_password_hash_async(password)
 
-    def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
-        return pwd_context.verify(plain_password, hashed_password)
+    async def _verify_password(self, plain_password: str, hashed_password: str) -> bool:
+        return await verify_password_async(plain_password, hashed_password)
 
     def _doc_to_response(self, doc: dict) -> UserResponse:
         doc["_id"] = str(doc["_id"])
         return UserResponse(**doc)
 
+    def _doc_to_trusted(self, doc: dict) -> dict:
+        return dump_trusted(UserResponse, doc)
+
     async def create_user(self, user_data: UserCreate) -> UserResponse:
         """Create a new user"""
         # Check if email already exists
@@ -34,7 +48,7 @@ class UserService:
 
         user_doc = {
             "email": user_data.email,
-            "password_hash": self._hash_password(user_data.password),
+            "password_hash": await self._hash_password(user_data.password),
             "role": user_data.role.value,
             "profile": user_data.profile.model_dump(),
             "role_specific": user_data.role_specific or {},
@@ -44,12 +58,17 @@ class UserService:
 
         result = await self.collection.insert_one(user_doc)
         user_doc["_id"] = result.inserted_id
+        await invalidate(DASHBOARD_STATS_KEY)
         return self._doc_to_response(user_doc)
 
     async def get_user(self, user_id: str) -> Optional[UserResponse]:
-        """Get user by ID"""
+        """Get user by ID (read-through cached)"""
         if not ObjectId.is_valid(user_id):
             return None
+        data = await cached(user_key(user_id), lambda: self._load_user(user_id))
+        return UserResponse(**data) if data else None
+
+    async def _load_user(self, user_id: str) -> Optional[UserResponse]:
         doc = await self.collection.find_one({"_id": ObjectId(user_id)})
         if doc:
             return self._doc_to_response(doc)
@@ -63,22 +82,39 @@ class UserService:
         self, 
         page: int = 1, 
         page_size: int = 10,
-        role: Optional[str] = None
-    ) -> tuple[List[UserResponse], int]:
-        """Get paginated list of users"""
+        role: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True,
+        trusted: bool = False
+    ) -> tuple[List[UserResponse], Optional[int], Optional[str]]:
+        """
+        Get paginated list of users.
+
+        With ``cursor`` set, the page is found by seeking on
+        ``(created_at, _id)`` instead of skipping. Returns the users,
+        the total (None if ``include_total`` is False) and the next cursor.
+        With ``trusted`` the users are plain JSON-ready dicts.
+        """
         query = {}
         if role:
             query["role"] = role
 
-        total = await self.collection.count_documents(query)
-        skip = (page - 1) * page_size
+        total = await self.collection.count_documents(query) if include_total else None
 
-        cursor = self.collection.find(query).skip(skip).limit(page_size).sort("created_at", -1)
-        users = []
-        async for doc in cursor:
-            users.append(self._doc_to_response(doc))
+        query.update(mongo_keyset_filter(cursor))
+        find = self.collection.find(query).sort(MONGO_KEYSET_SORT)
+        if not cursor:
+            find = find.skip((page - 1) * page_size)
+        docs = await find.limit(page_size + 1).to_list(length=page_size + 1)
+
+        next_cursor = None
+        if len(docs) > page_size:
+            docs = docs[:page_size]
+            next_cursor = encode_cursor(docs[-1]["created_at"], docs[-1]["_id"])
 
-        return users, total
+        convert = self._doc_to_trusted if trusted else self._doc_to_response
+        users = [convert(doc) for doc in docs]
+        return users, total, next_cursor
 
     async def update_user(self, user_id: str, user_data: UserUpdate) -> Optional[UserResponse]:
         """Update user"""
@@ -110,6 +146,9 @@ class UserService:
         )
 
         if result:
+            await invalidate(user_key(user_id))
+            # Open deals carry a copy of these details in participants_snapshot
+            await snapshot_refresher.submit(user_id)
             return self._doc_to_response(result)
         return None
 
@@ -118,12 +157,41 @@ class UserService:
         if not ObjectId.is_valid(user_id):
             return False
         result = await self.collection.delete_one({"_id": ObjectId(user_id)})
+        if result.deleted_count > 0:
+            await invalidate(user_key(user_id), DASHBOARD_STATS_KEY)
         return result.deleted_count > 0
 
-    async def get_users_by_role(self, role: str) -> List[UserResponse]:
-        """Get all users with a specific role"""
-        cursor = self.collection.find({"role": role})
-        users = []
+    async def iter_users(
+        self,
+        role: Optional[str] = None,
+        view: ListView = ListView.full,
+        search: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> AsyncIterator[str]:
+        """
+        Yield users, newest first, as serialized JSON straight from the cursor.
+        ``search`` is an anchored (index-friendly, case-sensitive) prefix
+        matched against the email or profile name.
+        """
+        query = {}
+        if role:
+            query["role"] = role
+        if search:
+            prefix = {"$regex": f"^{re.escape(search)}"}
+            query["$or"] = [{"email": prefix}, {"profile.name": prefix}]
+
+        projection = self.SUMMARY_PROJECTION if view == ListView.summary else None
+        cursor = self.collection.find(
+            query, projection, batch_size=settings.stream_batch_size
+        ).sort(MONGO_KEYSET_SORT)
+        if limit:
+            cursor = cursor.limit(limit)
+
         async for doc in cursor:
-            users.append(self._doc_to_response(doc))
-        return users
+            if view == ListView.summary:
+                doc["_id"] = str(doc["_id"])
+                yield json.dumps(doc)
+            elif settings.trusted_responses:
+                yield dumps(self._doc_to_trusted(doc)).decode()
+            else:
+                yield self._doc_to_response(doc).model_dump_json(by_alias=True)
@@ -0,0 +1,124 @@
+"""
+Bulk import helpers.
+
+Bulk endpoints accept either a JSON array or NDJSON (one JSON document per
+line, ``Content-Type: application/x-ndjson``). Rows are validated one by
+one so a bad row becomes a per-row error instead of failing the import;
+rows are referred to by their zero-based position in the body.
+"""
+
+import json
+from typing import Any, List, Tuple, Type, Iterator
+
+from fastapi import HTTPException, Request
+from pydantic import BaseModel, ValidationError
+from pymongo.errors import BulkWriteError
+
+from app.core.config import get_settings
+from app.schemas.bulk import BulkResult, BulkRowCreated, BulkRowError
+
+settings = get_settings()
+
+
+class InvalidRow:
+    """Placeholder for an NDJSON line that is not valid JSON"""
+
+    def __init__(self, error: str):
+        self.error = error
+
+
+def _parse_line(line: bytes) -> Any:
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return InvalidRow(f"Invalid JSON: {e}")
+
+
+async def read_bulk_rows(request: Request) -> List[Any]:
+    """Parse a JSON array or NDJSON request body into raw rows"""
+    body = await request.body()
+    content_type = request.headers.get("content-type", "")
+
+    if "ndjson" in content_type or "jsonl" in content_type:
+        rows = [_parse_line(line) for line in body.splitlines() if line.strip()]
+    else:
+        try:
+            rows = json.loads(body)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="Expected a JSON array or NDJSON body")
+
+    if len(rows) > settings.bulk_max_rows:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Too many rows: {len(rows)} (limit {settings.bulk_max_rows}). Split the import."
+        )
+    return rows
+
+
+def _describe(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in e['loc']) or 'row'}: {e['msg']}"
+        for e in error.errors()
+    )
+
+
+def validate_rows(
+    model_cls: Type[BaseModel], rows: List[Any]
+) -> Tuple[List[Tuple[int, BaseModel]], List[BulkRowError]]:
+    """Validate raw rows against ``model_cls``; returns (index, model) pairs and row errors"""
+    valid, errors = [], []
+    for index, row in enumerate(rows):
+        if isinstance(row, InvalidRow):
+            errors.append(BulkRowError(index=index, error=row.error))
+            continue
+        try:
+            valid.append((index, model_cls.model_validate(row)))
+        except ValidationError as e:
+            errors.append(BulkRowError(index=index, error=_describe(e)))
+    return valid, errors
+
+
+def chunked(items: List[Any], size: int) -> Iterator[List[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+async def insert_unordered(
+    collection, indexed_docs: List[Tuple[int, dict]]
+) -> Tuple[List[Tuple[int, dict]], List[BulkRowError]]:
+    """
+    insert_many(ordered=False) one chunk: a failing document does not stop
+    the rest. Returns the inserted (index, doc) pairs (``_id`` filled in)
+    and a row error per rejected document.
+    """
+    if not indexed_docs:
+        return [], []
+
+    failed = {}
+    try:
+        await collection.insert_many([doc for _, doc in indexed_docs], ordered=False)
+    except BulkWriteError as e:
+        for error in e.details.get("writeErrors", []):
+            failed[error["index"]] = error.get("errmsg", "Write failed")
+
+    inserted, errors = [], []
+    for position, (index, doc) in enumerate(indexed_docs):
+        if position in failed:
+            errors.append(BulkRowError(index=index, error=failed[position]))
+        else:
+            inserted.append((index, doc))
+    return inserted, errors
+
+
+def bulk_result(
+    received: int, created: List[BulkRowCreated], errors: List[BulkRowError]
+) -> BulkResult:
+    return BulkResult(
+        received=received,
+        inserted=len(created),
+        failed=len(errors),
+        created=sorted(created, key=lambda c: c.index),
+        errors=sorted(errors, key=lambda e: e.index)
+    )
@@ -0,0 +1,153 @@
+import asyncio
+import hashlib
+import logging
+from typing import Any, Awaitable, Callable, Optional, Type
+
+from fastapi import HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+from app.core.config import get_settings
+from app.database.idempotency import get_idempotency_store, COMPLETED
+
+settings = get_settings()
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+MAX_KEY_LENGTH = 255
+
+
+class InDoubt(Exception):
+    """
+    Raised by an operation whose outcome is not settled yet (it may still
+    take effect in the background). The response is sent and stored for
+    the key like a success, instead of releasing the key, so a retry
+    replays it rather than running the operation again.
+    """
+
+    def __init__(self, status_code: int, body: dict):
+        super().__init__(body.get("detail"))
+        self.status_code = status_code
+        self.body = body
+
+
+async def _release(store, record_key: str, token: str):
+    try:
+        await store.release(record_key, token)
+    except Exception as e:
+        logger.warning(f"Could not release {IDEMPOTENCY_HEADER} {record_key}: {e}")
+
+
+async def _complete(store, record_key: str, token: str, fingerprint: str, status_code: int, body):
+    """Store the response, retrying while the (still renewed) claim is held"""
+    attempts = settings.idempotency_complete_retries + 1
+    for attempt in range(1, attempts + 1):
+        try:
+            if not await store.complete(record_key, token, fingerprint, status_code, body):
+                logger.error(f"{IDEMPOTENCY_HEADER} {record_key} was claimed by another request; response not stored")
+            return
+        except Exception as e:
+            if attempt == attempts:
+                # The write went through; a retry gets 409 until the claim expires, then runs again
+                logger.error(f"Could not store the response for {IDEMPOTENCY_HEADER} {record_key}: {e}")
+                return
+            logger.warning(f"Storing the response for {IDEMPOTENCY_HEADER} {record_key} failed (attempt {attempt}): {e}")
+            await asyncio.sleep(0.1 * 2 ** attempt)
+
+
+async def _heartbeat(store, record_key: str, token: str):
+    """Keep the claim alive while the operation runs"""
+    while True:
+        await asyncio.sleep(settings.idempotency_lock_seconds / 3)
+        try:
+            if not await store.renew(record_key, token):
+                logger.error(f"Lost the claim on {IDEMPOTENCY_HEADER} {record_key} while it was running")
+                return
+        except Exception as e:
+            # Retried on the next beat; the claim outlives two misses
+            logger.warning(f"Could not renew the claim on {IDEMPOTENCY_HEADER} {record_key}: {e}")
+
+
+def _replay(record: dict, fingerprint: str) -> JSONResponse:
+    if record["fingerprint"] != fingerprint:
+        raise HTTPException(
+            status_code=422,
+            detail=f"{IDEMPOTENCY_HEADER} was already used with a different request body"
+        )
+    if record["state"] != COMPLETED:
+        raise HTTPException(
+            status_code=409,
+            detail=f"A request with this {IDEMPOTENCY_HEADER} is still being processed; retry later"
+        )
+    return JSONResponse(
+        record["body"], status_code=record["status_code"], headers={REPLAYED_HEADER: "true"}
+    )
+
+
+async def run_idempotent(
+    key: Optional[str],
+    scope: str,
+    payload: BaseModel,
+    operation: Callable[[], Awaitable[Any]],
+    response_model: Type[BaseModel],
+    status_code: int
+) -> Any:
+    """
+    Run a write endpoint's ``operation`` at most once per Idempotency-Key.
+
+    Without a key the operation just runs. With one, a stored response for
+    the same ``scope`` (endpoint) and body is replayed from a single
+    lookup; the same key with a different body is rejected (422), as is a
+    duplicate of a request still in flight (409). The claim is renewed
+    until the response is stored, so a slow operation keeps its key.
+    Successful, in-doubt (InDoubt) and 4xx responses are stored; on a 5xx
+    or an unexpected error the key is released so the client can retry.
+    """
+    if key is None:
+        try:
+            return await operation()
+        except InDoubt as e:
+            return JSONResponse(jsonable_encoder(e.body), status_code=e.status_code)
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(status_code=400, detail=f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} characters")
+
+    store = get_idempotency_store()
+    record_key = f"{scope}:{key}"
+    fingerprint = hashlib.sha256(payload.model_dump_json().encode()).hexdigest()
+
+    record = await store.get(record_key)
+    if record is not None:
+        return _replay(record, fingerprint)
+    token = await store.claim(record_key, fingerprint)
+    if token is None:
+        # Claimed by a concurrent duplicate since the lookup
+        record = await store.get(record_key)
+        if record is not None:
+            return _replay(record, fingerprint)
+        raise HTTPException(status_code=409, detail=f"{IDEMPOTENCY_HEADER} is being claimed; retry later")
+
+    heartbeat = asyncio.create_task(_heartbeat(store, record_key, token))
+    try:
+        try:
+            result = await operation()
+        except InDoubt as e:
+            body = jsonable_encoder(e.body)
+            await _complete(store, record_key, token, fingerprint, e.status_code, body)
+            return JSONResponse(body, status_code=e.status_code)
+        except HTTPException as e:
+            if e.status_code >= 500:
+                await _release(store, record_key, token)
+            else:
+                await _complete(store, record_key, token, fingerprint, e.status_code, {"detail": e.detail})
+            raise
+        except BaseException:
+            await _release(store, record_key, token)
+            raise
+
+        body = jsonable_encoder(response_model.model_validate(result))
+        await _complete(store, record_key, token, fingerprint, status_code, body)
+        return JSONResponse(body, status_code=status_code)
+    finally:
+        heartbeat.cancel()
@@ -0,0 +1,140 @@
+"""
+Keyset (cursor) pagination helpers.
+
+List endpoints are ordered by ``created_at`` descending with the primary key
+as a tie-breaker. Instead of ``skip((page - 1) * page_size)``, which makes the
+database walk and discard every preceding row, a cursor encodes the sort key
+of the last row returned so the next page can seek straight to it.
+
+Cursors are opaque to clients: a URL-safe base64 encoding of
+``{"t": <created_at ISO>, "id": <primary key>}``.
+
+The same cursor format is used for MongoDB (``_id``) and MySQL (``id``).
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple, Union
+
+from bson import ObjectId
+from sqlalchemy import and_, func, select, text, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+
+
+def encode_cursor(created_at: datetime, id_value: Union[str, int, ObjectId]) -> str:
+    """Encode the sort key of the last row on a page into an opaque cursor"""
+    payload = {
+        "t": created_at.isoformat(),
+        "id": id_value if isinstance(id_value, int) else str(id_value)
+    }
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, Union[str, int]]:
+    """Decode a cursor produced by encode_cursor. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload["t"]), payload["id"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def mongo_keyset_filter(cursor: Optional[str]) -> Dict[str, Any]:
+    """
+    Build the MongoDB filter selecting documents strictly after the cursor
+    in ``(created_at DESC, _id DESC)`` order. Returns {} when no cursor is given.
+    """
+    if not cursor:
+        return {}
+    created_at, id_value = decode_cursor(cursor)
+    if not isinstance(id_value, str) or not ObjectId.is_valid(id_value):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    last_id = ObjectId(id_value)
+    return {
+        "$or": [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": last_id}}
+        ]
+    }
+
+
+# Sort order matching mongo_keyset_filter and the compound indexes
+MONGO_KEYSET_SORT = [("created_at", -1), ("_id", -1)]
+
+
+def sql_keyset_condition(model, cursor: Optional[str]):
+    """
+    Build the SQLAlchemy WHERE clause selecting rows strictly after the cursor
+    in ``(created_at DESC, id DESC)`` order, or None when no cursor is given.
+    MySQL 8 range-scans the row-constructor comparison on the
+    ``created_at`` index (InnoDB secondary indexes carry the primary key);
+    the redundant plain bound on ``created_at`` lets partition pruning skip
+    the months after the cursor.
+    """
+    if not cursor:
+        return None
+    created_at, id_value = decode_cursor(cursor)
+    if not isinstance(id_value, int):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return and_(
+        model.created_at <= created_at,
+        tuple_(model.created_at, model.id) < tuple_(created_at, id_value)
+    )
+
+
+def sql_created_range(model, created_from: Optional[datetime], created_to: Optional[datetime]):
+    """
+    WHERE clauses for a half-open ``[created_from, created_to)`` window on
+    ``created_at``. On the monthly-partitioned tables MySQL only reads the
+    partitions overlapping the window.
+    """
+    conditions = []
+    if created_from is not None:
+        conditions.append(model.created_at >= created_from)
+    if created_to is not None:
+        conditions.append(model.created_at < created_to)
+    if created_from is not None and created_to is not None and created_from >= created_to:
+        raise ValueError("created_from must be earlier than created_to")
+    return conditions
+
+
+async def count_rows(
+    session: AsyncSession, query: Select, table_name: str,
+    filtered: bool, mode: str = "exact"
+) -> Optional[int]:
+    """
+    Count rows matched by ``query`` according to ``mode``:
+
+    - ``exact``: ``SELECT COUNT(*)`` over the filtered query
+    - ``estimate``: InnoDB statistics — ``information_schema.TABLES.TABLE_ROWS``
+      for an unfiltered listing, the optimizer's EXPLAIN row estimate otherwise
+    - ``none``: skip counting and return None
+    """
+    if mode == "none":
+        return None
+
+    if mode == "estimate":
+        if not filtered:
+            result = await session.execute(
+                text(
+                    "SELECT TABLE_ROWS FROM information_schema.TABLES "
+                    "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table_name"
+                ),
+                {"table_name": table_name}
+            )
+            return int(result.scalar() or 0)
+
+        compiled = str(query.compile(
+            dialect=session.bind.dialect, compile_kwargs={"literal_binds": True}
+        ))
+        # Escape colons in rendered literals so text() doesn't see bind params
+        result = await session.execute(text("EXPLAIN " + compiled.replace(":", "\\:")))
+        row = result.mappings().first()
+        return int(row["rows"] or 0) if row else 0
+
+    result = await session.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar()
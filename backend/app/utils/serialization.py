@@ -0,0 +1,84 @@
+"""
+Trusted-output response serialization.
+
+Documents read back from our own collections were validated by the
+request schemas on the way in, so re-validating every field through the
+response models on the way out is pure overhead on large list pages.
+In trusted mode (``settings.trusted_responses``) list endpoints project
+each document onto the response model's fields without validation and
+encode the page with orjson straight to bytes, skipping FastAPI's
+response_model validation and ``jsonable_encoder`` pass.
+
+The projection keeps the response model as the contract: only declared
+fields (by alias) are emitted, missing optional fields get their
+defaults, so internal fields such as ``password_hash`` never leak.
+"""
+
+from functools import lru_cache
+from typing import Any, Dict, Tuple, Type
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(value: Any) -> Any:
+    """orjson fallback for the BSON types found in stored documents"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+@lru_cache(maxsize=None)
+def _field_plan(model_cls: Type[BaseModel]) -> Tuple[Tuple[str, str, bool, Any], ...]:
+    """(output key, attribute name, required, default) for each model field"""
+    plan = []
+    for name, field in model_cls.model_fields.items():
+        required = field.is_required()
+        default = None if required else field.get_default(call_default_factory=True)
+        plan.append((field.alias or name, name, required, default))
+    return tuple(plan)
+
+
+def dump_trusted(model_cls: Type[BaseModel], doc: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Project a stored document onto ``model_cls``'s fields without
+    validating it. Top-level ObjectIds become strings; everything else is
+    passed through as stored.
+    """
+    out = {}
+    for key, name, required, default in _field_plan(model_cls):
+        if key in doc:
+            value = doc[key]
+        elif name in doc:
+            value = doc[name]
+        elif required:
+            raise KeyError(f"{model_cls.__name__}: stored document has no '{key}'")
+        else:
+            value = default
+        out[key] = str(value) if isinstance(value, ObjectId) else value
+    return out
+
+
+def dumps(content: Any) -> bytes:
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class TrustedJSONResponse(Response):
+    """JSON response encoded with orjson and no response-model validation"""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def list_response(model_cls: Type[BaseModel], trusted: bool, **payload) -> Any:
+    """
+    Build a paginated list response: the validated ``model_cls`` normally,
+    or the raw payload as a TrustedJSONResponse in trusted mode.
+    """
+    if trusted:
+        return TrustedJSONResponse(payload)
+    return model_cls(**payload)
@@ -0,0 +1,71 @@
+"""
+Streaming list responses.
+
+Large "give me everything" listings are written straight from the Motor
+cursor to the socket, one cursor batch at a time, instead of materializing
+every document as a Pydantic model in a Python list first.
+"""
+
+from enum import Enum
+from typing import AsyncIterator, List, Type, Union
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+# Flush to the client once this many bytes are buffered
+CHUNK_SIZE = 64 * 1024
+
+
+class StreamFormat(str, Enum):
+    json = "json"
+    ndjson = "ndjson"
+
+
+class ListView(str, Enum):
+    full = "full"
+    summary = "summary"
+
+
+async def _chunked(items: AsyncIterator[str], fmt: StreamFormat) -> AsyncIterator[str]:
+    buffer = []
+    size = 0
+    first = True
+
+    if fmt == StreamFormat.json:
+        buffer.append("[")
+
+    async for item in items:
+        if fmt == StreamFormat.json:
+            piece = item if first else "," + item
+        else:
+            piece = item + "\n"
+        first = False
+        buffer.append(piece)
+        size += len(piece)
+        if size >= CHUNK_SIZE:
+            yield "".join(buffer)
+            buffer, size = [], 0
+
+    if fmt == StreamFormat.json:
+        buffer.append("]")
+    if buffer:
+        yield "".join(buffer)
+
+
+def stream_responses(full: Type[BaseModel], summary: Type[BaseModel]) -> dict:
+    """OpenAPI ``responses`` for a streamed listing, in place of a ``list[...]`` response_model"""
+    return {200: {
+        "model": List[Union[full, summary]],
+        "description": (
+            f"format=json: a JSON array of {full.__name__} (view=full) or "
+            f"{summary.__name__} (view=summary). format=ndjson: the same "
+            f"documents, one per line."
+        ),
+        "content": {"application/x-ndjson": {"schema": {"type": "string"}}},
+    }}
+
+
+def stream_response(items: AsyncIterator[str], fmt: StreamFormat) -> StreamingResponse:
+    """Wrap an iterator of serialized JSON documents as a JSON array or NDJSON stream"""
+    media_type = "application/x-ndjson" if fmt == StreamFormat.ndjson else "application/json"
+    return StreamingResponse(_chunked(items, fmt), media_type=media_type)
@@ -0,0 +1,209 @@
+"""
+HTTP load scenarios against a running API seeded by benchmarks.seed.
+
+Scenarios (run one after another, each for ``--duration`` seconds with
+``--concurrency`` workers):
+
+- login: POST /api/auth/login with random seeded users (bcrypt pool)
+- deal_paging: GET /api/deals, following next_cursor for ``--pages`` pages,
+  half of the walks filtered by status
+- dashboard: the four /api/dashboard reads a dashboard page polls
+- saga: POST /api/deals/with-deposit on properties without a deal
+  (consumes fixture properties, one per request)
+- conditions: PATCH a pending condition of a conditional deal to
+  satisfied (consumes fixture conditions, one per request)
+
+The JSON report has throughput, p50/p90/p99/max latency and status codes
+per scenario, plus the run parameters and git revision, so runs can be
+diffed to catch regressions. Consuming scenarios stop early when the
+fixture runs out; re-seed before repeating them.
+
+Usage (from backend/, API running):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.seed --deals 100000 --reset
+    python -m benchmarks.load --duration 30 --concurrency 32 --output run.json
+    python -m benchmarks.load --scenarios deal_paging,dashboard
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.common import summarize
+
+DEAL_STATUSES = ["draft", "submitted", "conditional", "firm", "closing", "completed"]
+
+
+class FixtureExhausted(Exception):
+    pass
+
+
+class Recorder:
+    """Times requests and tallies status codes for one scenario"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self.statuses: Dict[str, int] = {}
+
+    async def request(self, client: httpx.AsyncClient, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            key = str(response.status_code)
+        except httpx.HTTPError as e:
+            response = None
+            key = type(e).__name__
+        self.samples.append(time.perf_counter() - start)
+        self.statuses[key] = self.statuses.get(key, 0) + 1
+        return response
+
+
+class Scenarios:
+    def __init__(self, fixture: dict, token: str, pages: int):
+        self.fixture = fixture
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.pages = pages
+
+    def _take(self, name: str):
+        items = self.fixture[name]
+        if not items:
+            raise FixtureExhausted(name)
+        return items.pop()
+
+    async def login(self, client, rec: Recorder):
+        await rec.request(client, "POST", "/api/auth/login", json={
+            "email": random.choice(self.fixture["emails"]),
+            "password": self.fixture["password"],
+        })
+
+    async def deal_paging(self, client, rec: Recorder):
+        params = {"page_size": 20, "include_total": "false"}
+        if random.random() < 0.5:
+            params["status"] = random.choice(DEAL_STATUSES)
+        for _ in range(self.pages):
+            response = await rec.request(client, "GET", "/api/deals", params=params)
+            if response is None or not response.is_success:
+                return
+            next_cursor = response.json().get("next_cursor")
+            if not next_cursor:
+                return
+            params["cursor"] = next_cursor
+
+    async def dashboard(self, client, rec: Recorder):
+        for path in ("stats", "properties", "deals", "transactions"):
+            await rec.request(client, "GET", f"/api/dashboard/{path}", headers=self.auth)
+
+    async def saga(self, client, rec: Recorder):
+        participants = self.fixture["participants"]
+        offer = float(random.randrange(400_000, 2_000_000, 1000))
+        await rec.request(client, "POST", "/api/deals/with-deposit", json={
+            "property_id": self._take("free_properties"),
+            "offer_price": offer,
+            "participants": {
+                f"{role}_id": random.choice(participants[role])
+                for role in ("buyer", "seller", "buyer_agent", "seller_agent")
+            },
+            "closing_date": (datetime.utcnow() + timedelta(days=60)).isoformat(),
+            "conditions": [{"type": "financing", "description": "Benchmark financing"}],
+            "deposit_amount": round(offer * 0.05, 2),
+            "trust_account_number": random.choice(self.fixture["trust_accounts"]),
+        })
+
+    async def conditions(self, client, rec: Recorder):
+        deal_id, condition_id = self._take("pending_conditions")
+        await rec.request(
+            client, "PATCH", f"/api/deals/{deal_id}/conditions/{condition_id}",
+            json={"status": "satisfied"}
+        )
+
+
+async def run_scenario(step, client, concurrency: int, duration: float) -> dict:
+    rec = Recorder()
+    deadline = time.perf_counter() + duration
+    exhausted = False
+
+    async def worker():
+        nonlocal exhausted
+        while time.perf_counter() < deadline and not exhausted:
+            try:
+                await step(client, rec)
+            except FixtureExhausted:
+                exhausted = True
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        **summarize(rec.samples),
+        "throughput_rps": round(len(rec.samples) / elapsed, 1) if elapsed else 0.0,
+        "seconds": round(elapsed, 2),
+        "statuses": rec.statuses,
+        "fixture_exhausted": exhausted,
+    }
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="HTTP load scenarios")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--fixture", default="bench-fixture.json")
+    parser.add_argument("--scenarios", default="login,deal_paging,dashboard,saga,conditions")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per scenario")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--pages", type=int, default=5, help="pages per deal_paging walk")
+    parser.add_argument("--output", help="also write the report to this file")
+    args = parser.parse_args()
+
+    with open(args.fixture, encoding="utf-8") as f:
+        fixture = json.load(f)
+
+    limits = httpx.Limits(max_connections=args.concurrency + 5)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        login = await client.post(
+            "/api/auth/login",
+            json={"email": fixture["emails"][0], "password": fixture["password"]}
+        )
+        login.raise_for_status()
+        scenarios = Scenarios(fixture, login.json()["access_token"], args.pages)
+
+        results = {}
+        for name in args.scenarios.split(","):
+            step = getattr(scenarios, name.strip(), None)
+            if step is None or name.startswith("_"):
+                parser.error(f"unknown scenario: {name}")
+            results[name] = await run_scenario(step, client, args.concurrency, args.duration)
+
+    report = {
+        "run": {
+            "started_at": datetime.utcnow().isoformat(),
+            "base_url": args.base_url,
+            "git_revision": git_revision(),
+            "duration_s": args.duration,
+            "concurrency": args.concurrency,
+        },
+        "scenarios": results,
+    }
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,114 @@
+"""
+Login storm load test.
+
+Fires a burst of concurrent logins at a running API while a second group
+of clients polls an unrelated endpoint, and reports the latency
+percentiles of that unrelated endpoint with and without the storm. With
+bcrypt on the password pool the two p99s should stay close; with bcrypt
+on the event loop every poll queues behind ~200ms hashes.
+
+The password pool's queue depth is read from /api/dashboard/pools after
+the storm.
+
+Usage (from backend/, API running and the user seeded):
+    pip install -r benchmarks/requirements.txt
+    python -m benchmarks.login_storm --email buyer@example.com --password secret123
+"""
+
+import argparse
+import asyncio
+import json
+import time
+from typing import List
+
+import httpx
+
+from benchmarks.common import summarize
+
+
+async def poll(client: httpx.AsyncClient, path: str, stop: asyncio.Event, samples: List[float]):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - start)
+
+
+async def login(client: httpx.AsyncClient, email: str, password: str, statuses: dict):
+    response = await client.post("/api/auth/login", json={"email": email, "password": password})
+    statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+    return response
+
+
+async def measure_polling(client, path: str, pollers: int, duration: float, storm=None) -> List[float]:
+    samples: List[float] = []
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(poll(client, path, stop, samples)) for _ in range(pollers)]
+    if storm is not None:
+        await storm
+    else:
+        await asyncio.sleep(duration)
+    stop.set()
+    await asyncio.gather(*tasks)
+    return samples
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Login storm load test")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--email", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--logins", type=int, default=200, help="logins in the storm")
+    parser.add_argument("--concurrency", type=int, default=50, help="logins in flight at once")
+    parser.add_argument("--pollers", type=int, default=10)
+    parser.add_argument("--path", default="/health/live", help="unrelated endpoint to poll")
+    parser.add_argument("--baseline-seconds", type=float, default=5.0)
+    args = parser.parse_args()
+
+    limits = httpx.Limits(max_connections=args.concurrency + args.pollers + 5)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=60) as client:
+        first = await client.post(
+            "/api/auth/login", json={"email": args.email, "password": args.password}
+        )
+        first.raise_for_status()
+        token = first.json()["access_token"]
+
+        baseline = await measure_polling(client, args.path, args.pollers, args.baseline_seconds)
+
+        statuses: dict = {}
+        gate = asyncio.Semaphore(args.concurrency)
+
+        async def one_login():
+            async with gate:
+                await login(client, args.email, args.password, statuses)
+
+        async def storm():
+            start = time.perf_counter()
+            await asyncio.gather(*(one_login() for _ in range(args.logins)))
+            return time.perf_counter() - start
+
+        storm_task = asyncio.create_task(storm())
+        during = await measure_polling(client, args.path, args.pollers, 0, storm_task)
+        storm_seconds = storm_task.result()
+
+        pools = await client.get(
+            "/api/dashboard/pools", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    report = {
+        "endpoint": args.path,
+        "baseline": summarize(baseline),
+        "during_storm": summarize(during),
+        "storm": {
+            "logins": args.logins,
+            "concurrency": args.concurrency,
+            "seconds": round(storm_seconds, 2),
+            "logins_per_second": round(args.logins / storm_seconds, 1),
+            "statuses": statuses,
+        },
+        "password_hashing": pools.json().get("password_hashing") if pools.is_success else None,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,132 @@
+"""
+Cost of the saga log on deal + deposit creation.
+
+Runs DealDepositSaga.execute in-process against the databases seeded by
+benchmarks.seed, first without and then with the saga log, and reports
+throughput, latency percentiles and database writes per saga for each
+mode. Writes are counted by the query profiler, so audit and stats
+writes show up too. The log should add two writes per saga, one per
+step: the saga_log insert before step 1 and its completion after step 2
+(lease renewals only happen for sagas running longer than a third of
+``saga_lease_seconds``).
+
+Each saga consumes a free property from the fixture (2 x --sagas in all).
+
+Usage (from backend/):
+    python -m benchmarks.seed --deals 100000 --reset
+    python -m benchmarks.saga_log --sagas 2000 --concurrency 16
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from app.core.config import get_settings
+from app.core.profiler import RequestProfile, current_profile
+from app.database.mongodb import connect_mongodb, close_mongodb
+from app.database.mysql import connect_mysql, close_mysql
+from app.schemas.deal import DealWithDepositCreate
+from app.services.saga_service import DealDepositSaga
+from benchmarks.common import summarize
+
+settings = get_settings()
+
+MONGO_WRITES = {"insert", "update", "delete", "findAndModify"}
+MYSQL_WRITES = {"insert", "update", "delete", "replace"}
+
+
+def is_write(database: str, name: str) -> bool:
+    operation = name.split(".", 1)[0]
+    return operation in (MONGO_WRITES if database == "mongodb" else MYSQL_WRITES)
+
+
+def saga_request(fixture: dict, property_id: str) -> DealWithDepositCreate:
+    participants = fixture["participants"]
+    offer = float(random.randrange(400_000, 2_000_000, 1000))
+    return DealWithDepositCreate(
+        property_id=property_id,
+        offer_price=offer,
+        participants={
+            f"{role}_id": random.choice(participants[role])
+            for role in ("buyer", "seller", "buyer_agent", "seller_agent")
+        },
+        closing_date=datetime.utcnow() + timedelta(days=60),
+        deposit_amount=round(offer * 0.05, 2),
+        trust_account_number=random.choice(fixture["trust_accounts"]),
+    )
+
+
+async def run_mode(fixture: dict, property_ids: list, concurrency: int, log_enabled: bool) -> dict:
+    settings.saga_log_enabled = log_enabled
+    semaphore = asyncio.Semaphore(concurrency)
+    samples = []
+    writes = Counter()
+    failures = 0
+
+    async def run_one(property_id: str):
+        nonlocal failures
+        # Each gathered coroutine runs in its own task, so its own context
+        profile = RequestProfile("SAGA", "deal_deposit", enabled=True)
+        current_profile.set(profile)
+        data = saga_request(fixture, property_id)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await DealDepositSaga().execute(data)
+            except Exception:
+                failures += 1
+            samples.append(time.perf_counter() - start)
+        for (database, name), (_, calls) in profile.totals.items():
+            if is_write(database, name):
+                writes[f"{database}.{name}"] += int(calls)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(run_one(property_id) for property_id in property_ids))
+    elapsed = time.perf_counter() - start
+    count = len(property_ids)
+    return {
+        **summarize(samples),
+        "throughput_per_s": round(count / elapsed, 1) if elapsed else 0.0,
+        "failures": failures,
+        "writes_per_saga": round(sum(writes.values()) / count, 2),
+        "writes_by_target": {label: round(n / count, 2) for label, n in sorted(writes.items())},
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Saga log overhead benchmark")
+    parser.add_argument("--sagas", type=int, default=1000, help="sagas per mode")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--fixture", default="bench-fixture.json")
+    args = parser.parse_args()
+
+    with open(args.fixture, encoding="utf-8") as f:
+        fixture = json.load(f)
+    properties = fixture["free_properties"]
+    if len(properties) < 2 * args.sagas:
+        parser.error(f"fixture has {len(properties)} free properties; need {2 * args.sagas}")
+
+    await connect_mongodb()
+    await connect_mysql()
+    try:
+        without_log = await run_mode(fixture, properties[:args.sagas], args.concurrency, False)
+        with_log = await run_mode(fixture, properties[args.sagas:2 * args.sagas], args.concurrency, True)
+    finally:
+        await close_mongodb()
+        await close_mysql()
+
+    print(json.dumps({
+        "sagas_per_mode": args.sagas,
+        "concurrency": args.concurrency,
+        "without_log": without_log,
+        "with_log": with_log,
+        "extra_writes_per_saga": round(with_log["writes_per_saga"] - without_log["writes_per_saga"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,401 @@
+"""
+Seed synthetic data for the load scenarios.
+
+Writes users, properties, deals (participant snapshots, conditions and
+status history), trust accounts and transactions straight into the
+configured MongoDB and MySQL databases, shaped like the documents the
+services create, spread over the last ``--months`` months. Then rebuilds
+the dashboard counters and the MongoDB indexes.
+
+``--deals`` sets the scale (10k to 10M). Every deal gets its own
+property, and the other counts derive from it unless given. Documents are
+generated and inserted chunk by chunk, so memory stays flat at any scale.
+
+A fixture file feeds benchmarks.load. It lists logins, plus the IDs that
+scenarios consume: properties without a deal, pending conditions on
+conditional deals, participants and trust accounts.
+
+Usage (from backend/, with .env pointing at local containers):
+    python -m benchmarks.seed --deals 100000 --reset
+    python -m benchmarks.seed --deals 10000000 --chunk-size 20000
+
+--reset empties the app's collections and tables first. Only use it on a
+disposable database.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from bson import ObjectId
+from sqlalchemy import insert, text
+
+from app.core.security import get_password_hash
+from app.database.indexes import ensure_indexes
+from app.database.mongodb import connect_mongodb, close_mongodb, get_database
+from app.database.mysql import connect_mysql, close_mysql, engine, async_session_factory
+from app.database.partitions import PARTITIONED_TABLES, prepare_partitions, ensure_past_partitions
+from app.models.transaction import (
+    Transaction, TrustAccount, TransactionTypeEnum, TransactionStatusEnum, AccountStatusEnum
+)
+from app.services.stats_service import StatsService, reconcile_transaction_stats
+
+PASSWORD = "benchmark123"
+FIXTURE_SAMPLE = 20000
+
+USER_ROLES = {
+    "buyer": 30, "seller": 30, "buyer_agent": 15,
+    "seller_agent": 15, "buyer_lawyer": 5, "seller_lawyer": 5,
+}
+DEAL_STATUSES = {
+    "draft": 10, "submitted": 10, "conditional": 20, "firm": 10,
+    "closing": 5, "completed": 30, "cancelled": 10, "expired": 5,
+}
+STATUS_PATHS = {
+    "draft": ["draft"],
+    "submitted": ["draft", "submitted"],
+    "conditional": ["draft", "submitted", "conditional"],
+    "firm": ["draft", "submitted", "conditional", "firm"],
+    "closing": ["draft", "submitted", "conditional", "firm", "closing"],
+    "completed": ["draft", "submitted", "conditional", "firm", "closing", "completed"],
+    "cancelled": ["draft", "submitted", "cancelled"],
+    "expired": ["draft", "submitted", "conditional", "expired"],
+}
+CONDITION_TYPES = ["financing", "inspection", "appraisal", "sale_of_property", "other"]
+CITIES = ["Toronto", "Ottawa", "Mississauga", "Hamilton", "London", "Kitchener", "Windsor"]
+TRANSACTION_TYPES = {
+    TransactionTypeEnum.deposit: 50, TransactionTypeEnum.payment: 20,
+    TransactionTypeEnum.commission: 20, TransactionTypeEnum.refund: 5,
+    TransactionTypeEnum.adjustment: 5,
+}
+
+
+def weighted(rng: random.Random, weights: dict):
+    return rng.choices(list(weights), weights=list(weights.values()))[0]
+
+
+def random_time(rng: random.Random, now: datetime, months: int) -> datetime:
+    return now - timedelta(seconds=rng.randrange(months * 30 * 86400))
+
+
+def make_user(rng: random.Random, i: int, role: str, password_hash: str, now: datetime, months: int) -> dict:
+    created_at = random_time(rng, now, months)
+    if role.endswith("_agent"):
+        role_specific = {
+            "license_number": f"AG-{i:07d}",
+            "brokerage": f"Bench Realty {i % 50}",
+            "commission_rate": 2.5,
+        }
+    elif role.endswith("_lawyer"):
+        role_specific = {
+            "bar_number": f"LSO-{i:07d}",
+            "law_firm": f"Bench Law {i % 30} LLP",
+            "specialization": "Real Estate",
+        }
+    else:
+        role_specific = {}
+    return {
+        "_id": ObjectId(),
+        "email": f"bench.user{i}@example.com",
+        "password_hash": password_hash,
+        "role": role,
+        "profile": {"name": f"Bench User {i}", "phone": f"416-555-{i % 10000:04d}", "address": None},
+        "role_specific": role_specific,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def snapshot_entry(user: dict) -> dict:
+    """What DealService copies into participants_snapshot for a user"""
+    return {
+        "user_id": str(user["_id"]),
+        "name": user["profile"]["name"],
+        "email": user["email"],
+        "phone": user["profile"]["phone"],
+        "role_type": user["role"],
+        "license_number": user["role_specific"].get("license_number"),
+        "brokerage": user["role_specific"].get("brokerage"),
+        "law_firm": user["role_specific"].get("law_firm"),
+    }
+
+
+def make_property(rng: random.Random, i: int, created_at: datetime, status: str) -> dict:
+    residential = rng.random() < 0.8
+    if residential:
+        attributes = {
+            "bedrooms": rng.randint(1, 6), "bathrooms": rng.choice([1, 1.5, 2, 2.5, 3]),
+            "sqft": rng.randint(600, 4500), "year_built": rng.randint(1950, 2024),
+            "parking_spaces": rng.randint(0, 3), "has_basement": rng.random() < 0.5,
+            "has_garage": rng.random() < 0.6,
+        }
+    else:
+        attributes = {"sqft": rng.randint(1500, 60000), "num_units": rng.randint(1, 40)}
+    return {
+        "_id": ObjectId(),
+        "type": "residential" if residential else "commercial",
+        "address": {
+            "street": f"{rng.randint(1, 9999)} Bench Street Unit {i}",
+            "city": rng.choice(CITIES),
+            "province": "ON",
+            "postal_code": f"M{rng.randint(1, 9)}A {rng.randint(1, 9)}B{rng.randint(1, 9)}",
+            "country": "Canada",
+        },
+        "listing_price": float(rng.randrange(300_000, 3_000_000, 1000)),
+        "status": status,
+        "attributes": attributes,
+        "description": "Synthetic benchmark listing",
+        "images": [],
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def make_deal(
+    rng: random.Random, property_doc: dict, participants: dict, created_at: datetime, now: datetime
+) -> dict:
+    status = weighted(rng, DEAL_STATUSES)
+    timestamp = created_at
+    history = []
+    for step in STATUS_PATHS[status]:
+        history.append({"status": step, "timestamp": timestamp, "note": None})
+        timestamp = min(timestamp + timedelta(days=rng.randint(1, 10)), now)
+
+    settled = status in ("firm", "closing", "completed")
+    conditions = []
+    for kind in rng.sample(CONDITION_TYPES, rng.randint(1 if status == "conditional" else 0, 3)):
+        conditions.append({
+            "id": str(ObjectId()),
+            "type": kind,
+            "description": f"{kind} condition",
+            "deadline": created_at + timedelta(days=rng.randint(10, 45)),
+            "status": rng.choice(["satisfied", "waived"]) if settled else "pending",
+            "created_at": created_at,
+        })
+
+    roles = ["buyer", "seller", "buyer_agent", "seller_agent"]
+    if rng.random() < 0.5:
+        roles += ["buyer_lawyer", "seller_lawyer"]
+    snapshot = {role: rng.choice(participants[role]) for role in roles}
+    return {
+        "_id": ObjectId(),
+        "property_id": property_doc["_id"],
+        "offer_price": round(property_doc["listing_price"] * rng.uniform(0.9, 1.1), -2),
+        "status": status,
+        "participants_snapshot": snapshot,
+        "participant_refs": {role: entry["user_id"] for role, entry in snapshot.items()},
+        "snapshot_timestamp": created_at,
+        "conditions": conditions,
+        "closing_date": created_at + timedelta(days=rng.randint(30, 90)),
+        "notes": "Synthetic benchmark deal",
+        "status_history": history,
+        "created_at": created_at,
+        "updated_at": history[-1]["timestamp"],
+    }
+
+
+def property_status_for(deal_status: str) -> str:
+    if deal_status == "completed":
+        return "sold"
+    if deal_status in ("firm", "closing"):
+        return "pending"
+    return "active"
+
+
+async def reset(db):
+    for name in ("users", "properties", "deals", "stats"):
+        await db[name].drop()
+    async with engine.begin() as conn:
+        for table in ("transactions", "audit_logs", "trust_accounts", "transaction_stats"):
+            await conn.execute(text(f"TRUNCATE TABLE {table}"))
+
+
+async def seed_users(db, rng, args, now, fixture) -> dict:
+    """Insert users; returns snapshot entries per role for the deals"""
+    password_hash = get_password_hash(PASSWORD)
+    participants = {role: [] for role in USER_ROLES}
+    batch = []
+    for i in range(args.users):
+        # Every role is represented even at tiny scales
+        role = list(USER_ROLES)[i] if i < len(USER_ROLES) else weighted(rng, USER_ROLES)
+        user = make_user(rng, i, role, password_hash, now, args.months)
+        participants[role].append(snapshot_entry(user))
+        if len(fixture["emails"]) < FIXTURE_SAMPLE:
+            fixture["emails"].append(user["email"])
+        batch.append(user)
+        if len(batch) >= args.chunk_size:
+            await db.users.insert_many(batch, ordered=False)
+            batch = []
+    if batch:
+        await db.users.insert_many(batch, ordered=False)
+    fixture["participants"] = {
+        role: [entry["user_id"] for entry in entries[:FIXTURE_SAMPLE]]
+        for role, entries in participants.items()
+    }
+    return participants
+
+
+async def seed_properties_and_deals(db, rng, args, now, participants, fixture) -> list:
+    """Insert one property per deal plus the free ones; returns a sample of deal IDs"""
+    deal_ids = []
+    properties, deals = [], []
+    total = args.deals + args.free_properties
+    for i in range(total):
+        created_at = random_time(rng, now, args.months)
+        if i < args.deals:
+            listed_at = created_at - timedelta(days=rng.randint(0, 20))
+            property_doc = make_property(rng, i, listed_at, "active")
+            deal = make_deal(rng, property_doc, participants, created_at, now)
+            property_doc["status"] = property_status_for(deal["status"])
+            deals.append(deal)
+
+            # Reservoir sample of deal IDs for the transactions
+            if len(deal_ids) < FIXTURE_SAMPLE:
+                deal_ids.append(str(deal["_id"]))
+            elif rng.randrange(i + 1) < FIXTURE_SAMPLE:
+                deal_ids[rng.randrange(FIXTURE_SAMPLE)] = str(deal["_id"])
+            if deal["status"] == "conditional" and len(fixture["pending_conditions"]) < FIXTURE_SAMPLE:
+                fixture["pending_conditions"].extend(
+                    [str(deal["_id"]), c["id"]] for c in deal["conditions"] if c["status"] == "pending"
+                )
+        else:
+            property_doc = make_property(rng, i, created_at, "active")
+            if len(fixture["free_properties"]) < FIXTURE_SAMPLE:
+                fixture["free_properties"].append(str(property_doc["_id"]))
+        properties.append(property_doc)
+
+        if len(properties) >= args.chunk_size:
+            await asyncio.gather(
+                db.properties.insert_many(properties, ordered=False),
+                db.deals.insert_many(deals, ordered=False) if deals else asyncio.sleep(0)
+            )
+            properties, deals = [], []
+    if properties:
+        await db.properties.insert_many(properties, ordered=False)
+    if deals:
+        await db.deals.insert_many(deals, ordered=False)
+    return deal_ids
+
+
+async def seed_mysql(rng, args, now, deal_ids, fixture):
+    accounts = [f"BENCH-{i:06d}" for i in range(args.accounts)]
+    fixture["trust_accounts"] = accounts[:FIXTURE_SAMPLE]
+    async with engine.begin() as conn:
+        for start in range(0, len(accounts), args.chunk_size):
+            await conn.execute(insert(TrustAccount).values([
+                {
+                    "account_number": number,
+                    "holder_name": f"Bench Trust {number}",
+                    "balance": Decimal("1000000000.00"),
+                    "status": AccountStatusEnum.active,
+                }
+                for number in accounts[start:start + args.chunk_size]
+            ]))
+
+        # Give each seeded month its own partition instead of the oldest one
+        since = now - timedelta(days=args.months * 31)
+        for table in PARTITIONED_TABLES:
+            await ensure_past_partitions(conn, table, since)
+
+    remaining = args.transactions
+    while remaining > 0:
+        count = min(args.chunk_size, remaining)
+        rows = []
+        for _ in range(count):
+            tx_type = weighted(rng, TRANSACTION_TYPES)
+            rows.append({
+                "deal_id": rng.choice(deal_ids),
+                "amount": Decimal(rng.randrange(1000, 5_000_000)) / 100,
+                "transaction_type": tx_type,
+                "status": TransactionStatusEnum.completed,
+                "from_account": None if tx_type == TransactionTypeEnum.deposit else rng.choice(accounts),
+                "to_account": rng.choice(accounts),
+                "description": f"Synthetic {tx_type.value}",
+                "created_at": random_time(rng, now, args.months),
+            })
+        # One transaction per chunk keeps the redo log and lock memory bounded
+        async with engine.begin() as conn:
+            await conn.execute(insert(Transaction).values(rows))
+        remaining -= count
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Seed synthetic benchmark data")
+    parser.add_argument("--deals", type=int, default=10000, help="scale: number of deals")
+    parser.add_argument("--users", type=int, help="default: deals / 10, 100 to 200k")
+    parser.add_argument("--free-properties", type=int, help="properties without a deal; default: deals / 10, min 1000")
+    parser.add_argument("--accounts", type=int, help="trust accounts; default: deals / 1000, min 20")
+    parser.add_argument("--transactions", type=int, help="default: 2 per deal")
+    parser.add_argument("--months", type=int, default=24, help="spread created_at over this many months")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--reset", action="store_true", help="empty the app collections and tables first")
+    parser.add_argument("--fixture", default="bench-fixture.json")
+    args = parser.parse_args()
+    args.users = args.users or min(max(args.deals // 10, 100), 200_000)
+    args.free_properties = args.free_properties or max(args.deals // 10, 1000)
+    args.accounts = args.accounts or max(args.deals // 1000, 20)
+    args.transactions = args.transactions if args.transactions is not None else args.deals * 2
+
+    rng = random.Random(args.seed)
+    now = datetime.utcnow()
+    fixture = {
+        "password": PASSWORD, "emails": [], "participants": {}, "free_properties": [],
+        "pending_conditions": [], "trust_accounts": [],
+    }
+    timings = {}
+
+    await connect_mongodb()
+    await connect_mysql()
+    try:
+        db = get_database()
+        if args.reset:
+            await reset(db)
+        await prepare_partitions()
+
+        start = time.perf_counter()
+        participants = await seed_users(db, rng, args, now, fixture)
+        timings["users_s"] = round(time.perf_counter() - start, 1)
+
+        start = time.perf_counter()
+        deal_ids = await seed_properties_and_deals(db, rng, args, now, participants, fixture)
+        timings["properties_and_deals_s"] = round(time.perf_counter() - start, 1)
+
+        start = time.perf_counter()
+        await seed_mysql(rng, args, now, deal_ids, fixture)
+        timings["mysql_s"] = round(time.perf_counter() - start, 1)
+
+        start = time.perf_counter()
+        await ensure_indexes()
+        await StatsService().reconcile()
+        async with async_session_factory() as session:
+            await reconcile_transaction_stats(session)
+        timings["indexes_and_stats_s"] = round(time.perf_counter() - start, 1)
+    finally:
+        await close_mongodb()
+        await close_mysql()
+
+    rng.shuffle(fixture["free_properties"])
+    rng.shuffle(fixture["pending_conditions"])
+    with open(args.fixture, "w", encoding="utf-8") as f:
+        json.dump(fixture, f)
+
+    print(json.dumps({
+        "counts": {
+            "users": args.users,
+            "properties": args.deals + args.free_properties,
+            "deals": args.deals,
+            "trust_accounts": args.accounts,
+            "transactions": args.transactions,
+        },
+        "timings": timings,
+        "fixture": args.fixture,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,146 @@
+"""
+Per-document serialization cost of a deal list page.
+
+Compares the validated path (DealResponse per document, then FastAPI's
+response_model validation, jsonable encoding and json.dumps) with the
+trusted path (field projection + orjson, see app.utils.serialization)
+on synthetic deal documents shaped like the ones DealService stores.
+No database is needed.
+
+Usage (from backend/):
+    python -m benchmarks.serialization --docs 100 --rounds 200
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from datetime import datetime, timedelta
+from statistics import median
+
+from bson import ObjectId
+
+# Settings are read at import time; the benchmark never connects anywhere
+for _name, _value in {
+    "MYSQL_HOST": "localhost", "MYSQL_USER": "bench", "MYSQL_PASSWORD": "bench",
+    "MYSQL_DATABASE": "bench", "MONGODB_URL": "mongodb://localhost:27017",
+    "MONGODB_DATABASE": "bench", "SECRET_KEY": "bench",
+}.items():
+    os.environ.setdefault(_name, _value)
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+from app.schemas.deal import DealListResponse, DealResponse  # noqa: E402
+from app.utils.serialization import dump_trusted, list_response  # noqa: E402
+
+
+def make_deal(i: int) -> dict:
+    now = datetime(2024, 1, 1) + timedelta(minutes=i)
+    participant = {
+        "user_id": str(ObjectId()),
+        "name": f"Participant {i}",
+        "email": f"participant{i}@example.com",
+        "phone": "416-555-0100",
+        "role_type": "buyer",
+        "license_number": None,
+        "brokerage": None,
+        "law_firm": None,
+    }
+    return {
+        "_id": ObjectId(),
+        "property_id": ObjectId(),
+        "offer_price": 750000.0 + i,
+        "status": "conditional",
+        "participants_snapshot": {role: dict(participant) for role in ("buyer", "seller", "buyer_agent")},
+        "participant_refs": {role: participant["user_id"] for role in ("buyer", "seller", "buyer_agent")},
+        "snapshot_timestamp": now,
+        "conditions": [
+            {
+                "id": str(ObjectId()),
+                "type": kind,
+                "description": f"{kind} condition",
+                "deadline": now + timedelta(days=10),
+                "status": "pending",
+                "created_at": now,
+            }
+            for kind in ("financing", "inspection")
+        ],
+        "closing_date": now + timedelta(days=60),
+        "notes": "Synthetic benchmark deal",
+        "status_history": [
+            {"status": "draft", "timestamp": now},
+            {"status": "submitted", "timestamp": now, "note": None},
+            {"status": "conditional", "timestamp": now, "note": "Accepted"},
+        ],
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+RESPONSE_FIELD = create_response_field(name="Response_list_deals", type_=DealListResponse)
+
+
+async def validated_page(docs: list) -> bytes:
+    """What list_deals does with trusted_responses disabled"""
+    deals = []
+    for doc in docs:
+        doc = dict(doc)
+        doc["_id"] = str(doc["_id"])
+        doc["property_id"] = str(doc["property_id"])
+        deals.append(DealResponse(**doc))
+    page = DealListResponse(
+        deals=deals, total=len(docs), page=1, page_size=len(docs), next_cursor=None
+    )
+    content = await serialize_response(field=RESPONSE_FIELD, response_content=page, is_coroutine=True)
+    return JSONResponse(content).body
+
+
+async def trusted_page(docs: list) -> bytes:
+    """What list_deals does with trusted_responses enabled"""
+    deals = [dump_trusted(DealResponse, doc) for doc in docs]
+    response = list_response(
+        DealListResponse, True,
+        deals=deals, total=len(docs), page=1, page_size=len(docs), next_cursor=None
+    )
+    return response.body
+
+
+async def measure(build, docs: list, rounds: int) -> list:
+    await build(docs)  # warm up caches
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        await build(docs)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=100, help="deals per page")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    docs = [make_deal(i) for i in range(args.docs)]
+
+    # Both paths must produce the same document
+    assert json.loads(await validated_page(docs)) == json.loads(await trusted_page(docs))
+
+    report = {}
+    for name, build in (("validated", validated_page), ("trusted", trusted_page)):
+        timings = await measure(build, docs, args.rounds)
+        report[name] = {
+            "page_ms_p50": round(median(timings) * 1000, 3),
+            "per_doc_us_p50": round(median(timings) / args.docs * 1e6, 2),
+        }
+    report["speedup"] = round(
+        report["validated"]["page_ms_p50"] / report["trusted"]["page_ms_p50"], 2
+    )
+    print(json.dumps({"docs": args.docs, "rounds": args.rounds, **report}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,10 +1,23 @@
+import asyncio
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.database.mongodb import connect_mongodb, close_mongodb
+from app.database.indexes import ensure_indexes
+from app.services.stats_service import run_stats_reconciliation
+from app.services.audit_writer import start_audit_writer, stop_audit_writer
+from app.services.snapshot_refresher import start_snapshot_refresher, stop_snapshot_refresher
+from app.services.saga_service import run_saga_recovery
 from app.database.mysql import connect_mysql, close_mysql
-from app.routers import users, properties, deals, transactions, auth, dashboard
+from app.database.partitions import prepare_partitions, run_partition_maintenance
+from app.database.cache import connect_cache, close_cache
+from app.database.change_feed import start_change_feed, stop_change_feed
+from app.database.idempotency import connect_idempotency_store
+from app.core.security import password_hasher
+from app.core.metrics import MetricsMiddleware, metrics_response
+from app.core.profiler import ProfilerMiddleware
+from app.routers import users, properties, deals, transactions, auth, dashboard, health
 
 
 @asynccontextmanager
@@ -13,10 +26,36 @@ async def lifespan(app: FastAPI):
     # Startup
     await connect_mongodb()
     await connect_mysql()
+    await prepare_partitions()
+    await connect_cache()
+    connect_idempotency_store()
+    start_audit_writer()
+    start_snapshot_refresher()
+    # Follow deals / properties / users writes from any source for invalidation
+    start_change_feed()
+    # Reconcile MongoDB indexes without holding up startup
+    index_task = asyncio.create_task(ensure_indexes())
+    # Periodically rebuild the materialized dashboard counters from source
+    stats_task = asyncio.create_task(run_stats_reconciliation())
+    # Keep monthly partitions pre-created ahead of the clock
+    partition_task = asyncio.create_task(run_partition_maintenance())
+    # Settle deal/deposit sagas left open by a crash or failed compensation
+    saga_task = asyncio.create_task(run_saga_recovery())
     yield
     # Shutdown
+    background_tasks = (index_task, stats_task, partition_task, saga_task)
+    for task in background_tasks:
+        task.cancel()
+    # Let a recovery step or partition archive unwind before the databases close
+    await asyncio.gather(*background_tasks, return_exceptions=True)
+    await stop_change_feed()
+    await stop_snapshot_refresher()
+    # Drain queued audit entries while MySQL is still connected
+    await stop_audit_writer()
     await close_mongodb()
     await close_mysql()
+    await close_cache()
+    password_hasher.shutdown()
 
 
 app = FastAPI(
@@ -33,7 +72,11 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Total-Count", "Server-Timing", "Idempotent-Replayed"],
 )
+app.add_middleware(ProfilerMiddleware)
+# Outermost, so latency includes CORS handling and error responses
+app.add_middleware(MetricsMiddleware)
 
 # Include routers
 app.include_router(auth.router)
@@ -42,6 +85,7 @@ app.include_router(properties.router)
 app.include_router(deals.router)
 app.include_router(transactions.router)
 app.include_router(dashboard.router)
+app.include_router(health.router)
 
 
 @app.get("/")
@@ -54,16 +98,10 @@ async def root():
     }
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {
-        "status": "healthy",
-        "databases": {
-            "mongodb": "connected",
-            "mysql": "connected"
-        }
-    }
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint"""
+    return metrics_response()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,87 @@
+"""
+Partition maintenance for transactions / audit_logs.
+
+Run it from cron (or by hand) against the configured MySQL database
+(settings come from .env like the API):
+
+    python -m maintenance.partitions status
+    python -m maintenance.partitions convert              # one-off, rebuilds the tables
+    python -m maintenance.partitions ensure --months-ahead 3
+    python -m maintenance.partitions archive --older-than-months 12 \\
+        --dest /var/lib/realestate/archive --format ndjson
+
+``archive`` exports each monthly partition past the horizon, verifies the
+row count and then drops it (``--keep`` exports without dropping).
+"""
+
+import argparse
+import asyncio
+import json
+
+from app.core.config import get_settings
+from app.database.mysql import engine
+from app.database.partitions import (
+    PARTITIONED_TABLES, ARCHIVE_EXTENSIONS, get_partitions, convert_table,
+    ensure_future_partitions, archive_partitions
+)
+
+settings = get_settings()
+
+
+async def status() -> dict:
+    report = {}
+    async with engine.connect() as conn:
+        for table in PARTITIONED_TABLES:
+            report[table] = await get_partitions(conn, table) or "not partitioned"
+    return report
+
+
+async def convert(tables) -> dict:
+    report = {}
+    for table in tables:
+        async with engine.begin() as conn:
+            report[table] = await convert_table(conn, table) or "already partitioned"
+    return report
+
+
+async def ensure(months_ahead: int) -> dict:
+    report = {}
+    async with engine.begin() as conn:
+        for table in PARTITIONED_TABLES:
+            report[table] = await ensure_future_partitions(conn, table, months_ahead)
+    return report
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Monthly partition maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("status", help="list partitions and estimated row counts")
+    convert_parser = commands.add_parser("convert", help="partition tables that still hold unpartitioned rows")
+    convert_parser.add_argument("--table", choices=list(PARTITIONED_TABLES), action="append")
+    ensure_parser = commands.add_parser("ensure", help="pre-create upcoming monthly partitions")
+    ensure_parser.add_argument("--months-ahead", type=int, default=settings.partition_months_ahead)
+    archive_parser = commands.add_parser("archive", help="export and drop cold partitions")
+    archive_parser.add_argument("--older-than-months", type=int, default=settings.archive_after_months)
+    archive_parser.add_argument("--dest", default=settings.archive_dir)
+    archive_parser.add_argument("--format", choices=list(ARCHIVE_EXTENSIONS), default=settings.archive_format)
+    archive_parser.add_argument("--keep", action="store_true", help="export without dropping")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "status":
+            report = await status()
+        elif args.command == "convert":
+            report = await convert(args.table or list(PARTITIONED_TABLES))
+        elif args.command == "ensure":
+            report = await ensure(args.months_ahead)
+        else:
+            report = await archive_partitions(
+                args.older_than_months, args.dest, args.format, drop=not args.keep
+            )
+    finally:
+        await engine.dispose()
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
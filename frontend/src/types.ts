@@ -27,9 +27,10 @@ export interface UserCreate {
 
 export interface UserListResponse {
   users: User[]
-  total: number
+  total: number | null
   page: number
   page_size: number
+  next_cursor?: string | null
 }
 
 // Property types
@@ -74,9 +75,10 @@ export interface PropertyUpdate {
 
 export interface PropertyListResponse {
   properties: Property[]
-  total: number
+  total: number | null
   page: number
   page_size: number
+  next_cursor?: string | null
 }
 
 // Deal types
@@ -138,9 +140,10 @@ export interface DealCreate {
 
 export interface DealListResponse {
   deals: Deal[]
-  total: number
+  total: number | null
   page: number
   page_size: number
+  next_cursor?: string | null
 }
 
 // Transaction types
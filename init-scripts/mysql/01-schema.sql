@@ -12,6 +12,7 @@ CREATE TABLE IF NOT EXISTS transactions (
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
     INDEX idx_deal_id (deal_id),
     INDEX idx_status (status),
+    INDEX idx_created_at (created_at),
     CONSTRAINT chk_amount CHECK (amount > 0)
 ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
 